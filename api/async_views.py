@@ -0,0 +1,43 @@
+from django.http import HttpResponse, HttpResponseNotAllowed, JsonResponse
+from rest_framework import exceptions, status
+from rest_framework.request import Request
+from rest_framework.settings import api_settings
+from api.serializers.resource_password import ResourcePasswordDetailsSerializer
+from api.views import verify_resource_password
+from guard_engine.asynchronous import database_sync_to_async
+from guard_engine.db_routers import use_replica_database
+from guard_engine.throttling import throttle_password_checks
+
+
+def authenticate_api_request(request):
+    api_request = Request(request, authenticators=[
+        authentication_class() for authentication_class in api_settings.DEFAULT_AUTHENTICATION_CLASSES
+    ])
+    try:
+        return api_request.user.is_authenticated
+    except exceptions.APIException:
+        return False
+
+
+@use_replica_database
+@throttle_password_checks
+async def check_resource_password(request):
+    if request.method != 'POST':
+        return HttpResponseNotAllowed(['POST'])
+    if not await database_sync_to_async(authenticate_api_request)(request):
+        return HttpResponse(status=status.HTTP_401_UNAUTHORIZED)
+
+    serialized_request = ResourcePasswordDetailsSerializer(data=request.POST)
+    if not serialized_request.is_valid():
+        return HttpResponse(status=status.HTTP_403_FORBIDDEN)
+
+    verified_resource_data = await database_sync_to_async(verify_resource_password)(
+        serialized_request.data, request.META['HTTP_USER_AGENT']
+    )
+    if verified_resource_data is None:
+        return HttpResponse(status=status.HTTP_404_NOT_FOUND)
+    return JsonResponse(verified_resource_data)
+
+
+# Authenticated by the API authentication classes, which enforce CSRF checks for session authentication
+check_resource_password.csrf_exempt = True
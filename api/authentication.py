@@ -0,0 +1,30 @@
+from rest_framework import exceptions
+from rest_framework.authentication import BaseAuthentication, get_authorization_header
+from guard_engine.api_keys import get_api_key_user
+
+
+class ApiKeyAuthentication(BaseAuthentication):
+    """
+    Authenticates ``Authorization: Api-Key <key>`` headers with keys issued by the issue_api_key command.
+    """
+    keyword = 'Api-Key'
+
+    def authenticate(self, request):
+        authorization = get_authorization_header(request).split()
+        if not authorization or authorization[0].lower() != self.keyword.lower().encode():
+            return None
+        if len(authorization) != 2:
+            raise exceptions.AuthenticationFailed('Invalid api key header.')
+
+        try:
+            key = authorization[1].decode()
+        except UnicodeError:
+            raise exceptions.AuthenticationFailed('Invalid api key header.')
+
+        user = get_api_key_user(key)
+        if user is None:
+            raise exceptions.AuthenticationFailed('Invalid api key.')
+        return user, None
+
+    def authenticate_header(self, request):
+        return self.keyword
@@ -3,10 +3,13 @@ from guard_engine.models import SecuredFile
 
 
 class FileRouteSerializer(serializers.ModelSerializer):
+    file_name = serializers.CharField(source='display_name', read_only=True)
 
     class Meta:
         model = SecuredFile
-        fields = ('persisted_file',)
+        fields = ('persisted_file', 'file_name')
+        # Files are served through download_route, storage urls would bypass it and cost a storage call per file
+        extra_kwargs = {'persisted_file': {'write_only': True}}
 
 
 class FileResourceSerializer(serializers.ModelSerializer):
@@ -14,4 +17,7 @@ class FileResourceSerializer(serializers.ModelSerializer):
     class Meta:
         model = SecuredFile
         exclude = ['file_size']
+        # Saved with the request user and a freshly generated route, guarded by the unique constraint
+        read_only_fields = ('user', )
+        extra_kwargs = {'resource_route': {'validators': []}}
 
@@ -6,6 +6,7 @@ class ResourcePasswordDetailsSerializer(serializers.Serializer):
     resource_type = serializers.CharField(max_length=5, min_length=4)
     resource_uid = serializers.CharField(max_length=32)
     password = serializers.CharField(max_length=32)
+    issue_token = serializers.BooleanField(required=False, default=False)
 
     def update(self, instance, validated_data):
         pass
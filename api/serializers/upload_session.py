@@ -0,0 +1,21 @@
+import os
+
+from rest_framework import serializers
+
+
+class UploadSessionSerializer(serializers.Serializer):
+    file_name = serializers.CharField(max_length=255)
+    total_size = serializers.IntegerField(min_value=1)
+
+    def validate_file_name(self, value):
+        # Chunks are assembled into a file of this name, so it can't point at a directory
+        file_name = os.path.basename(value)
+        if file_name in ('', '.', '..'):
+            raise serializers.ValidationError('Invalid file name')
+        return file_name
+
+    def update(self, instance, validated_data):
+        pass
+
+    def create(self, validated_data):
+        pass
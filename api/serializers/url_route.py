@@ -14,3 +14,6 @@ class UrlResourceSerializer(serializers.ModelSerializer):
     class Meta:
         model = SecuredUrl
         fields = '__all__'
+        # Saved with the request user and a freshly generated route, guarded by the unique constraint
+        read_only_fields = ('user', )
+        extra_kwargs = {'resource_route': {'validators': []}}
@@ -1,9 +1,26 @@
+from django.conf import settings
 from django.urls import path
-from api.views import check_resource_password, secure_new_resource, details_of_resources
+from api import async_views
+from api.views import (
+    check_resource_password, check_resource_passwords, secure_new_resource, secure_new_resources, details_of_resources,
+    route_cache_stats, throttle_stats, start_upload_session, upload_session_details, upload_session_chunk,
+    finalize_upload_session
+)
+
+if settings.ASYNC_VIEWS:
+    check_resource_password = async_views.check_resource_password
 
 
 urlpatterns = [
     path('check-resource-password', check_resource_password, name='check_resource_password'),
+    path('check-resource-passwords', check_resource_passwords, name='check_resource_passwords'),
     path('secure-resource', secure_new_resource, name='secure_new_resource'),
-    path('resources-details', details_of_resources, name='details_of_resources')
+    path('secure-resources', secure_new_resources, name='secure_new_resources'),
+    path('resources-details', details_of_resources, name='details_of_resources'),
+    path('route-cache-stats', route_cache_stats, name='route_cache_stats'),
+    path('throttle-stats', throttle_stats, name='throttle_stats'),
+    path('upload-sessions', start_upload_session, name='start_upload_session'),
+    path('upload-sessions/<uuid:upload_id>', upload_session_details, name='upload_session_details'),
+    path('upload-sessions/<uuid:upload_id>/chunks/<int:chunk_index>', upload_session_chunk, name='upload_session_chunk'),
+    path('upload-sessions/<uuid:upload_id>/finalize', finalize_upload_session, name='finalize_upload_session')
 ]
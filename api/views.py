@@ -1,58 +1,206 @@
 import datetime
+import math
 import string
-from uuid import uuid4
 from random import choice, randint
 from rest_framework import status
 from rest_framework.response import Response
 from rest_framework.authentication import SessionAuthentication, BasicAuthentication
 from rest_framework.decorators import api_view, authentication_classes, permission_classes
 from rest_framework.permissions import IsAuthenticated
+from api.authentication import ApiKeyAuthentication
 from api.serializers.file_route import FileRouteSerializer, FileResourceSerializer
 from api.serializers.resource_password import ResourcePasswordDetailsSerializer
+from api.serializers.resources_details import ResourcesDetailsRangeSerializer
+from api.serializers.upload_session import UploadSessionSerializer
 from api.serializers.url_route import UrlRouteSerializer, UrlResourceSerializer
-from guard_engine.models import SecuredUrl, SecuredFile
+from guard_engine.access_tokens import create_access_token
+from guard_engine.bulk import bulk_create_resources
+from guard_engine.db_routers import use_primary_database, use_replica_database
+from guard_engine.downloads import create_download_token
+from guard_engine.metrics import PROMETHEUS_CONTENT_TYPE, metrics_registry, render_metrics
+from guard_engine.models import SecuredUrl, SecuredFile, UploadSession
+from guard_engine.quotas import lock_user_quota, record_quota_rejection
+from guard_engine.resource_ids import new_resource_route
+from guard_engine.route_cache import route_cache
+from guard_engine.route_filter import route_filter
+from guard_engine.stats import get_daily_stats, get_live_gauges, record_password_check
+from guard_engine.throttling import (
+    get_client_ip, get_throttled_response, password_check_throttle, throttle_password_checks
+)
+from guard_engine.uploads import (
+    ChunkRejected, assemble_upload, create_upload_session, discard_upload_session, get_chunks_number,
+    get_received_chunks, get_reserved_upload_size, write_chunk
+)
+from guard_engine.visits import record_visit, record_visits
 from django.utils import timezone
 from django.apps import apps
 from django.conf import settings
-from django.db.models import Sum
+from django.core.files import File
+from django.db import transaction
+from django.http import HttpResponse
+from django.urls import reverse
+from django.utils.crypto import constant_time_compare
 
 
-@api_view(['POST'])
-def check_resource_password(request):
-    serialized_request = ResourcePasswordDetailsSerializer(data=request.POST)
-    if not serialized_request.is_valid():
-        return Response(status=status.HTTP_403_FORBIDDEN)
+def get_new_resource_data(request, resource_type, creation_ts):
+    return {
+        'resource_route': new_resource_route(request.user.username, resource_type),
+        'password': "".join(
+            choice(string.ascii_letters + string.punctuation + string.digits) for i in range(randint(8, 16))
+        ),
+        'creation_date': creation_ts.date(),
+        'expire_ts': creation_ts + datetime.timedelta(days=1),
+        'visit_counter': 0,
+        'latest_user_agent': request.META['HTTP_USER_AGENT'][:64]
+    }
+
+
+def get_new_bulk_resource(request, model, creation_ts, **resource_fields):
+    new_resource_data = get_new_resource_data(request, 'urls' if model is SecuredUrl else 'files', creation_ts)
+    new_resource_data['user'] = request.user
+    return model(**new_resource_data, **resource_fields)
+
+
+def get_verified_resource_data(data, resource_object):
+    if data.get('resource_type') == 'urls':
+        verified_resource_data = dict(UrlRouteSerializer(resource_object).data)
+    else:
+        verified_resource_data = dict(FileRouteSerializer(resource_object).data, download_route='{route}?token={token}'.format(
+            route=reverse('download_file', kwargs={'user_name': data.get('user_name'), 'resource_uid': data.get('resource_uid')}),
+            token=create_download_token(resource_object)
+        ))
+    if data.get('issue_token'):
+        verified_resource_data['access_route'] = reverse(
+            'resource_access', kwargs={'token': create_access_token(resource_object)}
+        )
+    return verified_resource_data
 
-    data = serialized_request.data
+
+def verify_resource_password(data, user_agent):
     source = apps.get_model('guard_engine', 'SecuredUrl' if data.get('resource_type') == 'urls' else 'SecuredFile')
     try:
-        resource_object = source.objects.get(
-            user__username=data.get('user_name'),
-            resource_route='{user_name}/{resource_type}/{resource_uid}'.format(
+        resource_object = route_cache.get(
+            source,
+            data.get('user_name'),
+            '{user_name}/{resource_type}/{resource_uid}'.format(
                 user_name=data.get('user_name'),
                 resource_type=data.get('resource_type'),
                 resource_uid=data.get('resource_uid')
-            ),
-            password=data.get('password')
+            )
         )
     except (SecuredUrl.DoesNotExist, SecuredFile.DoesNotExist) as e:
-        return Response(status=status.HTTP_404_NOT_FOUND)
+        record_password_check(data.get('resource_type'), verified=False)
+        return None
+
+    if not constant_time_compare(resource_object.password, data.get('password')) or not resource_object.is_accessible():
+        record_password_check(data.get('resource_type'), verified=False)
+        return None
+
+    record_password_check(data.get('resource_type'), verified=True)
+    record_visit(resource_object, user_agent)
+    return get_verified_resource_data(data, resource_object)
+
+
+def get_user_upload_session(request, upload_id, lock=False):
+    upload_sessions = UploadSession.objects.select_for_update() if lock else UploadSession.objects
+    try:
+        upload_session = upload_sessions.get(upload_id=upload_id, user=request.user)
+    except UploadSession.DoesNotExist:
+        return None
+    return upload_session if upload_session.is_accessible() else None
+
+
+@use_replica_database
+@throttle_password_checks
+@api_view(['POST'])
+def check_resource_password(request):
+    serialized_request = ResourcePasswordDetailsSerializer(data=request.POST)
+    if not serialized_request.is_valid():
+        return Response(status=status.HTTP_403_FORBIDDEN)
 
-    if not resource_object.is_accessible():
-        resource_object.delete()
+    verified_resource_data = verify_resource_password(serialized_request.data, request.META['HTTP_USER_AGENT'])
+    if verified_resource_data is None:
         return Response(status=status.HTTP_404_NOT_FOUND)
+    return Response(verified_resource_data)
 
-    serialized_resource = UrlRouteSerializer(resource_object) if data.get('resource_type') == 'urls' else FileRouteSerializer(resource_object)
-    resource_object.visit_counter += 1
-    resource_object.latest_user_agent = request.META['HTTP_USER_AGENT'][:64]
-    resource_object.save()
 
-    return Response(serialized_resource.data)
+@use_replica_database
+@api_view(['POST'])
+def check_resource_passwords(request):
+    if not isinstance(request.data, list) or not request.data:
+        return Response(status=status.HTTP_400_BAD_REQUEST)
+    # A batch larger than the client IP bucket could never be let through by the throttle
+    checks_limit = settings.BULK_PASSWORD_CHECKS_LIMIT
+    if settings.THROTTLE_ENABLED:
+        checks_limit = min(checks_limit, settings.THROTTLE_IP_BURST)
+    if len(request.data) > checks_limit:
+        return Response(status=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE)
+    client_ip = get_client_ip(request)
+    if settings.THROTTLE_ENABLED:
+        retry_after = password_check_throttle.check_ip(client_ip, len(request.data))
+        if retry_after:
+            return get_throttled_response(retry_after)
+
+    checked_resources = []
+    models_routes = {SecuredUrl: [], SecuredFile: []}
+    for requested_resource in request.data:
+        serialized_request = ResourcePasswordDetailsSerializer(data=requested_resource)
+        if not serialized_request.is_valid():
+            checked_resources.append({'status': status.HTTP_403_FORBIDDEN})
+            continue
+
+        data = serialized_request.data
+        source = SecuredUrl if data.get('resource_type') == 'urls' else SecuredFile
+        resource_route = '{user_name}/{resource_type}/{resource_uid}'.format(
+            user_name=data.get('user_name'),
+            resource_type=data.get('resource_type'),
+            resource_uid=data.get('resource_uid')
+        )
+        retry_after = settings.THROTTLE_ENABLED and password_check_throttle.check_route(client_ip, resource_route)
+        if retry_after:
+            checked_resources.append({'status': status.HTTP_429_TOO_MANY_REQUESTS, 'retry_after': math.ceil(retry_after)})
+            continue
+
+        models_routes[source].append((data.get('user_name'), resource_route))
+        checked_resources.append((data, source, resource_route))
+
+    models_resources = {
+        source: route_cache.get_many(source, resource_routes) if resource_routes else {}
+        for source, resource_routes in models_routes.items()
+    }
+
+    results, visited_resources = [], []
+    for checked_resource in checked_resources:
+        if isinstance(checked_resource, dict):
+            results.append(checked_resource)
+            continue
+
+        data, source, resource_route = checked_resource
+        resource_object = models_resources[source].get(resource_route)
+        if (
+            resource_object is None or not resource_object.is_accessible() or
+            not constant_time_compare(resource_object.password, data.get('password'))
+        ):
+            if settings.THROTTLE_ENABLED:
+                password_check_throttle.register_failure(client_ip, resource_route)
+            record_password_check(data.get('resource_type'), verified=False)
+            results.append({'status': status.HTTP_404_NOT_FOUND})
+            continue
+
+        if settings.THROTTLE_ENABLED:
+            password_check_throttle.register_success(client_ip, resource_route)
+        record_password_check(data.get('resource_type'), verified=True)
+        visited_resources.append(resource_object)
+        results.append(dict(get_verified_resource_data(data, resource_object), status=status.HTTP_200_OK))
+
+    record_visits(visited_resources, request.META['HTTP_USER_AGENT'])
+    return Response(results)
 
 
 @api_view(['POST'])
-@authentication_classes([SessionAuthentication, BasicAuthentication])
+@authentication_classes([SessionAuthentication, BasicAuthentication, ApiKeyAuthentication])
 @permission_classes([IsAuthenticated])
+@transaction.atomic
 def secure_new_resource(request):
     requested_file = request.FILES
     requested_url = request.data
@@ -66,34 +214,22 @@ def secure_new_resource(request):
 
     user = request.user
     creation_ts = timezone.now()
-
     if requested_file:
         file_size = resource.validated_data['persisted_file'].size
-        created_files_size = SecuredFile.objects.filter(
-            user=user, expire_ts__gte=creation_ts
-        ).aggregate(files_size=Sum('file_size')).get('files_size')
+        quota = lock_user_quota(user, files_size=file_size)
+    else:
+        quota = lock_user_quota(user, links_number=1)
 
-        if file_size > settings.FILE_LIMIT_SIZE or created_files_size + file_size > settings.USER_FILES_LIMIT:
+    if requested_file:
+        if file_size > settings.FILE_LIMIT_SIZE or quota.files_size + file_size > settings.USER_FILES_LIMIT:
+            record_quota_rejection('files')
             return Response(status=status.HTTP_406_NOT_ACCEPTABLE)
     else:
-        links_number = SecuredUrl.objects.filter(user=user, expire_ts__gte=creation_ts).count()
-        if links_number + 1 > settings.LINKS_LIMIT:
+        if quota.links_number + 1 > settings.LINKS_LIMIT:
+            record_quota_rejection('urls')
             return Response(status=status.HTTP_406_NOT_ACCEPTABLE)
 
-    new_resource_data = {
-        'user': user.id,
-        'resource_route': "{user_name}/urls/{resource_uid}".format(
-            user_name=user.username,
-            resource_uid=uuid4().time_low
-        ),
-        'password': "".join(
-            choice(string.ascii_letters + string.punctuation + string.digits) for i in range(randint(8, 16))
-        ),
-        'creation_date': creation_ts.date(),
-        'expire_ts': creation_ts + datetime.timedelta(days=1),
-        'visit_counter': 0,
-        'latest_user_agent': request.META['HTTP_USER_AGENT'][:64]
-    }
+    new_resource_data = get_new_resource_data(request, 'files' if requested_file else 'urls', creation_ts)
 
     if requested_file:
         new_resource_data['persisted_file'] = resource.validated_data['persisted_file']
@@ -105,7 +241,7 @@ def secure_new_resource(request):
     if not serialized_resource.is_valid():
         return Response(status=status.HTTP_500_INTERNAL_SERVER_ERROR)
 
-    created_resource = serialized_resource.save()
+    created_resource = serialized_resource.save(user=request.user)
     return Response({
         'http_route': '{domain}/{route}'.format(
             domain=request.META['HTTP_HOST'], route=created_resource.resource_route
@@ -114,30 +250,236 @@ def secure_new_resource(request):
     })
 
 
+@api_view(['POST'])
+@authentication_classes([SessionAuthentication, BasicAuthentication, ApiKeyAuthentication])
+@permission_classes([IsAuthenticated])
+@transaction.atomic
+def secure_new_resources(request):
+    requested_files = request.FILES.getlist('persisted_file')
+    requested_urls = request.data if isinstance(request.data, list) else None
+
+    if not requested_files and not requested_urls:
+        return Response(status=status.HTTP_400_BAD_REQUEST)
+    if len(requested_files or requested_urls) > settings.BULK_RESOURCES_LIMIT:
+        return Response(status=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE)
+
+    user = request.user
+    creation_ts = timezone.now()
+    quota = lock_user_quota(
+        user,
+        links_number=len(requested_urls or []),
+        files_size=sum(requested_file.size for requested_file in requested_files)
+    )
+    links_number, files_size = quota.links_number, quota.files_size
+
+    results, new_resources = [], []
+    if requested_files:
+        model = SecuredFile
+        for requested_file in requested_files:
+            resource = FileRouteSerializer(data={'persisted_file': requested_file})
+            if not resource.is_valid():
+                results.append({'errors': resource.errors})
+                continue
+
+            file_size = resource.validated_data['persisted_file'].size
+            if file_size > settings.FILE_LIMIT_SIZE or files_size + file_size > settings.USER_FILES_LIMIT:
+                record_quota_rejection('files')
+                results.append({'errors': {'persisted_file': ['Files limit exceeded.']}})
+                continue
+
+            files_size += file_size
+            new_resource = get_new_bulk_resource(request, model, creation_ts, persisted_file=resource.validated_data['persisted_file'])
+            new_resources.append(new_resource)
+            results.append(new_resource)
+    else:
+        model = SecuredUrl
+        for requested_url in requested_urls:
+            resource = UrlRouteSerializer(data={'url_route': requested_url})
+            if not resource.is_valid():
+                results.append({'errors': resource.errors})
+                continue
+
+            if links_number + 1 > settings.LINKS_LIMIT:
+                record_quota_rejection('urls')
+                results.append({'errors': {'url_route': ['Links limit exceeded.']}})
+                continue
+
+            links_number += 1
+            new_resource = get_new_bulk_resource(request, model, creation_ts, url_route=resource.validated_data['url_route'])
+            new_resources.append(new_resource)
+            results.append(new_resource)
+
+    bulk_create_resources(model, new_resources)
+    return Response({
+        'created': len(new_resources),
+        'resources': [
+            result if isinstance(result, dict) else {
+                'http_route': '{domain}/{route}'.format(domain=request.META['HTTP_HOST'], route=result.resource_route),
+                'password': result.password
+            }
+            for result in results
+        ]
+    })
+
+
 @api_view(['GET'])
-@authentication_classes([SessionAuthentication, BasicAuthentication])
+@authentication_classes([SessionAuthentication, BasicAuthentication, ApiKeyAuthentication])
 @permission_classes([IsAuthenticated])
 def details_of_resources(request):
     request_user = request.user
     if not request_user.is_active or not request_user.is_staff or not request_user.is_superuser:
         return Response(status=status.HTTP_403_FORBIDDEN)
 
-    verification_ts = timezone.now()
-    SecuredUrl.objects.filter(user=request_user, expire_ts__lt=verification_ts).delete()
-    SecuredFile.objects.filter(user=request_user, expire_ts__lt=verification_ts).delete()
-
-    unique_creation_dates = set(
-        list(SecuredUrl.objects.distinct('creation_date').values_list('creation_date', flat=True)) +
-        list(SecuredFile.objects.distinct('creation_date').values_list('creation_date', flat=True))
-    )
+    serialized_range = ResourcesDetailsRangeSerializer(data={
+        'date_from': request.query_params.get('from'),
+        'date_to': request.query_params.get('to')
+    })
+    if not serialized_range.is_valid():
+        return Response(status=status.HTTP_400_BAD_REQUEST)
 
-    resources_details = {}
-    for creation_date in unique_creation_dates:
-        date_key = creation_date.strftime('%Y-%m-%d')
-        resources_details[date_key] = {
-            'files': SecuredFile.objects.filter(creation_date=date_key, visit_counter__gte=1).count(),
-            'links': SecuredUrl.objects.filter(creation_date=date_key, visit_counter__gte=1).count()
+    resources_details = {
+        daily_stats.date.strftime('%Y-%m-%d'): {
+            'files': daily_stats.files_visited,
+            'links': daily_stats.links_visited
         }
+        for daily_stats in get_daily_stats(**serialized_range.validated_data)
+    }
     if not resources_details:
         return Response(status=status.HTTP_404_NOT_FOUND)
     return Response(resources_details)
+
+
+@api_view(['GET'])
+@authentication_classes([SessionAuthentication, BasicAuthentication, ApiKeyAuthentication])
+@permission_classes([IsAuthenticated])
+def route_cache_stats(request):
+    request_user = request.user
+    if not request_user.is_active or not request_user.is_staff or not request_user.is_superuser:
+        return Response(status=status.HTTP_403_FORBIDDEN)
+
+    return Response(dict(route_cache.get_stats(), route_filter=route_filter.get_stats()))
+
+
+@api_view(['GET'])
+@authentication_classes([SessionAuthentication, BasicAuthentication, ApiKeyAuthentication])
+@permission_classes([IsAuthenticated])
+def throttle_stats(request):
+    request_user = request.user
+    if not request_user.is_active or not request_user.is_staff or not request_user.is_superuser:
+        return Response(status=status.HTTP_403_FORBIDDEN)
+
+    return Response(password_check_throttle.get_stats())
+
+
+@api_view(['GET'])
+@authentication_classes([SessionAuthentication, BasicAuthentication, ApiKeyAuthentication])
+@permission_classes([IsAuthenticated])
+def export_metrics(request):
+    request_user = request.user
+    if not request_user.is_active or not request_user.is_staff or not request_user.is_superuser:
+        return Response(status=status.HTTP_403_FORBIDDEN)
+
+    metrics_registry.flush()
+    return HttpResponse(render_metrics(get_live_gauges()), content_type=PROMETHEUS_CONTENT_TYPE)
+
+
+@api_view(['POST'])
+@authentication_classes([SessionAuthentication, BasicAuthentication, ApiKeyAuthentication])
+@permission_classes([IsAuthenticated])
+@transaction.atomic
+def start_upload_session(request):
+    serialized_request = UploadSessionSerializer(data=request.data)
+    if not serialized_request.is_valid():
+        return Response(status=status.HTTP_400_BAD_REQUEST)
+
+    user = request.user
+    total_size = serialized_request.validated_data['total_size']
+    quota = lock_user_quota(user)
+    reserved_size = get_reserved_upload_size(user)
+    if quota.files_size + reserved_size + total_size > settings.USER_FILES_LIMIT:
+        quota = lock_user_quota(user, files_size=reserved_size + total_size)
+    if (
+        total_size > settings.UPLOAD_SESSION_FILE_LIMIT_SIZE or
+        quota.files_size + reserved_size + total_size > settings.USER_FILES_LIMIT
+    ):
+        record_quota_rejection('files')
+        return Response(status=status.HTTP_406_NOT_ACCEPTABLE)
+
+    upload_session = create_upload_session(user, serialized_request.validated_data['file_name'], total_size)
+    return Response({
+        'upload_id': upload_session.upload_id,
+        'chunk_size': upload_session.chunk_size,
+        'chunks_number': get_chunks_number(upload_session)
+    }, status=status.HTTP_201_CREATED)
+
+
+@use_primary_database
+@api_view(['GET'])
+@authentication_classes([SessionAuthentication, BasicAuthentication, ApiKeyAuthentication])
+@permission_classes([IsAuthenticated])
+def upload_session_details(request, upload_id):
+    upload_session = get_user_upload_session(request, upload_id)
+    if not upload_session:
+        return Response(status=status.HTTP_404_NOT_FOUND)
+
+    return Response({
+        'upload_id': upload_session.upload_id,
+        'chunk_size': upload_session.chunk_size,
+        'chunks_number': get_chunks_number(upload_session),
+        'received_chunks': get_received_chunks(upload_session)
+    })
+
+
+@api_view(['PUT'])
+@authentication_classes([SessionAuthentication, BasicAuthentication, ApiKeyAuthentication])
+@permission_classes([IsAuthenticated])
+def upload_session_chunk(request, upload_id, chunk_index):
+    upload_session = get_user_upload_session(request, upload_id)
+    if not upload_session:
+        return Response(status=status.HTTP_404_NOT_FOUND)
+
+    try:
+        write_chunk(upload_session, chunk_index, request, int(request.META.get('CONTENT_LENGTH') or 0))
+    except ChunkRejected:
+        return Response(status=status.HTTP_400_BAD_REQUEST)
+    return Response(status=status.HTTP_204_NO_CONTENT)
+
+
+@api_view(['POST'])
+@authentication_classes([SessionAuthentication, BasicAuthentication, ApiKeyAuthentication])
+@permission_classes([IsAuthenticated])
+@transaction.atomic
+def finalize_upload_session(request, upload_id):
+    # Locked before the quota, so concurrent finalizations of one session create a single file
+    upload_session = get_user_upload_session(request, upload_id, lock=True)
+    if not upload_session:
+        return Response(status=status.HTTP_404_NOT_FOUND)
+
+    received_chunks = get_received_chunks(upload_session)
+    if len(received_chunks) != get_chunks_number(upload_session):
+        return Response({
+            'missing_chunks': sorted(set(range(get_chunks_number(upload_session))) - set(received_chunks))
+        }, status=status.HTTP_409_CONFLICT)
+
+    quota = lock_user_quota(request.user, files_size=upload_session.total_size)
+    if quota.files_size + upload_session.total_size > settings.USER_FILES_LIMIT:
+        record_quota_rejection('files')
+        return Response(status=status.HTTP_406_NOT_ACCEPTABLE)
+
+    assembled_path, digest = assemble_upload(upload_session)
+    with open(assembled_path, 'rb') as assembled_file:
+        new_resource_data = get_new_resource_data(request, 'files', timezone.now())
+        new_resource_data['persisted_file'] = File(assembled_file, name=upload_session.file_name)
+        new_resource_data['persisted_file'].sha256 = digest
+        serialized_resource = FileResourceSerializer(data=new_resource_data)
+        if not serialized_resource.is_valid():
+            return Response(status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+        created_resource = serialized_resource.save(user=request.user)
+
+    discard_upload_session(upload_session)
+    return Response({
+        'http_route': '{domain}/{route}'.format(
+            domain=request.META['HTTP_HOST'], route=created_resource.resource_route
+        ),
+        'password': created_resource.password
+    })
@@ -0,0 +1,109 @@
+"""
+Compares how the WSGI and ASGI deployments behave under growing concurrency. Start the server to test, e.g.
+
+    gunicorn file_guard.wsgi:application --workers 2
+    ASYNC_VIEWS=1 gunicorn file_guard.asgi:application --workers 2 --worker-class uvicorn.workers.UvicornWorker
+
+and run against it:
+
+    python -m benchmarks.concurrency --base-url http://127.0.0.1:8000 --user admin --password admin1 \\
+        --resource admin/files/<uid> --resource-password <password> --concurrency 1,10,50,200
+"""
+import argparse
+import base64
+import statistics
+import time
+import urllib.error
+import urllib.parse
+import urllib.request
+from concurrent.futures import ThreadPoolExecutor
+
+
+def get_password_check_request(options):
+    user_name, resource_type, resource_uid = options.resource.split('/')
+    credentials = base64.b64encode('{}:{}'.format(options.user, options.password).encode()).decode()
+    return urllib.request.Request(
+        '{}/api/check-resource-password'.format(options.base_url),
+        data=urllib.parse.urlencode({
+            'user_name': user_name,
+            'resource_type': resource_type,
+            'resource_uid': resource_uid,
+            'password': options.resource_password
+        }).encode(),
+        headers={'Authorization': 'Basic {}'.format(credentials), 'User-Agent': 'benchmarks/concurrency'}
+    )
+
+
+def get_download_request(options):
+    return urllib.request.Request(
+        '{}/{}/download'.format(options.base_url, options.resource),
+        headers={'X-Resource-Password': options.resource_password, 'User-Agent': 'benchmarks/concurrency'}
+    )
+
+
+def send(request, timeout):
+    started_ts = time.perf_counter()
+    try:
+        with urllib.request.urlopen(request, timeout=timeout) as response:
+            response.read()
+            status = response.status
+    except urllib.error.HTTPError as e:
+        status = e.code
+    except OSError:
+        status = None
+    return time.perf_counter() - started_ts, status
+
+
+def get_percentile(latencies, percentile):
+    return latencies[min(int(len(latencies) * percentile / 100), len(latencies) - 1)]
+
+
+def run_scenario(request_factory, options, concurrency):
+    requests_number = max(options.requests, concurrency)
+    started_ts = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as executor:
+        results = list(executor.map(lambda _: send(request_factory(options), options.timeout), range(requests_number)))
+    elapsed = time.perf_counter() - started_ts
+
+    latencies = sorted(latency for latency, status in results if status == 200)
+    return {
+        'throughput': len(latencies) / elapsed,
+        'errors': sum(status != 200 for _, status in results),
+        'p50': statistics.median(latencies) if latencies else None,
+        'p95': get_percentile(latencies, 95) if latencies else None,
+        'p99': get_percentile(latencies, 99) if latencies else None,
+    }
+
+
+def format_latency(latency):
+    return '{:>8.1f}'.format(latency * 1000) if latency is not None else '       -'
+
+
+def run(options):
+    scenarios = {'password check': get_password_check_request}
+    if options.resource.split('/')[1] == 'files':
+        scenarios['download'] = get_download_request
+
+    print('{:<16} {:>11} {:>10} {:>7} {:>8} {:>8} {:>8}'.format(
+        'scenario', 'concurrency', 'req/s', 'errors', 'p50 ms', 'p95 ms', 'p99 ms'
+    ))
+    for scenario_name, request_factory in scenarios.items():
+        for concurrency in options.concurrency:
+            result = run_scenario(request_factory, options, concurrency)
+            print('{:<16} {:>11} {:>10.1f} {:>7} {} {} {}'.format(
+                scenario_name, concurrency, result['throughput'], result['errors'],
+                format_latency(result['p50']), format_latency(result['p95']), format_latency(result['p99'])
+            ))
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--base-url', default='http://127.0.0.1:8000')
+    parser.add_argument('--user', required=True)
+    parser.add_argument('--password', required=True)
+    parser.add_argument('--resource', required=True, help='Route of an existing resource, <user_name>/<type>/<uid>.')
+    parser.add_argument('--resource-password', required=True)
+    parser.add_argument('--concurrency', type=lambda value: [int(level) for level in value.split(',')], default=[1, 10, 50])
+    parser.add_argument('--requests', type=int, default=500, help='Requests per concurrency level.')
+    parser.add_argument('--timeout', type=float, default=30)
+    run(parser.parse_args())
@@ -0,0 +1,40 @@
+"""
+Compares resource uid generation schemes:
+
+    python -m benchmarks.resource_ids [--number 200000]
+"""
+import argparse
+import math
+import timeit
+from uuid import uuid4
+
+from guard_engine.resource_ids import new_resource_uid
+
+
+def get_collision_probability(bits, uids_number):
+    return -math.expm1(-uids_number * (uids_number - 1) / 2 ** (bits + 1))
+
+
+def run(number):
+    schemes = {
+        'uuid4().time_low': (lambda: str(uuid4().time_low), 32),
+        'new_resource_uid()': (new_resource_uid, 80),
+    }
+    for scheme_name, (generate, random_bits) in schemes.items():
+        seconds = min(timeit.repeat(generate, number=number, repeat=3))
+        uids = [generate() for _ in range(number)]
+        print('{name:<20} {rate:>12,.0f} uids/s  {length:>2} chars  collisions: {collisions}  '
+              'P(collision) for 1M uids: {probability:.2e}  sorted by time: {ordered}'.format(
+                  name=scheme_name,
+                  rate=number / seconds,
+                  length=max(len(uid) for uid in uids),
+                  collisions=number - len(set(uids)),
+                  probability=get_collision_probability(random_bits, 10 ** 6),
+                  ordered=uids == sorted(uids)
+              ))
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--number', type=int, default=200000)
+    run(parser.parse_args().number)
@@ -0,0 +1,263 @@
+"""
+Load benchmarks of the core endpoints, run with ``python manage.py run_benchmarks``.
+
+Every run seeds a fresh benchmark database, serves the application from an in-process threaded WSGI server
+and drives every scenario with concurrent HTTP clients.
+"""
+import base64
+import datetime
+import http.client
+import json
+import statistics
+import threading
+import time
+import urllib.parse
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.contrib.sessions.backends.db import SessionStore
+from django.core.files.base import ContentFile
+from django.core.handlers.wsgi import WSGIHandler
+from django.core.servers.basehttp import ThreadedWSGIServer, WSGIRequestHandler
+from django.db import connection
+from django.utils import timezone
+from django.utils.crypto import get_random_string
+from guard_engine.api_keys import issue_api_key
+from guard_engine.bulk import bulk_create_resources
+from guard_engine.models import SecuredFile, SecuredUrl
+from guard_engine.resource_ids import new_resource_route
+
+BENCHMARK_USER_AGENT = 'resource-guard-benchmarks'
+QUERIES_HEADER = 'X-Benchmark-Queries'
+
+
+class QuietWSGIRequestHandler(WSGIRequestHandler):
+
+    def log_message(self, *args):
+        pass
+
+
+class QueryCountingApplication:
+    """
+    Counts the database queries of every request and returns their number in a response header.
+    """
+
+    def __init__(self, application):
+        self.application = application
+
+    def __call__(self, environ, start_response):
+        queries = []
+
+        def count_query(execute, sql, params, many, context):
+            queries.append(sql)
+            return execute(sql, params, many, context)
+
+        def counting_start_response(status, headers, exc_info=None):
+            return start_response(status, headers + [(QUERIES_HEADER, str(len(queries)))], exc_info)
+
+        with connection.execute_wrapper(count_query):
+            return self.application(environ, counting_start_response)
+
+
+class BenchmarkServer(threading.Thread):
+
+    def __init__(self):
+        super().__init__(daemon=True)
+        self.httpd = ThreadedWSGIServer(('127.0.0.1', 0), QuietWSGIRequestHandler, allow_reuse_address=False)
+        self.httpd.set_app(QueryCountingApplication(WSGIHandler()))
+        self.port = self.httpd.server_address[1]
+
+    def run(self):
+        self.httpd.serve_forever()
+
+    def stop(self):
+        self.httpd.shutdown()
+        self.httpd.server_close()
+
+
+def create_resources(model, user, creation_ts, resources_number, get_resource_fields):
+    return bulk_create_resources(model, [
+        model(
+            user=user,
+            resource_route=new_resource_route(user.username, 'urls' if model is SecuredUrl else 'files'),
+            password=get_random_string(12),
+            creation_date=(creation_ts - datetime.timedelta(days=i % 7)).date(),
+            expire_ts=creation_ts + datetime.timedelta(days=1),
+            visit_counter=i % 3,
+            latest_user_agent=BENCHMARK_USER_AGENT,
+            **get_resource_fields(i)
+        )
+        for i in range(resources_number)
+    ])
+
+
+def seed_dataset(users_number, resources_number, file_size):
+    """
+    Creates users with ``resources_number`` urls and files each. The first user is a superuser driving the clients.
+    """
+    creation_ts = timezone.now()
+    users = [
+        User.objects.create_superuser('benchmark{}'.format(i), 'benchmark{}@example.com'.format(i), get_random_string(16))
+        if not i else
+        User.objects.create_user('benchmark{}'.format(i), 'benchmark{}@example.com'.format(i), get_random_string(16))
+        for i in range(users_number)
+    ]
+    for user in users:
+        create_resources(
+            SecuredUrl, user, creation_ts, resources_number,
+            lambda i: {'url_route': 'https://www.example.com/{}'.format(i)}
+        )
+        create_resources(
+            SecuredFile, user, creation_ts, resources_number,
+            lambda i: {'persisted_file': ContentFile(b'0' * file_size, name='seeded_{}.txt'.format(i))}
+        )
+    return users[0]
+
+
+def get_session_headers(user):
+    session = SessionStore()
+    session['_auth_user_id'] = str(user.pk)
+    session['_auth_user_backend'] = 'django.contrib.auth.backends.ModelBackend'
+    session['_auth_user_hash'] = user.get_session_auth_hash()
+    session.create()
+    csrf_token = get_random_string(32)
+    return {
+        'Cookie': '{}={}; {}={}'.format(
+            settings.SESSION_COOKIE_NAME, session.session_key, settings.CSRF_COOKIE_NAME, csrf_token
+        ),
+        'X-CSRFToken': csrf_token,
+        'User-Agent': BENCHMARK_USER_AGENT
+    }
+
+
+def get_multipart_body(field_name, file_name, content):
+    boundary = get_random_string(24)
+    body = (
+        '--{boundary}\r\nContent-Disposition: form-data; name="{field}"; filename="{file}"\r\n'
+        'Content-Type: text/plain\r\n\r\n'.format(boundary=boundary, field=field_name, file=file_name).encode() +
+        content + '\r\n--{}--\r\n'.format(boundary).encode()
+    )
+    return body, 'multipart/form-data; boundary={}'.format(boundary)
+
+
+def get_scenarios(user, file_size):
+    url = SecuredUrl.objects.filter(user=user).first()
+    user_name, resource_type, resource_uid = url.resource_route.split('/')
+    password_check_body = urllib.parse.urlencode({
+        'user_name': user_name, 'resource_type': resource_type, 'resource_uid': resource_uid, 'password': url.password
+    })
+    upload_body, upload_content_type = get_multipart_body('persisted_file', 'benchmark.txt', b'1' * file_size)
+
+    # Authorization scenarios drop the session cookie to measure the cost of authenticating every request
+    password = get_random_string(16)
+    user.set_password(password)
+    user.save(update_fields=['password'])
+    basic_auth_headers = {
+        'Authorization': 'Basic {}'.format(base64.b64encode('{}:{}'.format(user.username, password).encode()).decode()),
+        'Cookie': ''
+    }
+    api_key_headers = {'Authorization': 'Api-Key {}'.format(issue_api_key(user, 'benchmarks')), 'Cookie': ''}
+
+    return {
+        'dashboard': lambda: ('GET', '/', None, {}),
+        'url_creation': lambda: (
+            'POST', '/api/secure-resource', urllib.parse.urlencode({'url_route': 'https://www.example.com/created'}),
+            {'Content-Type': 'application/x-www-form-urlencoded'}
+        ),
+        'file_upload': lambda: ('POST', '/api/secure-resource', upload_body, {'Content-Type': upload_content_type}),
+        'verifier': lambda: ('GET', '/{}'.format(url.resource_route), None, {}),
+        'password_check': lambda: (
+            'POST', '/api/check-resource-password', password_check_body,
+            {'Content-Type': 'application/x-www-form-urlencoded'}
+        ),
+        'stats_api': lambda: ('GET', '/api/resources-details', None, {}),
+        'basic_auth_api': lambda: ('GET', '/api/resources-details', None, basic_auth_headers),
+        'api_key_api': lambda: ('GET', '/api/resources-details', None, api_key_headers),
+    }
+
+
+class BenchmarkClient(threading.local):
+
+    def __init__(self, port, headers):
+        self.port = port
+        self.headers = headers
+        self.connection = None
+
+    def send(self, method, path, body, headers):
+        if self.connection is None:
+            self.connection = http.client.HTTPConnection('127.0.0.1', self.port, timeout=60)
+
+        started_ts = time.perf_counter()
+        try:
+            self.connection.request(method, path, body=body, headers=dict(self.headers, Host='127.0.0.1', **headers))
+            response = self.connection.getresponse()
+            response.read()
+        except (OSError, http.client.HTTPException):
+            self.connection.close()
+            self.connection = None
+            return time.perf_counter() - started_ts, None, 0
+
+        if response.getheader('Connection', '').lower() == 'close':
+            self.connection.close()
+            self.connection = None
+        return time.perf_counter() - started_ts, response.status, int(response.getheader(QUERIES_HEADER, 0))
+
+
+def get_percentile(latencies, percentile):
+    return latencies[min(int(len(latencies) * percentile / 100), len(latencies) - 1)]
+
+
+def run_scenario(client, request_factory, requests_number, concurrency):
+    started_ts = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as executor:
+        results = list(executor.map(lambda _: client.send(*request_factory()), range(requests_number)))
+    elapsed = time.perf_counter() - started_ts
+
+    succeeded = [(latency, queries) for latency, status, queries in results if status and status < 400]
+    latencies = sorted(latency * 1000 for latency, _ in succeeded)
+    return {
+        'requests': requests_number,
+        'errors': requests_number - len(succeeded),
+        'throughput': round(len(succeeded) / elapsed, 2),
+        'p50_ms': round(statistics.median(latencies), 2) if latencies else None,
+        'p95_ms': round(get_percentile(latencies, 95), 2) if latencies else None,
+        'p99_ms': round(get_percentile(latencies, 99), 2) if latencies else None,
+        'queries_per_request': round(statistics.mean(queries for _, queries in succeeded), 2) if succeeded else None,
+    }
+
+
+def run_benchmarks(scenario_names, users_number, resources_number, file_size, requests_number, concurrency):
+    user = seed_dataset(users_number, resources_number, file_size)
+    scenarios = get_scenarios(user, file_size)
+
+    server = BenchmarkServer()
+    server.start()
+    try:
+        client = BenchmarkClient(server.port, get_session_headers(user))
+        return {
+            scenario_name: run_scenario(client, scenarios[scenario_name], requests_number, concurrency)
+            for scenario_name in scenario_names
+        }
+    finally:
+        server.stop()
+
+
+def compare_results(previous_results, results):
+    """
+    Returns the relative change of every metric shared by two runs, e.g. ``{'dashboard': {'p95_ms': 0.12}}``.
+    """
+    changes = {}
+    for scenario_name, scenario_results in results.items():
+        previous_scenario_results = previous_results.get(scenario_name, {})
+        changes[scenario_name] = {
+            metric: round((value - previous_scenario_results[metric]) / previous_scenario_results[metric], 4)
+            for metric, value in scenario_results.items()
+            if isinstance(value, (int, float)) and previous_scenario_results.get(metric)
+        }
+    return changes
+
+
+def load_results(path):
+    with open(path) as results_file:
+        return json.load(results_file)
@@ -11,6 +11,7 @@ https://docs.djangoproject.com/en/3.0/ref/settings/
 """
 
 import os
+import tempfile
 
 # Build paths inside the project like this: os.path.join(BASE_DIR, ...)
 import dj_database_url
@@ -46,6 +47,9 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    'guard_engine.metrics.MetricsMiddleware',
+    'guard_engine.instrumentation.RequestMetricsMiddleware',
+    'guard_engine.db_routers.ReplicaRoutingMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'whitenoise.middleware.WhiteNoiseMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
@@ -75,6 +79,7 @@ TEMPLATES = [
 ]
 
 WSGI_APPLICATION = 'file_guard.wsgi.application'
+ASGI_APPLICATION = 'file_guard.asgi.application'
 
 
 # Database
@@ -96,6 +101,81 @@ if not DEBUG and not TESTS:
     db_from_env = dj_database_url.config(default=DATABASE_URL, conn_max_age=500, ssl_require=True)
     DATABASES['default'].update(db_from_env)
 
+# Read replicas, comma separated database urls
+
+REPLICA_DATABASES = []
+for replica_number, replica_url in enumerate(filter(None, os.environ.get('DATABASE_REPLICA_URLS', default='').split(','))):
+    replica_alias = 'replica_{}'.format(replica_number)
+    DATABASES[replica_alias] = dj_database_url.parse(replica_url, conn_max_age=500)
+    DATABASES[replica_alias]['TEST'] = {'MIRROR': 'default'}
+    REPLICA_DATABASES.append(replica_alias)
+
+if TESTS:
+    # Separate test database, so the routing tests can tell which database served the reads
+    DATABASES['replica'] = dict(DATABASES['default'], TEST={
+        'NAME': None if DATABASES['default']['ENGINE'].endswith('sqlite3') else 'test_replica'
+    })
+
+DATABASE_ROUTERS = ['guard_engine.db_routers.ReplicaRouter']
+DATABASE_REPLICA_STICKY_TIME = int(os.environ.get('DATABASE_REPLICA_STICKY_TIME', default=10))  # seconds
+
+DEFAULT_AUTO_FIELD = 'django.db.models.AutoField'
+
+
+# Cache
+# https://docs.djangoproject.com/en/3.0/topics/cache/
+
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+    },
+    'routes': {
+        'BACKEND': os.environ.get('ROUTE_CACHE_BACKEND', default='django.core.cache.backends.locmem.LocMemCache'),
+        'LOCATION': os.environ.get('ROUTE_CACHE_LOCATION', default='routes'),
+    },
+    'throttling': {
+        'BACKEND': os.environ.get('THROTTLE_CACHE_BACKEND', default='django.core.cache.backends.locmem.LocMemCache'),
+        'LOCATION': os.environ.get('THROTTLE_CACHE_LOCATION', default='throttling'),
+    },
+    'dashboard': {
+        'BACKEND': os.environ.get('DASHBOARD_CACHE_BACKEND', default='django.core.cache.backends.locmem.LocMemCache'),
+        'LOCATION': os.environ.get('DASHBOARD_CACHE_LOCATION', default='dashboard'),
+    }
+}
+
+ROUTE_CACHE_ALIAS = 'routes'
+ROUTE_CACHE_TTL = int(os.environ.get('ROUTE_CACHE_TTL', default=300))  # seconds
+# Used instead of ROUTE_CACHE_TTL with process local caches, which other workers can't invalidate
+ROUTE_CACHE_LOCAL_TTL = int(os.environ.get('ROUTE_CACHE_LOCAL_TTL', default=5))  # seconds
+ROUTE_CACHE_NEGATIVE_TTL = int(os.environ.get('ROUTE_CACHE_NEGATIVE_TTL', default=5))  # seconds
+
+DASHBOARD_CACHE_ALIAS = 'dashboard'
+DASHBOARD_CACHE_TTL = int(os.environ.get('DASHBOARD_CACHE_TTL', default=300))  # seconds
+DASHBOARD_PAGE_SIZE = int(os.environ.get('DASHBOARD_PAGE_SIZE', default=10))  # resources per list page
+
+# Route filter
+
+ROUTE_FILTER_ENABLED = int(os.environ.get('ROUTE_FILTER_ENABLED', default=0))
+ROUTE_FILTER_CAPACITY = int(os.environ.get('ROUTE_FILTER_CAPACITY', default=1000000))  # expected live routes
+ROUTE_FILTER_ERROR_RATE = float(os.environ.get('ROUTE_FILTER_ERROR_RATE', default=0.01))
+ROUTE_FILTER_MAX_MEMORY = int(os.environ.get('ROUTE_FILTER_MAX_MEMORY', default=4 * 1048576))  # bytes
+ROUTE_FILTER_REBUILD_INTERVAL = int(os.environ.get('ROUTE_FILTER_REBUILD_INTERVAL', default=10 * 60))  # seconds
+
+# Password checks throttling
+
+THROTTLE_ENABLED = int(os.environ.get('THROTTLE_ENABLED', default=0))
+THROTTLE_BACKEND = os.environ.get('THROTTLE_BACKEND', default='guard_engine.throttling.LocalMemoryThrottleBackend')
+THROTTLE_CACHE_ALIAS = 'throttling'
+THROTTLE_TRUST_FORWARDED_FOR = int(os.environ.get('THROTTLE_TRUST_FORWARDED_FOR', default=0))
+THROTTLE_IP_RATE = float(os.environ.get('THROTTLE_IP_RATE', default=1))  # checks per second
+THROTTLE_IP_BURST = int(os.environ.get('THROTTLE_IP_BURST', default=30))
+THROTTLE_ROUTE_RATE = float(os.environ.get('THROTTLE_ROUTE_RATE', default=0.2))  # checks per second
+THROTTLE_ROUTE_BURST = int(os.environ.get('THROTTLE_ROUTE_BURST', default=10))
+THROTTLE_LOCKOUT_FAILURES = int(os.environ.get('THROTTLE_LOCKOUT_FAILURES', default=10))
+THROTTLE_LOCKOUT_TIME = int(os.environ.get('THROTTLE_LOCKOUT_TIME', default=15 * 60))  # seconds
+THROTTLE_LOCAL_MAX_KEYS = 10000
+THROTTLE_LOCAL_KEEP_TIME = 60 * 60  # seconds
+
 
 # Password validation
 # https://docs.djangoproject.com/en/3.0/ref/settings/#auth-password-validators
@@ -140,15 +220,104 @@ REST_FRAMEWORK = {
     'DEFAULT_AUTHENTICATION_CLASSES': [
         'rest_framework.authentication.BasicAuthentication',
         'rest_framework.authentication.SessionAuthentication',
+        'api.authentication.ApiKeyAuthentication',
     ]
 }
 
+API_KEY_CACHE_TTL = int(os.environ.get('API_KEY_CACHE_TTL', default=60))  # seconds
+API_KEY_CACHE_MAX_KEYS = 10000
+
 # Local verifires
 
 FILE_LIMIT_DIVISOR = 1048576  # 1 MB
 USER_FILES_LIMIT = FILE_LIMIT_DIVISOR * 150  # 150 MB
 FILE_LIMIT_SIZE = 10485760  # 10 MB
 LINKS_LIMIT = 30
+BULK_RESOURCES_LIMIT = int(os.environ.get('BULK_RESOURCES_LIMIT', default=100))  # resources per bulk request
+BULK_PASSWORD_CHECKS_LIMIT = int(os.environ.get('BULK_PASSWORD_CHECKS_LIMIT', default=30))  # checks per bulk request, up to THROTTLE_IP_BURST
+
+# Chunked uploads
+
+UPLOAD_SESSIONS_ROOT = os.environ.get(
+    'UPLOAD_SESSIONS_ROOT', default=os.path.join(tempfile.gettempdir(), 'resource-guard-uploads')
+)
+UPLOAD_CHUNK_SIZE = FILE_LIMIT_DIVISOR * 2  # 2 MB
+UPLOAD_SESSION_FILE_LIMIT_SIZE = FILE_LIMIT_DIVISOR * 50  # 50 MB
+UPLOAD_SESSION_LIFETIME = 6 * 60 * 60  # seconds
+
+# Storage jobs
+
+STORAGE_QUEUE_MODE = os.environ.get('STORAGE_QUEUE_MODE', default='sync')  # 'sync', 'threads' or 'database'
+STORAGE_STAGING_ROOT = os.environ.get(
+    'STORAGE_STAGING_ROOT', default=os.path.join(tempfile.gettempdir(), 'resource-guard-staging')
+)
+STORAGE_STAGING_SHARED = int(os.environ.get('STORAGE_STAGING_SHARED', default=0))  # staging root shared by all hosts
+STORAGE_WORKER_THREADS = int(os.environ.get('STORAGE_WORKER_THREADS', default=4))
+STORAGE_JOB_MAX_ATTEMPTS = int(os.environ.get('STORAGE_JOB_MAX_ATTEMPTS', default=5))
+STORAGE_JOB_BACKOFF = int(os.environ.get('STORAGE_JOB_BACKOFF', default=2))  # seconds, doubled on every retry
+STORAGE_JOB_LEASE_TIME = int(os.environ.get('STORAGE_JOB_LEASE_TIME', default=10 * 60))  # seconds
+
+# Content addressed storage
+
+CONTENT_ADDRESSED_STORAGE = int(os.environ.get('CONTENT_ADDRESSED_STORAGE', default=0))
+FILE_UPLOAD_HANDLERS = [
+    'guard_engine.blobs.HashingMemoryFileUploadHandler',
+    'guard_engine.blobs.HashingTemporaryFileUploadHandler',
+]
+
+# Async views
+
+ASYNC_VIEWS = int(os.environ.get('ASYNC_VIEWS', default=0))  # serve the public endpoints with async views under ASGI
+ASYNC_DB_THREAD_SENSITIVE = int(os.environ.get('ASYNC_DB_THREAD_SENSITIVE', default=0))
+
+# Downloads
+
+DOWNLOAD_TOKEN_MAX_AGE = int(os.environ.get('DOWNLOAD_TOKEN_MAX_AGE', default=300))  # seconds
+DOWNLOAD_SENDFILE_MODE = os.environ.get('DOWNLOAD_SENDFILE_MODE', default='')  # '', 'x-accel-redirect' or 'x-sendfile'
+DOWNLOAD_SENDFILE_PREFIX = os.environ.get('DOWNLOAD_SENDFILE_PREFIX', default='/protected/')
+ACCESS_TOKEN_MAX_AGE = int(os.environ.get('ACCESS_TOKEN_MAX_AGE', default=300))  # seconds
+
+# Expired resources purge
+
+EXPIRED_PURGE_BATCH_SIZE = int(os.environ.get('EXPIRED_PURGE_BATCH_SIZE', default=500))
+EXPIRED_PURGE_INTERVAL = int(os.environ.get('EXPIRED_PURGE_INTERVAL', default=60))  # seconds
+
+# Visits recording
+
+VISIT_BUFFER_ENABLED = int(os.environ.get('VISIT_BUFFER_ENABLED', default=0))
+VISIT_BUFFER_SIZE = int(os.environ.get('VISIT_BUFFER_SIZE', default=100))
+VISIT_BUFFER_FLUSH_INTERVAL = int(os.environ.get('VISIT_BUFFER_FLUSH_INTERVAL', default=5))  # seconds
+
+# Request metrics
+
+REQUEST_METRICS_ENABLED = int(os.environ.get('REQUEST_METRICS_ENABLED', default=0))
+REQUEST_METRICS_SLOW_TIME = int(os.environ.get('REQUEST_METRICS_SLOW_TIME', default=500))  # milliseconds
+REQUEST_METRICS_SLOW_QUERIES = int(os.environ.get('REQUEST_METRICS_SLOW_QUERIES', default=20))
+REQUEST_METRICS_SAMPLE_RATE = float(os.environ.get('REQUEST_METRICS_SAMPLE_RATE', default=0.01))
+
+# Metrics
+
+METRICS_ENABLED = int(os.environ.get('METRICS_ENABLED', default=0))
+METRICS_DIR = os.environ.get('METRICS_DIR', default=os.path.join(tempfile.gettempdir(), 'resource-guard-metrics'))
+METRICS_FLUSH_INTERVAL = int(os.environ.get('METRICS_FLUSH_INTERVAL', default=10))  # seconds
+METRICS_GAUGES_TTL = int(os.environ.get('METRICS_GAUGES_TTL', default=60))  # seconds
+
+LOGGING = {
+    'version': 1,
+    'disable_existing_loggers': False,
+    'handlers': {
+        'console': {
+            'class': 'logging.StreamHandler',
+        },
+    },
+    'loggers': {
+        'guard_engine.instrumentation': {
+            'handlers': ['console'],
+            'level': 'INFO',
+            'propagate': False,
+        },
+    },
+}
 
 
 # Internationalization
@@ -166,10 +335,16 @@ USE_TZ = True
 
 
 # Dropbox storage config
+DEFAULT_FILE_STORAGE = 'guard_engine.storage.TimedFileSystemStorage'
+STORAGE_DELETION_BACKEND = 'guard_engine.storage.FileSystemDeletionBackend'
 if not DEBUG and not TESTS:
-    DEFAULT_FILE_STORAGE = 'storages.backends.dropbox.DropBoxStorage'
+    DEFAULT_FILE_STORAGE = 'guard_engine.storage.TimedDropBoxStorage'
+    STORAGE_DELETION_BACKEND = 'guard_engine.storage.DropboxDeletionBackend'
     DROPBOX_OAUTH2_TOKEN = os.environ.get('DROPBOX_OAUTH2_TOKEN', default='foo')
     DROPBOX_ROOT_PATH = os.environ.get('DROPBOX_ROOT_PATH', default='foo')
+    DROPBOX_MAX_CONNECTIONS = int(os.environ.get('DROPBOX_MAX_CONNECTIONS', default=8))
+    DROPBOX_DELETE_CHECK_INTERVAL = float(os.environ.get('DROPBOX_DELETE_CHECK_INTERVAL', default=1))  # seconds
+    DROPBOX_DELETE_CHECK_TIMEOUT = int(os.environ.get('DROPBOX_DELETE_CHECK_TIMEOUT', default=60))  # seconds
 
 
 # Static files (CSS, JavaScript, Images)
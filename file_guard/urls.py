@@ -1,9 +1,16 @@
 from django.conf import settings
-from django.conf.urls.static import static
 from django.contrib import admin
 from django.urls import path, include
 from django.contrib.auth import views as auth_views
-from guard_engine.views import SecuredUrlCreate, SecuredFileCreate, user_resources, resource_verifier, resource_details, user_logout
+from api.views import export_metrics
+from guard_engine import async_views
+from guard_engine.views import (
+    SecuredUrlCreate, SecuredFileCreate, user_resources, resource_verifier, resource_details, user_logout, download_file,
+    resource_access
+)
+
+if settings.ASYNC_VIEWS:
+    resource_verifier, download_file = async_views.resource_verifier, async_views.download_file
 
 urlpatterns = [
     path('admin/', admin.site.urls),
@@ -15,9 +22,10 @@ urlpatterns = [
     path('secure-url', SecuredUrlCreate.as_view(), name='secure_url'),
     path('secure-file', SecuredFileCreate.as_view(), name='secure_file'),
     path('<str:resource_type>/<int:resource_id>/details', resource_details, name='resource_details'),
-    path('<str:user_name>/<str:resource_type>/<str:resource_uid>', resource_verifier, name='resource_verifier'),
     # api
     path('api/', include('api.urls')),
+    path('metrics', export_metrics, name='export_metrics'),
+    path('access/<str:token>', resource_access, name='resource_access'),
+    path('<str:user_name>/<str:resource_type>/<str:resource_uid>', resource_verifier, name='resource_verifier'),
+    path('<str:user_name>/files/<str:resource_uid>/download', download_file, name='download_file'),
 ]
-
-urlpatterns += static(settings.MEDIA_URL, document_root=settings.MEDIA_ROOT)
@@ -0,0 +1,41 @@
+import time
+
+from django.conf import settings
+from django.core import signing
+from guard_engine.models import SecuredFile, SecuredUrl
+
+ACCESS_TOKEN_SALT = 'guard_engine.access_tokens'
+
+
+def create_access_token(resource):
+    """
+    Signs everything needed to redirect to the url or serve the file, capped at the resource expiry.
+    """
+    access = {
+        'i': resource.id,
+        'r': resource.resource_route,
+        'e': min(resource.expire_ts.timestamp(), time.time() + settings.ACCESS_TOKEN_MAX_AGE)
+    }
+    if isinstance(resource, SecuredUrl):
+        access['u'] = resource.url_route
+    else:
+        access['n'] = resource.persisted_file.name
+        access['o'] = resource.original_name
+        access['s'] = resource.file_size
+    return signing.dumps(access, salt=ACCESS_TOKEN_SALT, compress=True)
+
+
+def load_access_token(token):
+    try:
+        access = signing.loads(token, salt=ACCESS_TOKEN_SALT, max_age=settings.ACCESS_TOKEN_MAX_AGE)
+    except signing.BadSignature:
+        return None
+    return access if access['e'] > time.time() else None
+
+
+def get_access_token_resource(access):
+    if 'u' in access:
+        return SecuredUrl(id=access['i'], resource_route=access['r'], url_route=access['u'])
+    return SecuredFile(
+        id=access['i'], resource_route=access['r'], persisted_file=access['n'], original_name=access.get('o', ''), file_size=access['s']
+    )
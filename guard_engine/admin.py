@@ -1,5 +1,8 @@
 from django.contrib import admin
-from guard_engine.models import SecuredFile, SecuredUrl
+from django.db import transaction
+from guard_engine.models import ApiKey, FileBlob, SecuredFile, SecuredUrl, StorageDeadLetter, UserQuota
+from guard_engine.quotas import quota_changes
+from guard_engine.storage import storage_deletions
 from .admin_forms import SecuredUrlForm, SecuredFileForm
 
 
@@ -27,11 +30,15 @@ class SecuredUrlFileAdmin(admin.ModelAdmin):
             self.fields = ('password', )
         return super().get_form(request, obj, **kwargs)
 
+    def delete_queryset(self, request, queryset):
+        with transaction.atomic(), quota_changes.deferred():
+            super().delete_queryset(request, queryset)
+
 
 @admin.register(SecuredFile)
 class SecuredFileAdmin(admin.ModelAdmin):
-    list_display = ('user', 'resource_route', 'persisted_file', 'expire_ts')
-    search_fields = ['user', 'resource_route', 'persisted_file__name']
+    list_display = ('user', 'resource_route', 'original_name', 'persisted_file', 'expire_ts')
+    search_fields = ['user', 'resource_route', 'original_name', 'persisted_file__name']
     list_filter = ('expire_ts',)
     autocomplete_fields = ['user', ]
     form = SecuredFileForm
@@ -46,3 +53,34 @@ class SecuredFileAdmin(admin.ModelAdmin):
             self.fields = ('name', 'phone_number', 'email', 'contact_channels')
         return super().get_form(request, obj, **kwargs)
 
+    def delete_queryset(self, request, queryset):
+        with storage_deletions.deferred(), transaction.atomic(), quota_changes.deferred():
+            super().delete_queryset(request, queryset)
+
+
+@admin.register(UserQuota)
+class UserQuotaAdmin(admin.ModelAdmin):
+    list_display = ('user', 'links_number', 'files_number', 'files_size')
+    search_fields = ['user__username']
+    readonly_fields = ('user', 'links_number', 'files_number', 'files_size')
+
+
+@admin.register(FileBlob)
+class FileBlobAdmin(admin.ModelAdmin):
+    list_display = ('digest', 'name', 'size', 'reference_counter')
+    search_fields = ['digest']
+    readonly_fields = ('digest', 'name', 'size', 'reference_counter')
+
+
+@admin.register(ApiKey)
+class ApiKeyAdmin(admin.ModelAdmin):
+    list_display = ('user', 'name', 'prefix', 'created_ts', 'revoked_ts')
+    search_fields = ['user__username', 'prefix']
+    readonly_fields = ('user', 'name', 'prefix', 'key_hash', 'created_ts', 'revoked_ts')
+
+
+@admin.register(StorageDeadLetter)
+class StorageDeadLetterAdmin(admin.ModelAdmin):
+    list_display = ('kind', 'payload', 'attempts', 'failed_ts')
+    list_filter = ('kind', 'failed_ts')
+    readonly_fields = ('kind', 'payload', 'attempts', 'last_error', 'failed_ts')
@@ -0,0 +1,89 @@
+import hashlib
+import secrets
+import threading
+import time
+from collections import OrderedDict
+
+from django.conf import settings
+from django.utils import timezone
+from django.utils.crypto import constant_time_compare
+from guard_engine.models import ApiKey
+
+
+def hash_api_key(key):
+    return hashlib.sha256(key.encode()).hexdigest()
+
+
+class ApiKeyCache:
+    """
+    Remembers verified keys of this process for API_KEY_CACHE_TTL seconds, so repeated calls skip the key lookup.
+    Keys revoked by another process stay usable here until their entries expire.
+    """
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.entries = OrderedDict()
+
+    def get(self, key_hash):
+        with self.lock:
+            entry = self.entries.get(key_hash)
+            if entry is None:
+                return None
+            api_key_id, user, expire_ts = entry
+            if expire_ts <= time.monotonic():
+                del self.entries[key_hash]
+                return None
+            return user
+
+    def set(self, key_hash, api_key_id, user):
+        with self.lock:
+            self.entries[key_hash] = (api_key_id, user, time.monotonic() + settings.API_KEY_CACHE_TTL)
+            self.entries.move_to_end(key_hash)
+            while len(self.entries) > settings.API_KEY_CACHE_MAX_KEYS:
+                self.entries.popitem(last=False)
+
+    def discard(self, api_key_ids):
+        with self.lock:
+            for key_hash in [key_hash for key_hash, entry in self.entries.items() if entry[0] in api_key_ids]:
+                del self.entries[key_hash]
+
+    def clear(self):
+        with self.lock:
+            self.entries.clear()
+
+
+api_key_cache = ApiKeyCache()
+
+
+def issue_api_key(user, name=''):
+    """
+    Creates a key of the user and returns it, only its hash is stored.
+    """
+    prefix = secrets.token_hex(4)
+    key = '{}.{}'.format(prefix, secrets.token_urlsafe(32))
+    ApiKey.objects.create(user=user, name=name, prefix=prefix, key_hash=hash_api_key(key))
+    return key
+
+
+def revoke_api_keys(api_keys):
+    api_key_ids = set(api_keys.filter(revoked_ts__isnull=True).values_list('id', flat=True))
+    ApiKey.objects.filter(id__in=api_key_ids).update(revoked_ts=timezone.now())
+    api_key_cache.discard(api_key_ids)
+    return len(api_key_ids)
+
+
+def get_api_key_user(key):
+    key_hash = hash_api_key(key)
+    user = api_key_cache.get(key_hash)
+    if user is not None:
+        return user
+
+    prefix, separator, _ = key.partition('.')
+    if not separator:
+        return None
+    api_key = ApiKey.objects.select_related('user').filter(prefix=prefix, revoked_ts__isnull=True).first()
+    if api_key is None or not constant_time_compare(api_key.key_hash, key_hash) or not api_key.user.is_active:
+        return None
+
+    api_key_cache.set(key_hash, api_key.id, api_key.user)
+    return api_key.user
@@ -3,3 +3,11 @@ from django.apps import AppConfig
 
 class GuardEngineConfig(AppConfig):
     name = 'guard_engine'
+
+    def ready(self):
+        from guard_engine import (  # noqa: F401
+            blobs, dashboard, instrumentation, quotas, route_cache, route_filter, stats, storage_jobs
+        )
+        from guard_engine.downloads import validate_sendfile_storage
+
+        validate_sendfile_storage()
@@ -0,0 +1,30 @@
+from django.contrib.auth.views import redirect_to_login
+from django.http import HttpResponseBadRequest, HttpResponseNotAllowed
+from guard_engine.asynchronous import database_sync_to_async, iterate_in_thread_pool
+from guard_engine.views import get_file_download_response, get_resource_verifier_response, is_resource_route_valid
+
+
+def is_user_authenticated(request):
+    return request.user.is_authenticated
+
+
+async def resource_verifier(request, user_name, resource_type, resource_uid):
+    if request.method != 'GET':
+        return HttpResponseNotAllowed(['GET'])
+    if not await database_sync_to_async(is_user_authenticated)(request):
+        return redirect_to_login(request.get_full_path())
+    if not is_resource_route_valid(user_name, resource_type, resource_uid):
+        return HttpResponseBadRequest()
+
+    return await database_sync_to_async(get_resource_verifier_response)(request, user_name, resource_type, resource_uid)
+
+
+async def download_file(request, user_name, resource_uid):
+    if request.method != 'GET':
+        return HttpResponseNotAllowed(['GET'])
+
+    response = await database_sync_to_async(get_file_download_response)(request, user_name, resource_uid)
+    if response.streaming:
+        # Sent by guard_engine.asynchronous.StreamingASGIHandler, WSGI servers keep iterating streaming_content
+        response.async_streaming_content = iterate_in_thread_pool(iter(response.streaming_content))
+    return response
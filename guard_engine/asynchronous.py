@@ -0,0 +1,65 @@
+from functools import wraps
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.core.handlers.asgi import ASGIHandler
+from django.db import close_old_connections
+
+
+def database_sync_to_async(func):
+    """
+    Runs blocking ORM and storage code from async views.
+
+    With ASYNC_DB_THREAD_SENSITIVE disabled calls go to the shared thread pool instead of the single
+    thread-sensitive thread, so concurrent requests do not queue behind each other. Pool threads keep their
+    own connections, so stale ones are closed around every call like Django does around every sync request.
+    """
+    if settings.ASYNC_DB_THREAD_SENSITIVE:
+        return sync_to_async(func, thread_sensitive=True)
+
+    @wraps(func)
+    def run_with_fresh_connections(*args, **kwargs):
+        close_old_connections()
+        try:
+            return func(*args, **kwargs)
+        finally:
+            close_old_connections()
+
+    return sync_to_async(run_with_fresh_connections, thread_sensitive=False)
+
+
+async def iterate_in_thread_pool(iterator):
+    """
+    Yields the items of a blocking iterator, e.g. the chunks of a file read from storage, getting each one in the
+    thread pool.
+    """
+    get_next_item = sync_to_async(next, thread_sensitive=False)
+    finished = object()
+    while True:
+        item = await get_next_item(iterator, finished)
+        if item is finished:
+            return
+        yield item
+
+
+class StreamingASGIHandler(ASGIHandler):
+    """
+    Sends responses carrying async_streaming_content by awaiting their chunks, so reading them does not block the
+    event loop the way the default handler iterating streaming_content does.
+    """
+
+    async def send_response(self, response, send):
+        async_streaming_content = getattr(response, 'async_streaming_content', None)
+        if async_streaming_content is None:
+            return await super().send_response(response, send)
+
+        async def send_with_async_content(message):
+            if message['type'] == 'http.response.body' and not message.get('more_body'):
+                async for part in async_streaming_content:
+                    for chunk, _ in self.chunk_bytes(part):
+                        await send({'type': 'http.response.body', 'body': chunk, 'more_body': True})
+            await send(message)
+
+        # Chunks are sent right before the closing message, the default handler sees an empty stream
+        response.streaming_content = ()
+        await super().send_response(response, send_with_async_content)
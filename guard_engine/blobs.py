@@ -0,0 +1,124 @@
+import hashlib
+
+from django.conf import settings
+from django.core.files.storage import default_storage
+from django.core.files.uploadhandler import MemoryFileUploadHandler, TemporaryFileUploadHandler
+from django.db import IntegrityError, transaction
+from django.db.models import Count, F, IntegerField, Sum
+from django.db.models.signals import post_delete, pre_save
+from django.dispatch import receiver
+from guard_engine.models import FileBlob, SecuredFile
+from guard_engine.storage import storage_deletions
+
+
+class HashingUploadHandlerMixin:
+    """
+    Hashes uploads while they stream in, only with ``CONTENT_ADDRESSED_STORAGE`` on.
+    """
+
+    def new_file(self, *args, **kwargs):
+        self.content_hash = hashlib.sha256() if settings.CONTENT_ADDRESSED_STORAGE else None
+        super().new_file(*args, **kwargs)
+
+    def receive_data_chunk(self, raw_data, start):
+        if self.content_hash is not None:
+            self.content_hash.update(raw_data)
+        return super().receive_data_chunk(raw_data, start)
+
+    def file_complete(self, file_size):
+        uploaded_file = super().file_complete(file_size)
+        if uploaded_file is not None and self.content_hash is not None:
+            uploaded_file.sha256 = self.content_hash.hexdigest()
+        return uploaded_file
+
+
+class HashingMemoryFileUploadHandler(HashingUploadHandlerMixin, MemoryFileUploadHandler):
+    pass
+
+
+class HashingTemporaryFileUploadHandler(HashingUploadHandlerMixin, TemporaryFileUploadHandler):
+    pass
+
+
+def get_blob_name(digest):
+    blob_name = 'blobs/{}/{}/{}'.format(digest[:2], digest[2:4], digest)
+    if settings.DEBUG or settings.TESTS:
+        return 'media/{}'.format(blob_name)
+    return blob_name
+
+
+def compute_digest(content):
+    content_hash = hashlib.sha256()
+    content.seek(0)
+    for chunk in content.chunks():
+        content_hash.update(chunk)
+    content.seek(0)
+    return content_hash.hexdigest()
+
+
+def acquire_file_blob(persisted_file):
+    content = persisted_file.file
+    digest = getattr(content, 'sha256', None) or compute_digest(content)
+    with transaction.atomic():
+        blob = FileBlob.objects.select_for_update().filter(digest=digest).first()
+        if blob:
+            FileBlob.objects.filter(id=blob.id).update(reference_counter=F('reference_counter') + 1)
+            return blob
+
+        blob_name = default_storage.save(get_blob_name(digest), content)
+        try:
+            with transaction.atomic():
+                return FileBlob.objects.create(digest=digest, name=blob_name, size=persisted_file.size, reference_counter=1)
+        except IntegrityError:
+            storage_deletions.delete(blob_name)
+
+    return acquire_file_blob(persisted_file)
+
+
+def release_file_blob(blob_id):
+    with transaction.atomic():
+        blob = FileBlob.objects.select_for_update().filter(id=blob_id).first()
+        if blob is None:
+            return
+        if blob.reference_counter > 1:
+            FileBlob.objects.filter(id=blob.id).update(reference_counter=F('reference_counter') - 1)
+            return
+        blob.delete()
+
+    storage_deletions.delete(blob.name)
+
+
+def get_blob_stats():
+    blob_stats = FileBlob.objects.aggregate(
+        blobs=Count('id'),
+        references=Sum('reference_counter'),
+        stored_bytes=Sum('size'),
+        saved_bytes=Sum(F('size') * (F('reference_counter') - 1), output_field=IntegerField())
+    )
+    references = blob_stats['references'] or 0
+    return {
+        'blobs': blob_stats['blobs'],
+        'references': references,
+        'stored_bytes': blob_stats['stored_bytes'] or 0,
+        'saved_bytes': blob_stats['saved_bytes'] or 0,
+        'hit_rate': (references - blob_stats['blobs']) / references if references else 0
+    }
+
+
+@receiver(pre_save, sender=SecuredFile)
+def store_file_as_blob(sender, instance, **kwargs):
+    if not settings.CONTENT_ADDRESSED_STORAGE or not instance.persisted_file or instance.persisted_file._committed:
+        return
+
+    previous_blob_id = getattr(instance, 'persisted_blob_id', None)
+    instance.blob = acquire_file_blob(instance.persisted_file)
+    instance.persisted_file.name = instance.blob.name
+    instance.persisted_file._committed = True
+    if previous_blob_id:
+        release_file_blob(previous_blob_id)
+
+
+@receiver(post_delete, sender=SecuredFile)
+def release_blob_on_delete(sender, instance, **kwargs):
+    if instance.blob_id:
+        release_file_blob(instance.blob_id)
@@ -0,0 +1,51 @@
+import os
+from collections import Counter
+
+from django.db import router
+from django.db.models.signals import pre_save
+from guard_engine.dashboard import dashboard_cache
+from guard_engine.models import SecuredFile
+from guard_engine.quotas import apply_quota_change
+from guard_engine.route_cache import route_cache
+from guard_engine.route_filter import route_filter
+from guard_engine.stats import record_resource_creation
+
+
+def bulk_create_resources(model, resources):
+    """
+    Inserts resources of one model with a single bulk INSERT.
+
+    bulk_create() sends no model signals, so the work done by the save receivers (storing files,
+    quota counters, daily stats, dashboard, route cache and filter) is done here once per batch.
+    """
+    if not resources:
+        return []
+
+    if model is SecuredFile:
+        using = router.db_for_write(model)
+        for resource in resources:
+            resource.file_size = resource.persisted_file.size
+            resource.original_name = os.path.basename(resource.persisted_file.name)[:255]
+            pre_save.send(sender=model, instance=resource, raw=False, using=using, update_fields=None)
+
+    created_resources = model.objects.bulk_create(resources)
+
+    users_resources = Counter(resource.user_id for resource in created_resources)
+    users_files_sizes = Counter()
+    if model is SecuredFile:
+        for resource in created_resources:
+            users_files_sizes[resource.user_id] += resource.file_size
+    for user_id, created in users_resources.items():
+        dashboard_cache.invalidate(user_id)
+        if model is SecuredFile:
+            apply_quota_change(user_id, files_size=users_files_sizes[user_id], files_number=created)
+        else:
+            apply_quota_change(user_id, links_number=created)
+
+    for creation_date, created in Counter(resource.creation_date for resource in created_resources).items():
+        record_resource_creation(model, creation_date, created)
+
+    for resource in created_resources:
+        route_cache.invalidate(model, resource.resource_route)
+        route_filter.add(resource.resource_route)
+    return created_resources
@@ -0,0 +1,11 @@
+from django.core.cache.backends.dummy import DummyCache
+from django.core.cache.backends.locmem import LocMemCache
+
+PROCESS_CACHE_BACKENDS = (DummyCache, LocMemCache)
+
+
+def is_shared_cache(cache):
+    """
+    Tells whether the cache is seen by all worker processes, so invalidating it in one process reaches the others.
+    """
+    return not isinstance(cache, PROCESS_CACHE_BACKENDS)
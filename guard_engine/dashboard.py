@@ -0,0 +1,125 @@
+import base64
+import binascii
+import datetime
+from urllib.parse import urlencode
+from uuid import uuid4
+
+from django.conf import settings
+from django.core.cache import caches
+from django.db.models import Q
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+from django.template.loader import render_to_string
+from guard_engine.caching import is_shared_cache
+from guard_engine.models import SecuredUrl, SecuredFile
+
+
+class InvalidCursor(Exception):
+    pass
+
+
+def encode_cursor(resource):
+    return base64.urlsafe_b64encode('{}|{}'.format(resource.expire_ts.isoformat(), resource.id).encode()).decode()
+
+
+def decode_cursor(cursor):
+    try:
+        expire_ts, resource_id = base64.urlsafe_b64decode(cursor.encode()).decode().split('|')
+        return datetime.datetime.fromisoformat(expire_ts), int(resource_id)
+    except (binascii.Error, UnicodeError, ValueError):
+        raise InvalidCursor()
+
+
+def get_resources_page(model, user, verification_ts, cursor=None, page_size=None):
+    """
+    Returns one page of the user's live resources ordered by (expire_ts, id) and the cursor of the next page.
+    """
+    page_size = page_size or settings.DASHBOARD_PAGE_SIZE
+    listed_fields = ['id', 'resource_route', 'expire_ts']
+    if model is SecuredFile:
+        listed_fields += ['original_name', 'persisted_file']
+    resources = model.objects.filter(user=user, expire_ts__gte=verification_ts).only(*listed_fields).order_by(
+        'expire_ts', 'id'
+    )
+    if cursor:
+        expire_ts, resource_id = decode_cursor(cursor)
+        resources = resources.filter(Q(expire_ts__gt=expire_ts) | Q(expire_ts=expire_ts, id__gt=resource_id))
+
+    page = list(resources[:page_size + 1])
+    next_cursor = encode_cursor(page[page_size - 1]) if len(page) > page_size else None
+    return page[:page_size], next_cursor
+
+
+def get_page_cursors(query_params):
+    return {
+        cursor_param: query_params[cursor_param] for cursor_param in ('urls_cursor', 'files_cursor')
+        if query_params.get(cursor_param)
+    }
+
+
+def render_resources_list(model, user, verification_ts, page_cursors, no_items_message):
+    """
+    Renders one page of the user's resources list, its next page link keeps the cursor of the other list.
+    """
+    cursor_param = '{}_cursor'.format('urls' if model is SecuredUrl else 'files')
+    resources, next_cursor = get_resources_page(model, user, verification_ts, page_cursors.get(cursor_param))
+    resources_list = render_to_string('pages/partials/_list_items.html', {
+        'items': resources,
+        'next_page_url': '?' + urlencode(dict(page_cursors, **{cursor_param: next_cursor})) if next_cursor else None,
+        'no_items_message': no_items_message
+    })
+    return resources, resources_list
+
+
+class DashboardCache:
+    """
+    Caches rendered list pages per user. Invalidation has to reach every worker process, so pages are cached only
+    when DASHBOARD_CACHE_ALIAS points at a shared backend.
+    """
+
+    @property
+    def cache(self):
+        return caches[settings.DASHBOARD_CACHE_ALIAS]
+
+    def get_version(self, user_id):
+        version_key = 'dashboard:{}:version'.format(user_id)
+        version = self.cache.get(version_key)
+        if version is None:
+            version = uuid4().hex
+            self.cache.set(version_key, version, None)
+        return version
+
+    def invalidate(self, user_id):
+        self.cache.set('dashboard:{}:version'.format(user_id), uuid4().hex, None)
+
+    def get_resources_list(self, model, user, verification_ts, page_cursors, no_items_message):
+        if not is_shared_cache(self.cache):
+            return render_resources_list(model, user, verification_ts, page_cursors, no_items_message)[1]
+
+        resource_type = 'urls' if model is SecuredUrl else 'files'
+        fragment_key = 'dashboard:{}:{}:{}:{}'.format(
+            user.id, self.get_version(user.id), resource_type, urlencode(sorted(page_cursors.items()))
+        )
+        resources_list = self.cache.get(fragment_key)
+        if resources_list is not None:
+            return resources_list
+
+        resources, resources_list = render_resources_list(model, user, verification_ts, page_cursors, no_items_message)
+        # The first listed resource expires first and has to disappear from the list by then
+        timeout = settings.DASHBOARD_CACHE_TTL
+        if resources:
+            timeout = min(timeout, (resources[0].expire_ts - verification_ts).total_seconds())
+        if timeout > 0:
+            self.cache.set(fragment_key, resources_list, timeout)
+        return resources_list
+
+
+dashboard_cache = DashboardCache()
+
+
+@receiver(post_save, sender=SecuredUrl)
+@receiver(post_save, sender=SecuredFile)
+@receiver(post_delete, sender=SecuredUrl)
+@receiver(post_delete, sender=SecuredFile)
+def invalidate_user_dashboard(sender, instance, **kwargs):
+    dashboard_cache.invalidate(instance.user_id)
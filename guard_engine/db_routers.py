@@ -0,0 +1,112 @@
+import asyncio
+import random
+from contextvars import ContextVar
+
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+
+PRIMARY = 'primary'
+REPLICA = 'replica'
+PRIMARY_COOKIE_NAME = 'use_primary_database'
+SAFE_METHODS = ('GET', 'HEAD', 'OPTIONS')
+
+
+class DatabaseRoutingState:
+
+    def __init__(self, use_replicas):
+        self.use_replicas = use_replicas
+        self.wrote = False
+
+
+routing_state = ContextVar('database_routing_state', default=None)
+
+
+class ReplicaRouter:
+    """
+    Sends reads of requests allowed to use replicas to a random REPLICA_DATABASES alias.
+
+    Everything else goes to the primary, including reads done after the request wrote anything.
+    """
+
+    def db_for_read(self, model, **hints):
+        state = routing_state.get()
+        if not settings.REPLICA_DATABASES or state is None or not state.use_replicas or state.wrote:
+            return None
+        return random.choice(settings.REPLICA_DATABASES)
+
+    def db_for_write(self, model, **hints):
+        state = routing_state.get()
+        if state is not None:
+            state.wrote = True
+        return None
+
+    def allow_relation(self, obj1, obj2, **hints):
+        return True
+
+
+def use_primary_database(view):
+    """
+    Reads of the view always go to the primary, e.g. for api clients polling what they have just written.
+    """
+    view.database_routing = PRIMARY
+    return view
+
+
+def use_replica_database(view):
+    """
+    Lets reads of the view go to replicas for any request method, until the view writes anything.
+    """
+    view.database_routing = REPLICA
+    return view
+
+
+class ReplicaRoutingMiddleware:
+    """
+    Lets GET, HEAD and OPTIONS requests read from replicas. Requests that wrote anything pin the client to the
+    primary for DATABASE_REPLICA_STICKY_TIME seconds with a cookie, so redirects after writes see fresh data.
+    """
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        if not settings.REPLICA_DATABASES:
+            raise MiddlewareNotUsed()
+        self.get_response = get_response
+        if asyncio.iscoroutinefunction(get_response):
+            self._is_coroutine = asyncio.coroutines._is_coroutine
+
+    def __call__(self, request):
+        if asyncio.iscoroutinefunction(self.get_response):
+            return self.__acall__(request)
+
+        state = DatabaseRoutingState(request.method in SAFE_METHODS and not request.COOKIES.get(PRIMARY_COOKIE_NAME))
+        state_token = routing_state.set(state)
+        try:
+            response = self.get_response(request)
+        finally:
+            routing_state.reset(state_token)
+        return self.process_state(response, state)
+
+    async def __acall__(self, request):
+        state = DatabaseRoutingState(request.method in SAFE_METHODS and not request.COOKIES.get(PRIMARY_COOKIE_NAME))
+        state_token = routing_state.set(state)
+        try:
+            response = await self.get_response(request)
+        finally:
+            routing_state.reset(state_token)
+        return self.process_state(response, state)
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        state = routing_state.get()
+        database_routing = getattr(view_func, 'database_routing', None)
+        if database_routing == PRIMARY:
+            state.use_replicas = False
+        elif database_routing == REPLICA and not request.COOKIES.get(PRIMARY_COOKIE_NAME):
+            state.use_replicas = True
+
+    def process_state(self, response, state):
+        if state.wrote:
+            response.set_cookie(
+                PRIMARY_COOKIE_NAME, '1', max_age=settings.DATABASE_REPLICA_STICKY_TIME, httponly=True, samesite='Lax'
+            )
+        return response
@@ -0,0 +1,135 @@
+import hashlib
+import mimetypes
+import re
+from urllib.parse import quote
+
+from django.conf import settings
+from django.core import signing
+from django.core.exceptions import ImproperlyConfigured
+from django.core.files.storage import FileSystemStorage, default_storage
+from django.http import FileResponse, HttpResponse, HttpResponseNotFound, HttpResponseNotModified
+from django.utils.http import parse_etags
+from guard_engine.storage import get_file_storage
+
+RANGE_PATTERN = re.compile(r'^bytes=(\d*)-(\d*)$')
+DOWNLOAD_TOKEN_SALT = 'guard_engine.downloads'
+
+
+class RangeNotSatisfiable(Exception):
+    pass
+
+
+class FileRangeWrapper:
+
+    def __init__(self, filelike, start, length):
+        self.filelike = filelike
+        self.remaining = length
+        if start:
+            self.filelike.seek(start)
+
+    def read(self, size=-1):
+        if self.remaining <= 0:
+            return b''
+        data = self.filelike.read(self.remaining if size < 0 else min(size, self.remaining))
+        self.remaining -= len(data)
+        return data
+
+    def fileno(self):
+        return self.filelike.fileno()
+
+    def close(self):
+        self.filelike.close()
+
+
+def validate_sendfile_storage():
+    # The web server can only send files it can read from disk
+    if settings.DOWNLOAD_SENDFILE_MODE and not isinstance(default_storage, FileSystemStorage):
+        raise ImproperlyConfigured('DOWNLOAD_SENDFILE_MODE requires a local file storage')
+
+
+def create_download_token(resource):
+    return signing.dumps(resource.resource_route, salt=DOWNLOAD_TOKEN_SALT)
+
+
+def is_download_token_valid(token, resource):
+    try:
+        return signing.loads(token, salt=DOWNLOAD_TOKEN_SALT, max_age=settings.DOWNLOAD_TOKEN_MAX_AGE) == resource.resource_route
+    except signing.BadSignature:
+        return False
+
+
+def get_file_etag(resource):
+    return '"{}"'.format(hashlib.md5('{}:{}:{}'.format(
+        resource.id, resource.persisted_file.name, resource.file_size
+    ).encode()).hexdigest())
+
+
+def parse_range(range_header, file_size):
+    range_match = RANGE_PATTERN.match(range_header.strip())
+    if not range_match:
+        return None
+
+    start, end = range_match.groups()
+    if not start and not end:
+        return None
+    if not start:
+        start, end = max(file_size - int(end), 0), file_size - 1
+    else:
+        start, end = int(start), min(int(end), file_size - 1) if end else file_size - 1
+
+    if start >= file_size or start > end:
+        raise RangeNotSatisfiable()
+    return start, end
+
+
+def serve_file(request, resource):
+    etag = get_file_etag(resource)
+    if_none_match = request.META.get('HTTP_IF_NONE_MATCH')
+    if if_none_match and (etag in parse_etags(if_none_match) or if_none_match.strip() == '*'):
+        response = HttpResponseNotModified()
+        response['ETag'] = etag
+        return response
+
+    file_name = resource.display_name
+    file_storage = get_file_storage(resource.persisted_file.name)
+    # Files still staged are outside of the location the web server is configured for, so they are streamed
+    if settings.DOWNLOAD_SENDFILE_MODE and file_storage is default_storage:
+        response = HttpResponse(content_type=mimetypes.guess_type(file_name)[0] or 'application/octet-stream')
+        if settings.DOWNLOAD_SENDFILE_MODE == 'x-accel-redirect':
+            response['X-Accel-Redirect'] = quote(settings.DOWNLOAD_SENDFILE_PREFIX + resource.persisted_file.name)
+        else:
+            response['X-Sendfile'] = file_storage.path(resource.persisted_file.name)
+        response['Content-Disposition'] = "attachment; filename*=utf-8''{}".format(quote(file_name))
+        response['ETag'] = etag
+        return response
+
+    file_size = resource.file_size
+    range_header = request.META.get('HTTP_RANGE')
+    try:
+        file_range = parse_range(range_header, file_size) if range_header else None
+    except RangeNotSatisfiable:
+        response = HttpResponse(status=416)
+        response['Content-Range'] = 'bytes */{}'.format(file_size)
+        return response
+
+    try:
+        persisted_file = file_storage.open(resource.persisted_file.name, 'rb')
+    except FileNotFoundError:
+        # Resources served from access tokens are not read from the database and may be deleted already
+        return HttpResponseNotFound()
+
+    start, end = file_range or (0, file_size - 1)
+    response = FileResponse(
+        FileRangeWrapper(persisted_file, start, end - start + 1),
+        as_attachment=True,
+        filename=file_name,
+        status=206 if file_range else 200
+    )
+    response['Content-Length'] = end - start + 1
+    if file_range:
+        response['Content-Range'] = 'bytes {}-{}/{}'.format(start, end, file_size)
+    response['Accept-Ranges'] = 'bytes'
+    response['ETag'] = etag
+    response['Cache-Control'] = 'private'
+    return response
+
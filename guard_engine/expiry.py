@@ -0,0 +1,75 @@
+from django.conf import settings
+from django.db import transaction
+from django.utils import timezone
+from guard_engine.metrics import metrics_registry
+from guard_engine.models import SecuredUrl, SecuredFile, UploadSession
+from guard_engine.quotas import quota_changes
+from guard_engine.storage import storage_deletions
+from guard_engine.uploads import discard_upload_session
+
+
+def purge_expired_batch(model, verification_ts, batch_size, user=None):
+    expired_queryset = model.objects.filter(expire_ts__lt=verification_ts).order_by('expire_ts')
+    if user is not None:
+        expired_queryset = expired_queryset.filter(user=user)
+    if model is SecuredFile:
+        expired_rows = list(expired_queryset.values_list('id', 'file_size')[:batch_size])
+    else:
+        expired_rows = [(row_id, 0) for row_id in expired_queryset.values_list('id', flat=True)[:batch_size]]
+
+    if not expired_rows:
+        return 0, 0
+
+    with storage_deletions.deferred(), transaction.atomic(), quota_changes.deferred():
+        model.objects.filter(id__in=[row_id for row_id, _ in expired_rows]).delete()
+    return len(expired_rows), sum(file_size for _, file_size in expired_rows)
+
+
+def purge_user_expired(user, batch_size=None, verification_ts=None):
+    """
+    Purges one user's expired resources, so rows the sweeper has not deleted yet stop counting against their quota.
+    """
+    batch_size = batch_size or settings.EXPIRED_PURGE_BATCH_SIZE
+    verification_ts = verification_ts or timezone.now()
+
+    purged_resources = 0
+    for model, resource_type in ((SecuredUrl, 'urls'), (SecuredFile, 'files')):
+        while True:
+            deleted_rows, reclaimed_bytes = purge_expired_batch(model, verification_ts, batch_size, user=user)
+            metrics_registry.inc('resource_guard_expired_purged_total', deleted_rows, type=resource_type)
+            metrics_registry.inc('resource_guard_expired_purged_bytes_total', reclaimed_bytes)
+            purged_resources += deleted_rows
+            if deleted_rows < batch_size:
+                break
+    return purged_resources
+
+
+def purge_expired_upload_sessions(verification_ts, batch_size):
+    purged_sessions = 0
+    while True:
+        expired_sessions = list(UploadSession.objects.filter(expire_ts__lt=verification_ts)[:batch_size])
+        for upload_session in expired_sessions:
+            discard_upload_session(upload_session)
+        purged_sessions += len(expired_sessions)
+        if len(expired_sessions) < batch_size:
+            return purged_sessions
+
+
+def purge_expired(batch_size=None, verification_ts=None):
+    batch_size = batch_size or settings.EXPIRED_PURGE_BATCH_SIZE
+    verification_ts = verification_ts or timezone.now()
+
+    report = {'urls': 0, 'files': 0, 'bytes': 0, 'upload_sessions': 0}
+    for model, report_key in ((SecuredUrl, 'urls'), (SecuredFile, 'files')):
+        while True:
+            deleted_rows, reclaimed_bytes = purge_expired_batch(model, verification_ts, batch_size)
+            report[report_key] += deleted_rows
+            report['bytes'] += reclaimed_bytes
+            if deleted_rows < batch_size:
+                break
+
+    report['upload_sessions'] = purge_expired_upload_sessions(verification_ts, batch_size)
+    for report_key in ('urls', 'files', 'upload_sessions'):
+        metrics_registry.inc('resource_guard_expired_purged_total', report[report_key], type=report_key)
+    metrics_registry.inc('resource_guard_expired_purged_bytes_total', report['bytes'])
+    return report
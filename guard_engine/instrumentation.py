@@ -0,0 +1,158 @@
+import asyncio
+import json
+import logging
+import random
+import time
+from collections import Counter
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+from django.db.backends.signals import connection_created
+from django.dispatch import receiver
+from guard_engine.metrics import metrics_registry
+
+logger = logging.getLogger(__name__)
+
+current_metrics = ContextVar('current_metrics', default=None)
+
+
+class RequestMetrics:
+
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.duration = 0
+        self.queries = 0
+        self.db_time = 0
+        self.cache_hits = 0
+        self.cache_misses = 0
+        self.storage_calls = Counter()
+        self.storage_time = 0
+
+    def finish(self):
+        self.duration = time.perf_counter() - self.started
+
+    def get_server_timing(self):
+        return ', '.join([
+            'db;dur={:.1f};desc="{} queries"'.format(self.db_time * 1000, self.queries),
+            'cache;desc="{} hits, {} misses"'.format(self.cache_hits, self.cache_misses),
+            'storage;dur={:.1f};desc="{} calls"'.format(self.storage_time * 1000, sum(self.storage_calls.values())),
+            'total;dur={:.1f}'.format(self.duration * 1000)
+        ])
+
+    def is_slow(self):
+        return (
+            self.duration * 1000 >= settings.REQUEST_METRICS_SLOW_TIME
+            or self.queries >= settings.REQUEST_METRICS_SLOW_QUERIES
+        )
+
+    def get_record(self, request, response):
+        return {
+            'method': request.method,
+            'path': request.path,
+            'view': request.resolver_match.view_name if request.resolver_match else None,
+            'status': response.status_code,
+            'duration_ms': round(self.duration * 1000, 1),
+            'queries': self.queries,
+            'db_ms': round(self.db_time * 1000, 1),
+            'cache_hits': self.cache_hits,
+            'cache_misses': self.cache_misses,
+            'storage_calls': dict(self.storage_calls),
+            'storage_ms': round(self.storage_time * 1000, 1)
+        }
+
+
+def record_query(execute, sql, params, many, context):
+    metrics = current_metrics.get()
+    if metrics is None:
+        return execute(sql, params, many, context)
+
+    started = time.perf_counter()
+    try:
+        return execute(sql, params, many, context)
+    finally:
+        metrics.queries += 1
+        metrics.db_time += time.perf_counter() - started
+
+
+def record_cache_lookups(hits, misses):
+    metrics = current_metrics.get()
+    if metrics is not None:
+        metrics.cache_hits += hits
+        metrics.cache_misses += misses
+
+
+@contextmanager
+def record_storage_call(operation):
+    started = time.perf_counter()
+    try:
+        yield
+    except Exception:
+        metrics_registry.inc('resource_guard_storage_errors_total', operation=operation)
+        raise
+    finally:
+        duration = time.perf_counter() - started
+        metrics_registry.observe('resource_guard_storage_call_duration_seconds', duration, operation=operation)
+        metrics = current_metrics.get()
+        if metrics is not None:
+            metrics.storage_calls[operation] += 1
+            metrics.storage_time += duration
+
+
+def install_query_recorder(connection):
+    if record_query not in connection.execute_wrappers:
+        connection.execute_wrappers.append(record_query)
+
+
+@receiver(connection_created)
+def install_connection_query_recorder(sender, connection, **kwargs):
+    install_query_recorder(connection)
+
+
+class RequestMetricsMiddleware:
+    """
+    Records query count, database time, route cache lookups and storage calls of every request.
+
+    Totals go into the Server-Timing header. Requests above REQUEST_METRICS_SLOW_TIME or REQUEST_METRICS_SLOW_QUERIES
+    are logged as warnings and REQUEST_METRICS_SAMPLE_RATE of the remaining ones as info records.
+    """
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        if not settings.REQUEST_METRICS_ENABLED:
+            raise MiddlewareNotUsed()
+        self.get_response = get_response
+        if asyncio.iscoroutinefunction(get_response):
+            self._is_coroutine = asyncio.coroutines._is_coroutine
+
+    def __call__(self, request):
+        if asyncio.iscoroutinefunction(self.get_response):
+            return self.__acall__(request)
+
+        metrics = RequestMetrics()
+        metrics_token = current_metrics.set(metrics)
+        try:
+            response = self.get_response(request)
+        finally:
+            current_metrics.reset(metrics_token)
+        return self.process_metrics(request, response, metrics)
+
+    async def __acall__(self, request):
+        metrics = RequestMetrics()
+        metrics_token = current_metrics.set(metrics)
+        try:
+            response = await self.get_response(request)
+        finally:
+            current_metrics.reset(metrics_token)
+        return self.process_metrics(request, response, metrics)
+
+    def process_metrics(self, request, response, metrics):
+        metrics.finish()
+        response['Server-Timing'] = metrics.get_server_timing()
+        if metrics.is_slow():
+            logger.warning(json.dumps(dict(metrics.get_record(request, response), slow=True)))
+        elif random.random() < settings.REQUEST_METRICS_SAMPLE_RATE:
+            logger.info(json.dumps(dict(metrics.get_record(request, response), slow=False)))
+        return response
@@ -0,0 +1,12 @@
+from django.core.management.base import BaseCommand
+from guard_engine.blobs import get_blob_stats
+
+
+class Command(BaseCommand):
+    help = 'Reports content addressed storage deduplication stats.'
+
+    def handle(self, *args, **options):
+        self.stdout.write(
+            '{blobs} blobs referenced {references} times, {stored_bytes} bytes stored, '
+            '{saved_bytes} bytes saved, dedup hit rate {hit_rate:.2%}.'.format(**get_blob_stats())
+        )
@@ -0,0 +1,19 @@
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand, CommandError
+from guard_engine.api_keys import issue_api_key
+
+
+class Command(BaseCommand):
+    help = 'Issues an api key of the user and prints it, the key cannot be read again later.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('username')
+        parser.add_argument('--name', default='', help='Label telling keys of the user apart.')
+
+    def handle(self, *args, **options):
+        try:
+            user = User.objects.get(username=options['username'])
+        except User.DoesNotExist:
+            raise CommandError('User {} does not exist.'.format(options['username']))
+
+        self.stdout.write(issue_api_key(user, options['name']))
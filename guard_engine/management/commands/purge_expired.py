@@ -0,0 +1,41 @@
+import logging
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.db import close_old_connections
+from guard_engine.expiry import purge_expired
+
+logger = logging.getLogger(__name__)
+
+
+class Command(BaseCommand):
+    help = 'Deletes expired secured urls and files in bounded batches.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=settings.EXPIRED_PURGE_BATCH_SIZE)
+        parser.add_argument('--daemon', action='store_true', help='Keep purging every --interval seconds.')
+        parser.add_argument('--interval', type=int, default=settings.EXPIRED_PURGE_INTERVAL)
+
+    def handle(self, *args, **options):
+        while True:
+            try:
+                report = purge_expired(batch_size=options['batch_size'])
+            except Exception:
+                if not options['daemon']:
+                    raise
+                # A transient database or storage error must not stop the daemon, the next run retries
+                logger.exception('Purging expired resources failed')
+                close_old_connections()
+            else:
+                self.stdout.write(
+                    'Purged {urls} urls, {files} files and {upload_sessions} upload sessions, '
+                    'reclaimed {bytes} bytes.'.format(**report)
+                )
+            if not options['daemon']:
+                return
+
+            try:
+                time.sleep(options['interval'])
+            except KeyboardInterrupt:
+                return
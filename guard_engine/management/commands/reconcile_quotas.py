@@ -0,0 +1,10 @@
+from django.core.management.base import BaseCommand
+from guard_engine.quotas import reconcile_quotas
+
+
+class Command(BaseCommand):
+    help = 'Recomputes user quota counters from secured urls and files and repairs drifted ones.'
+
+    def handle(self, *args, **options):
+        repaired_quotas = reconcile_quotas()
+        self.stdout.write('Repaired {} user quotas.'.format(len(repaired_quotas)))
@@ -0,0 +1,22 @@
+from django.core.management.base import BaseCommand, CommandError
+from guard_engine.api_keys import revoke_api_keys
+from guard_engine.models import ApiKey
+
+
+class Command(BaseCommand):
+    help = 'Revokes api keys by key prefix or all keys of a user.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--prefix', help='Key prefix, the part of the key before the dot.')
+        parser.add_argument('--user', help='Username whose keys are revoked.')
+
+    def handle(self, *args, **options):
+        if not options['prefix'] and not options['user']:
+            raise CommandError('Pass --prefix or --user.')
+
+        api_keys = ApiKey.objects.all()
+        if options['prefix']:
+            api_keys = api_keys.filter(prefix=options['prefix'])
+        if options['user']:
+            api_keys = api_keys.filter(user__username=options['user'])
+        self.stdout.write('Revoked {} api keys.'.format(revoke_api_keys(api_keys)))
@@ -0,0 +1,107 @@
+import json
+import os
+import shutil
+import subprocess
+import tempfile
+
+import django
+from django.conf import settings
+from django.core.cache import caches
+from django.core.management.base import BaseCommand
+from django.db import connection
+from django.test.utils import override_settings
+from django.utils import timezone
+
+SCENARIOS = (
+    'dashboard', 'url_creation', 'file_upload', 'verifier', 'password_check', 'stats_api', 'basic_auth_api', 'api_key_api'
+)
+
+
+def get_git_commit():
+    try:
+        return subprocess.check_output(
+            ['git', 'rev-parse', 'HEAD'], cwd=settings.BASE_DIR, stderr=subprocess.DEVNULL
+        ).decode().strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+class Command(BaseCommand):
+    help = 'Seeds a benchmark database and load tests the core endpoints with concurrent clients.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--scenarios', default=','.join(SCENARIOS), help='Comma separated scenarios to run.')
+        parser.add_argument('--users', type=int, default=10)
+        parser.add_argument('--resources', type=int, default=50, help='Seeded urls and files per user.')
+        parser.add_argument('--file-size', type=int, default=4096, help='Seeded and uploaded file size in bytes.')
+        parser.add_argument('--requests', type=int, default=200, help='Requests per scenario.')
+        parser.add_argument('--concurrency', type=int, default=8, help='Concurrent clients.')
+        parser.add_argument('--output', help='Results file, benchmarks/results/<timestamp>.json by default.')
+        parser.add_argument('--compare', help='Results file of a previous run to compare with.')
+
+    def handle(self, *args, **options):
+        from benchmarks.suite import compare_results, load_results, run_benchmarks
+
+        scenario_names = [scenario_name.strip() for scenario_name in options['scenarios'].split(',') if scenario_name.strip()]
+        unknown_scenarios = set(scenario_names) - set(SCENARIOS)
+        if unknown_scenarios:
+            self.stderr.write('Unknown scenarios: {}.'.format(', '.join(sorted(unknown_scenarios))))
+            return
+
+        database_name = connection.settings_dict['NAME']
+        media_root = tempfile.mkdtemp(prefix='resource-guard-benchmarks-')
+        connection.creation.create_test_db(verbosity=0, autoclobber=True, serialize=False)
+        try:
+            with override_settings(
+                MEDIA_ROOT=media_root,
+                DEFAULT_FILE_STORAGE='guard_engine.storage.TimedFileSystemStorage',
+                STORAGE_DELETION_BACKEND='guard_engine.storage.FileSystemDeletionBackend',
+                STORAGE_QUEUE_MODE='sync',
+                LINKS_LIMIT=10 ** 9,
+                USER_FILES_LIMIT=10 ** 15,
+                THROTTLE_ENABLED=0
+            ):
+                for cache in caches.all():
+                    cache.clear()
+                results = run_benchmarks(
+                    scenario_names, options['users'], options['resources'], options['file_size'],
+                    options['requests'], options['concurrency']
+                )
+        finally:
+            connection.creation.destroy_test_db(database_name, verbosity=0)
+            shutil.rmtree(media_root, ignore_errors=True)
+
+        self.stdout.write('{:<16} {:>10} {:>7} {:>9} {:>9} {:>9} {:>8}'.format(
+            'scenario', 'req/s', 'errors', 'p50 ms', 'p95 ms', 'p99 ms', 'queries'
+        ))
+        for scenario_name, scenario_results in results.items():
+            self.stdout.write('{:<16} {throughput:>10} {errors:>7} {p50_ms:>9} {p95_ms:>9} {p99_ms:>9} {queries_per_request:>8}'.format(
+                scenario_name, **scenario_results
+            ))
+
+        output = options['output'] or os.path.join(
+            settings.BASE_DIR, 'benchmarks', 'results', '{}.json'.format(timezone.now().strftime('%Y%m%dT%H%M%S'))
+        )
+        os.makedirs(os.path.dirname(os.path.abspath(output)), exist_ok=True)
+        with open(output, 'w') as results_file:
+            json.dump({
+                'meta': {
+                    'created': timezone.now().isoformat(),
+                    'commit': get_git_commit(),
+                    'django': django.get_version(),
+                    'database': connection.vendor,
+                    'options': {
+                        option: options[option]
+                        for option in ('users', 'resources', 'file_size', 'requests', 'concurrency')
+                    }
+                },
+                'results': results
+            }, results_file, indent=2, sort_keys=True)
+        self.stdout.write('Results saved to {}.'.format(output))
+
+        if options['compare']:
+            self.stdout.write('Relative changes against {}:'.format(options['compare']))
+            for scenario_name, changes in compare_results(load_results(options['compare'])['results'], results).items():
+                self.stdout.write('{:<16} {}'.format(scenario_name, ', '.join(
+                    '{} {:+.1%}'.format(metric, change) for metric, change in sorted(changes.items())
+                )))
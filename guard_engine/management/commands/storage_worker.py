@@ -0,0 +1,38 @@
+import logging
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import close_old_connections
+from guard_engine.storage_jobs import process_storage_jobs
+
+logger = logging.getLogger(__name__)
+
+
+class Command(BaseCommand):
+    help = 'Runs storage jobs queued in the database (STORAGE_QUEUE_MODE=database).'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=50)
+        parser.add_argument('--interval', type=float, default=1, help='Seconds to wait when the queue is empty.')
+        parser.add_argument('--once', action='store_true', help='Process due jobs once and exit.')
+
+    def handle(self, *args, **options):
+        while True:
+            try:
+                processed_jobs = process_storage_jobs(options['batch_size'])
+            except Exception:
+                if options['once']:
+                    raise
+                # Claimed jobs are leased, so the ones left unfinished are run again when the lease runs out
+                logger.exception('Processing storage jobs failed')
+                close_old_connections()
+                processed_jobs = 0
+            if processed_jobs:
+                self.stdout.write('Processed {} storage jobs.'.format(processed_jobs))
+            if options['once']:
+                return
+            if processed_jobs < options['batch_size']:
+                try:
+                    time.sleep(options['interval'])
+                except KeyboardInterrupt:
+                    return
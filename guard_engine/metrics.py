@@ -0,0 +1,260 @@
+import asyncio
+import atexit
+import fcntl
+import glob
+import json
+import os
+import threading
+import time
+from bisect import bisect_left
+
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+
+PROMETHEUS_CONTENT_TYPE = 'text/plain; version=0.0.4; charset=utf-8'
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)  # seconds
+
+COUNTER = 'counter'
+GAUGE = 'gauge'
+HISTOGRAM = 'histogram'
+
+METRICS = {
+    'resource_guard_request_duration_seconds': (HISTOGRAM, 'Request latency by view.'),
+    'resource_guard_resources_created_total': (COUNTER, 'Secured resources created by type.'),
+    'resource_guard_password_checks_total': (COUNTER, 'Resource password verifications by type and result.'),
+    'resource_guard_quota_rejections_total': (COUNTER, 'Resource creations rejected by user quotas, by type.'),
+    'resource_guard_expired_purged_total': (COUNTER, 'Expired rows purged, by type.'),
+    'resource_guard_expired_purged_bytes_total': (COUNTER, 'Bytes reclaimed by expired files purges.'),
+    'resource_guard_storage_call_duration_seconds': (HISTOGRAM, 'Storage call latency by operation.'),
+    'resource_guard_storage_errors_total': (COUNTER, 'Failed storage calls by operation.'),
+    'resource_guard_live_urls': (GAUGE, 'Stored secured urls.'),
+    'resource_guard_live_files': (GAUGE, 'Stored secured files.'),
+    'resource_guard_live_file_bytes': (GAUGE, 'Bytes of stored secured files.'),
+}
+
+# Totals of exited processes, their own snapshots are folded into it
+RETIRED_SNAPSHOT_NAME = 'retired.json'
+
+
+class MetricsRegistry:
+    """
+    Counters and histograms of the current process.
+
+    Every process periodically writes its totals into its own snapshot file in METRICS_DIR and scrapes sum the
+    snapshots of all processes, so gunicorn workers never share mutable state.
+    """
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.pid = None
+        self.process_id = None
+        self.values = {}
+        self.last_flush_ts = time.monotonic()
+
+    def get_values(self):
+        # Forked workers start from scratch instead of re-reporting what the parent process recorded
+        if self.pid != os.getpid():
+            self.pid = os.getpid()
+            self.process_id = '{}-{}'.format(self.pid, int(time.time() * 1000))
+            self.values = {}
+        return self.values
+
+    def get_key(self, name, labels):
+        return name, tuple(sorted(labels.items()))
+
+    def inc(self, name, value=1, **labels):
+        if not settings.METRICS_ENABLED:
+            return
+
+        key = self.get_key(name, labels)
+        with self.lock:
+            values = self.get_values()
+            values[key] = values.get(key, 0) + value
+        self.flush_periodically()
+
+    def observe(self, name, value, **labels):
+        if not settings.METRICS_ENABLED:
+            return
+
+        key = self.get_key(name, labels)
+        with self.lock:
+            values = self.get_values()
+            histogram = values.get(key)
+            if histogram is None:
+                histogram = values[key] = {'buckets': [0] * (len(LATENCY_BUCKETS) + 1), 'sum': 0}
+            histogram['buckets'][bisect_left(LATENCY_BUCKETS, value)] += 1
+            histogram['sum'] += value
+        self.flush_periodically()
+
+    def flush_periodically(self):
+        if time.monotonic() - self.last_flush_ts >= settings.METRICS_FLUSH_INTERVAL:
+            self.flush()
+
+    def flush(self):
+        with self.lock:
+            values = self.get_values()
+            if not values:
+                return
+            snapshot = [[name, dict(labels), value] for (name, labels), value in values.items()]
+            snapshot_path = os.path.join(settings.METRICS_DIR, '{}.json'.format(self.process_id))
+            self.last_flush_ts = time.monotonic()
+
+        os.makedirs(settings.METRICS_DIR, exist_ok=True)
+        write_snapshot(snapshot_path, snapshot)
+
+
+metrics_registry = MetricsRegistry()
+atexit.register(metrics_registry.flush)
+
+
+def write_snapshot(snapshot_path, snapshot):
+    with open(snapshot_path + '.tmp', 'w') as snapshot_file:
+        json.dump(snapshot, snapshot_file)
+    os.replace(snapshot_path + '.tmp', snapshot_path)
+
+
+def read_snapshot(snapshot_path):
+    try:
+        with open(snapshot_path) as snapshot_file:
+            return json.load(snapshot_file)
+    except (OSError, ValueError):
+        return None
+
+
+def add_snapshot(collected, snapshot):
+    for name, labels, value in snapshot:
+        key = metrics_registry.get_key(name, labels)
+        if isinstance(value, dict):
+            histogram = collected.setdefault(key, {'buckets': [0] * (len(LATENCY_BUCKETS) + 1), 'sum': 0})
+            histogram['buckets'] = [total + count for total, count in zip(histogram['buckets'], value['buckets'])]
+            histogram['sum'] += value['sum']
+        else:
+            collected[key] = collected.get(key, 0) + value
+
+
+def is_process_alive(pid):
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True
+    return True
+
+
+def get_dead_snapshot_paths():
+    dead_snapshot_paths = []
+    for snapshot_path in glob.glob(os.path.join(settings.METRICS_DIR, '*.json')):
+        try:
+            pid = int(os.path.basename(snapshot_path).split('-')[0])
+        except ValueError:
+            continue
+        if not is_process_alive(pid):
+            dead_snapshot_paths.append(snapshot_path)
+    return dead_snapshot_paths
+
+
+def prune_dead_snapshots():
+    """
+    Folds the snapshots of exited processes into the retired snapshot and deletes them, so their counters don't drop
+    while the directory only keeps a snapshot per live process.
+    """
+    if not get_dead_snapshot_paths():
+        return
+
+    with open(os.path.join(settings.METRICS_DIR, 'retired.lock'), 'w') as lock_file:
+        fcntl.flock(lock_file, fcntl.LOCK_EX)
+        dead_snapshot_paths = get_dead_snapshot_paths()
+        retired_snapshot_path = os.path.join(settings.METRICS_DIR, RETIRED_SNAPSHOT_NAME)
+        retired = {}
+        for snapshot_path in [retired_snapshot_path] + dead_snapshot_paths:
+            add_snapshot(retired, read_snapshot(snapshot_path) or [])
+
+        write_snapshot(
+            retired_snapshot_path, [[name, dict(labels), value] for (name, labels), value in retired.items()]
+        )
+        for snapshot_path in dead_snapshot_paths:
+            os.remove(snapshot_path)
+
+
+def collect_metrics():
+    prune_dead_snapshots()
+    collected = {}
+    for snapshot_path in glob.glob(os.path.join(settings.METRICS_DIR, '*.json')):
+        add_snapshot(collected, read_snapshot(snapshot_path) or [])
+    return collected
+
+
+def format_labels(labels):
+    if not labels:
+        return ''
+    return '{{{}}}'.format(','.join(
+        '{}="{}"'.format(label, str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n'))
+        for label, value in labels
+    ))
+
+
+def format_value(value):
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+def render_metrics(gauges):
+    collected = collect_metrics()
+    collected.update((metrics_registry.get_key(name, {}), value) for name, value in gauges.items())
+
+    lines = []
+    for name, (metric_type, help_text) in METRICS.items():
+        samples = sorted((labels, value) for (sample_name, labels), value in collected.items() if sample_name == name)
+        if not samples:
+            continue
+
+        lines.append('# HELP {} {}'.format(name, help_text))
+        lines.append('# TYPE {} {}'.format(name, metric_type))
+        for labels, value in samples:
+            if metric_type != HISTOGRAM:
+                lines.append('{}{} {}'.format(name, format_labels(labels), format_value(value)))
+                continue
+
+            cumulative_count = 0
+            for upper_bound, count in zip(LATENCY_BUCKETS + ('+Inf',), value['buckets']):
+                cumulative_count += count
+                lines.append('{}_bucket{} {}'.format(
+                    name, format_labels(labels + (('le', upper_bound),)), cumulative_count
+                ))
+            lines.append('{}_sum{} {}'.format(name, format_labels(labels), format_value(value['sum'])))
+            lines.append('{}_count{} {}'.format(name, format_labels(labels), cumulative_count))
+    return '\n'.join(lines) + '\n'
+
+
+class MetricsMiddleware:
+    """
+    Observes request latency by view name into the metrics registry.
+    """
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        if not settings.METRICS_ENABLED:
+            raise MiddlewareNotUsed()
+        self.get_response = get_response
+        if asyncio.iscoroutinefunction(get_response):
+            self._is_coroutine = asyncio.coroutines._is_coroutine
+
+    def __call__(self, request):
+        if asyncio.iscoroutinefunction(self.get_response):
+            return self.__acall__(request)
+
+        started = time.perf_counter()
+        response = self.get_response(request)
+        self.observe_request(request, time.perf_counter() - started)
+        return response
+
+    async def __acall__(self, request):
+        started = time.perf_counter()
+        response = await self.get_response(request)
+        self.observe_request(request, time.perf_counter() - started)
+        return response
+
+    def observe_request(self, request, duration):
+        view_name = request.resolver_match.view_name if request.resolver_match else 'unresolved'
+        metrics_registry.observe('resource_guard_request_duration_seconds', duration, view=view_name)
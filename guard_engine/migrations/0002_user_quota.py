@@ -0,0 +1,49 @@
+# Generated by Django 3.0.5 on 2026-10-18 17:38
+
+from django.conf import settings
+from django.db import migrations, models
+from django.db.models import Count, Sum
+import django.db.models.deletion
+
+
+def populate_user_quotas(apps, schema_editor):
+    User = apps.get_model(*settings.AUTH_USER_MODEL.split('.'))
+    UserQuota = apps.get_model('guard_engine', 'UserQuota')
+    SecuredUrl = apps.get_model('guard_engine', 'SecuredUrl')
+    SecuredFile = apps.get_model('guard_engine', 'SecuredFile')
+
+    files_sizes = dict(
+        SecuredFile.objects.order_by().values('user').annotate(files_size=Sum('file_size')).values_list('user', 'files_size')
+    )
+    links_numbers = dict(
+        SecuredUrl.objects.order_by().values('user').annotate(links_number=Count('id')).values_list('user', 'links_number')
+    )
+    UserQuota.objects.bulk_create([
+        UserQuota(
+            user_id=user_id,
+            files_size=files_sizes.get(user_id) or 0,
+            links_number=links_numbers.get(user_id) or 0
+        )
+        for user_id in User.objects.values_list('id', flat=True)
+    ])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ('guard_engine', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='UserQuota',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('files_size', models.BigIntegerField(default=0)),
+                ('links_number', models.IntegerField(default=0)),
+                ('user', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, related_name='quota', to=settings.AUTH_USER_MODEL)),
+            ],
+        ),
+        migrations.RunPython(populate_user_quotas, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,41 @@
+# Generated by Django 3.0.5 on 2026-10-18 17:39
+
+from django.db import migrations, models
+from django.db.models import Count, Q
+
+
+def populate_daily_resource_stats(apps, schema_editor):
+    DailyResourceStats = apps.get_model('guard_engine', 'DailyResourceStats')
+    daily_stats = {}
+    for model_name, prefix in (('SecuredUrl', 'links'), ('SecuredFile', 'files')):
+        grouped_resources = apps.get_model('guard_engine', model_name).objects.order_by().values('creation_date').annotate(
+            created=Count('id'), visited=Count('id', filter=Q(visit_counter__gte=1))
+        )
+        for resources in grouped_resources:
+            date_stats = daily_stats.setdefault(resources['creation_date'], DailyResourceStats(date=resources['creation_date']))
+            setattr(date_stats, '{}_created'.format(prefix), resources['created'])
+            setattr(date_stats, '{}_visited'.format(prefix), resources['visited'])
+
+    DailyResourceStats.objects.bulk_create(daily_stats.values())
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('guard_engine', '0002_user_quota'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='DailyResourceStats',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('date', models.DateField(unique=True)),
+                ('links_created', models.PositiveIntegerField(default=0)),
+                ('files_created', models.PositiveIntegerField(default=0)),
+                ('links_visited', models.PositiveIntegerField(default=0)),
+                ('files_visited', models.PositiveIntegerField(default=0)),
+            ],
+        ),
+        migrations.RunPython(populate_daily_resource_stats, migrations.RunPython.noop),
+    ]
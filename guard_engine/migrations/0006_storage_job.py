@@ -0,0 +1,36 @@
+# Generated by Django 3.0.5 on 2026-10-18 17:48
+
+from django.db import migrations, models
+import django.utils.timezone
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('guard_engine', '0005_file_blob'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='StorageDeadLetter',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('kind', models.CharField(choices=[('delete', 'Delete'), ('transfer', 'Transfer')], max_length=16)),
+                ('payload', models.TextField()),
+                ('attempts', models.PositiveIntegerField()),
+                ('last_error', models.TextField(blank=True)),
+                ('failed_ts', models.DateTimeField(default=django.utils.timezone.now)),
+            ],
+        ),
+        migrations.CreateModel(
+            name='StorageJob',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('kind', models.CharField(choices=[('delete', 'Delete'), ('transfer', 'Transfer')], max_length=16)),
+                ('payload', models.TextField()),
+                ('attempts', models.PositiveIntegerField(default=0)),
+                ('run_after', models.DateTimeField(default=django.utils.timezone.now)),
+                ('last_error', models.TextField(blank=True)),
+            ],
+        ),
+    ]
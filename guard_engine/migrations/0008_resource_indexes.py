@@ -0,0 +1,29 @@
+# Generated by Django 3.2.25 on 2026-10-18 18:27
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('guard_engine', '0007_api_key'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='securedfile',
+            index=models.Index(fields=['user', 'expire_ts', 'id'], name='securedfile_user_expire_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='securedfile',
+            index=models.Index(fields=['expire_ts'], name='securedfile_expire_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='securedurl',
+            index=models.Index(fields=['user', 'expire_ts', 'id'], name='securedurl_user_expire_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='securedurl',
+            index=models.Index(fields=['expire_ts'], name='securedurl_expire_idx'),
+        ),
+    ]
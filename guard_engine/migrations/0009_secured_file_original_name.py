@@ -0,0 +1,18 @@
+# Generated by Django 3.2.25 on 2026-10-18 18:41
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('guard_engine', '0008_resource_indexes'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='securedfile',
+            name='original_name',
+            field=models.CharField(blank=True, editable=False, max_length=255),
+        ),
+    ]
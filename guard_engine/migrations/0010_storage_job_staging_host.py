@@ -0,0 +1,18 @@
+# Generated by Django 3.2.25 on 2026-10-18 18:42
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('guard_engine', '0009_secured_file_original_name'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='storagejob',
+            name='staging_host',
+            field=models.CharField(blank=True, max_length=255),
+        ),
+    ]
@@ -0,0 +1,31 @@
+# Generated by Django 3.2.25 on 2026-10-18 19:54
+
+from django.db import migrations, models
+from django.db.models import Count
+
+
+def populate_files_numbers(apps, schema_editor):
+    UserQuota = apps.get_model('guard_engine', 'UserQuota')
+    SecuredFile = apps.get_model('guard_engine', 'SecuredFile')
+
+    files_numbers = SecuredFile.objects.order_by().values('user').annotate(files_number=Count('id')).values_list(
+        'user', 'files_number'
+    )
+    for user_id, files_number in files_numbers:
+        UserQuota.objects.filter(user_id=user_id).update(files_number=files_number)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('guard_engine', '0010_storage_job_staging_host'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='userquota',
+            name='files_number',
+            field=models.IntegerField(default=0),
+        ),
+        migrations.RunPython(populate_files_numbers, migrations.RunPython.noop),
+    ]
@@ -1,4 +1,5 @@
 import os
+from uuid import uuid4
 
 from django.conf import settings
 from django.core.validators import MinValueValidator
@@ -6,7 +7,44 @@ from django.db import models
 from django.contrib.auth.models import User
 from django.dispatch import receiver
 from django.utils import timezone
-from dropbox import dropbox
+from guard_engine.storage import storage_deletions
+
+
+class UserQuota(models.Model):
+    user = models.OneToOneField(User, on_delete=models.CASCADE, related_name='quota')
+    files_size = models.BigIntegerField(default=0)
+    files_number = models.IntegerField(default=0)
+    links_number = models.IntegerField(default=0)
+
+    def __str__(self):
+        return "{user_id} - {links_number} links, {files_size} bytes".format(
+            user_id=self.user_id, links_number=self.links_number, files_size=self.files_size
+        )
+
+
+class DailyResourceStats(models.Model):
+    date = models.DateField(unique=True)
+    links_created = models.PositiveIntegerField(default=0)
+    files_created = models.PositiveIntegerField(default=0)
+    links_visited = models.PositiveIntegerField(default=0)
+    files_visited = models.PositiveIntegerField(default=0)
+
+    def __str__(self):
+        return "{date} - {links_visited} links, {files_visited} files visited".format(
+            date=self.date, links_visited=self.links_visited, files_visited=self.files_visited
+        )
+
+
+class FileBlob(models.Model):
+    digest = models.CharField(unique=True, max_length=64)
+    name = models.CharField(max_length=255)
+    size = models.PositiveIntegerField()
+    reference_counter = models.PositiveIntegerField(default=0)
+
+    def __str__(self):
+        return "{digest} - {reference_counter} references".format(
+            digest=self.digest, reference_counter=self.reference_counter
+        )
 
 
 class SecuredResource(models.Model):
@@ -20,6 +58,12 @@ class SecuredResource(models.Model):
 
     class Meta:
         abstract = True
+        indexes = [
+            # Dashboard pages of live resources, ordered by (expire_ts, id)
+            models.Index(fields=['user', 'expire_ts', 'id'], name='%(class)s_user_expire_idx'),
+            # Expired resources purge
+            models.Index(fields=['expire_ts'], name='%(class)s_expire_idx'),
+        ]
 
     def is_accessible(self):
         return self.expire_ts > timezone.now()
@@ -29,7 +73,7 @@ class SecuredUrl(SecuredResource):
     url_route = models.URLField(max_length=2048)
 
     def __str__(self):
-        return "{user} - {urlroute}".format(user=self.user.username, urlroute=self.url_route)
+        return "{user_id} - {urlroute}".format(user_id=self.user_id, urlroute=self.url_route)
 
 
 def upload_to(instance, filename):
@@ -44,23 +88,28 @@ def upload_to(instance, filename):
 class SecuredFile(SecuredResource):
     file_size = models.PositiveIntegerField()
     persisted_file = models.FileField(upload_to=upload_to)
+    original_name = models.CharField(blank=True, editable=False, max_length=255)
+    blob = models.ForeignKey(FileBlob, null=True, blank=True, editable=False, on_delete=models.PROTECT)
 
     def __str__(self):
-        return "{user} - {filename}".format(user=self.user.username, filename=self.persisted_file.name)
+        return "{user_id} - {filename}".format(user_id=self.user_id, filename=self.display_name)
+
+    @property
+    def display_name(self):
+        return self.original_name or os.path.basename(self.persisted_file.name)
 
     def save(self, *args, **kwargs):
-        self.file_size = self.persisted_file.size
+        if not self.persisted_file._committed:
+            self.original_name = os.path.basename(self.persisted_file.name)[:255]
+        if not self.persisted_file._committed or self.file_size is None:
+            self.file_size = self.persisted_file.size
         super().save(*args, **kwargs)
 
 
 @receiver(models.signals.post_delete, sender=SecuredFile)
 def auto_delete_file_on_delete(sender, instance, **kwargs):
-    if instance.persisted_file:
-        if not settings.TESTS and not settings.DEBUG:
-            dbx = dropbox.Dropbox(settings.DROPBOX_OAUTH2_TOKEN)
-            dbx.files_delete_v2("{}{}".format(settings.DROPBOX_ROOT_PATH, instance.persisted_file.name))
-        elif os.path.isfile(instance.persisted_file.path):
-            os.remove(instance.persisted_file.path)
+    if instance.persisted_file and not instance.blob_id:
+        storage_deletions.delete(instance.persisted_file.name)
 
 
 @receiver(models.signals.pre_save, sender=SecuredFile)
@@ -69,14 +118,67 @@ def auto_delete_file_on_change(sender, instance, **kwargs):
         return False
 
     try:
-        old_file = SecuredFile.objects.get(pk=instance.pk).persisted_file
+        persisted_resource = SecuredFile.objects.only('persisted_file', 'file_size', 'blob').get(pk=instance.pk)
     except SecuredFile.DoesNotExist:
         return False
 
+    instance.persisted_file_size = persisted_resource.file_size
+    instance.persisted_blob_id = persisted_resource.blob_id
+    old_file = persisted_resource.persisted_file
     new_file = instance.persisted_file
-    if not old_file == new_file:
-        if not settings.TESTS and not settings.DEBUG:
-            dbx = dropbox.Dropbox(settings.DROPBOX_OAUTH2_TOKEN)
-            dbx.files_delete_v2("{}{}".format(settings.DROPBOX_ROOT_PATH, instance.persisted_file.name))
-        if os.path.isfile(old_file.path):
-            os.remove(old_file.path)
+    if old_file and not old_file == new_file and not persisted_resource.blob_id:
+        storage_deletions.delete(old_file.name)
+
+
+class UploadSession(models.Model):
+    upload_id = models.UUIDField(default=uuid4, unique=True, editable=False)
+    user = models.ForeignKey(User, on_delete=models.CASCADE)
+    file_name = models.CharField(max_length=255)
+    total_size = models.PositiveIntegerField()
+    chunk_size = models.PositiveIntegerField()
+    expire_ts = models.DateTimeField()
+
+    def __str__(self):
+        return "{user_id} - {file_name}".format(user_id=self.user_id, file_name=self.file_name)
+
+    def is_accessible(self):
+        return self.expire_ts > timezone.now()
+
+
+class ApiKey(models.Model):
+    user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='api_keys')
+    name = models.CharField(blank=True, max_length=64)
+    prefix = models.CharField(unique=True, max_length=16)
+    key_hash = models.CharField(max_length=64)
+    created_ts = models.DateTimeField(default=timezone.now)
+    revoked_ts = models.DateTimeField(null=True, blank=True)
+
+    def __str__(self):
+        return "{user_id} - {prefix}".format(user_id=self.user_id, prefix=self.prefix)
+
+
+class StorageJob(models.Model):
+    DELETE = 'delete'
+    TRANSFER = 'transfer'
+    KIND_CHOICES = ((DELETE, 'Delete'), (TRANSFER, 'Transfer'))
+
+    kind = models.CharField(max_length=16, choices=KIND_CHOICES)
+    payload = models.TextField()
+    attempts = models.PositiveIntegerField(default=0)
+    run_after = models.DateTimeField(default=timezone.now)
+    last_error = models.TextField(blank=True)
+    staging_host = models.CharField(blank=True, max_length=255)
+
+    def __str__(self):
+        return "{kind} - {payload}".format(kind=self.kind, payload=self.payload)
+
+
+class StorageDeadLetter(models.Model):
+    kind = models.CharField(max_length=16, choices=StorageJob.KIND_CHOICES)
+    payload = models.TextField()
+    attempts = models.PositiveIntegerField()
+    last_error = models.TextField(blank=True)
+    failed_ts = models.DateTimeField(default=timezone.now)
+
+    def __str__(self):
+        return "{kind} - {payload}".format(kind=self.kind, payload=self.payload)
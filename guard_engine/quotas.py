@@ -0,0 +1,160 @@
+import threading
+from collections import defaultdict
+from contextlib import contextmanager
+
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.db.models import Count, F, Sum
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+from django.utils import timezone
+from guard_engine.metrics import metrics_registry
+from guard_engine.models import SecuredUrl, SecuredFile, UserQuota
+
+
+def get_user_quota(user):
+    # Read first, get_or_create is routed as a write and would pin the request to the primary database
+    return UserQuota.objects.filter(user=user).first() or UserQuota.objects.get_or_create(user=user)[0]
+
+
+def lock_user_quota(user, links_number=0, files_size=0):
+    """
+    Locks the user's quota for the requested links and bytes. When they don't fit, the user's expired resources
+    are purged first, because the quota counts them until the sweeper deletes them.
+    """
+    quota = UserQuota.objects.select_for_update().get_or_create(user=user)[0]
+    if (
+        quota.links_number + links_number <= settings.LINKS_LIMIT and
+        quota.files_size + files_size <= settings.USER_FILES_LIMIT
+    ):
+        return quota
+
+    from guard_engine.expiry import purge_user_expired
+    if purge_user_expired(user):
+        quota = UserQuota.objects.select_for_update().get(user=user)
+    return quota
+
+
+def is_links_limit_reached(user):
+    if get_user_quota(user).links_number < settings.LINKS_LIMIT:
+        return False
+    # The quota counts expired links until they are purged
+    return SecuredUrl.objects.filter(user=user, expire_ts__gte=timezone.now()).count() >= settings.LINKS_LIMIT
+
+
+def is_files_limit_reached(user):
+    if get_user_quota(user).files_size < settings.USER_FILES_LIMIT:
+        return False
+    # The quota counts expired files until they are purged
+    live_files_size = SecuredFile.objects.filter(user=user, expire_ts__gte=timezone.now()).aggregate(
+        files_size=Sum('file_size')
+    )['files_size']
+    return (live_files_size or 0) >= settings.USER_FILES_LIMIT
+
+
+def apply_quota_change(user_id, files_size=0, files_number=0, links_number=0):
+    UserQuota.objects.filter(user_id=user_id).update(
+        files_size=F('files_size') + files_size,
+        files_number=F('files_number') + files_number,
+        links_number=F('links_number') + links_number
+    )
+
+
+def record_quota_rejection(resource_type):
+    metrics_registry.inc('resource_guard_quota_rejections_total', type=resource_type)
+
+
+class QuotaChangesQueue(threading.local):
+
+    def __init__(self):
+        self.pending = None
+
+    def change(self, user_id, files_size=0, files_number=0, links_number=0):
+        if self.pending is None:
+            apply_quota_change(user_id, files_size, files_number, links_number)
+            return
+
+        user_changes = self.pending[user_id]
+        user_changes['files_size'] += files_size
+        user_changes['files_number'] += files_number
+        user_changes['links_number'] += links_number
+
+    @contextmanager
+    def deferred(self):
+        if self.pending is not None:
+            yield
+            return
+
+        self.pending = defaultdict(lambda: {'files_size': 0, 'files_number': 0, 'links_number': 0})
+        try:
+            yield
+            pending_changes, self.pending = self.pending, None
+        except BaseException:
+            self.pending = None
+            raise
+
+        for user_id in sorted(pending_changes):
+            apply_quota_change(user_id, **pending_changes[user_id])
+
+
+quota_changes = QuotaChangesQueue()
+
+
+def reconcile_quotas():
+    files_totals = {
+        user_id: (files_size or 0, files_number)
+        for user_id, files_size, files_number in SecuredFile.objects.order_by().values('user').annotate(
+            files_size=Sum('file_size'), files_number=Count('id')
+        ).values_list('user', 'files_size', 'files_number')
+    }
+    links_numbers = dict(
+        SecuredUrl.objects.order_by().values('user').annotate(links_number=Count('id')).values_list('user', 'links_number')
+    )
+    quotas = {quota.user_id: quota for quota in UserQuota.objects.all()}
+
+    repaired_quotas = []
+    for user_id in User.objects.values_list('id', flat=True):
+        files_size, files_number = files_totals.get(user_id, (0, 0))
+        links_number = links_numbers.get(user_id) or 0
+        quota = quotas.get(user_id)
+        if quota is None:
+            repaired_quotas.append(UserQuota.objects.create(
+                user_id=user_id, files_size=files_size, files_number=files_number, links_number=links_number
+            ))
+        elif (quota.files_size, quota.files_number, quota.links_number) != (files_size, files_number, links_number):
+            UserQuota.objects.filter(pk=quota.pk).update(
+                files_size=files_size, files_number=files_number, links_number=links_number
+            )
+            repaired_quotas.append(quota)
+
+    return repaired_quotas
+
+
+@receiver(post_save, sender=User)
+def create_quota_on_user_creation(sender, instance, created, **kwargs):
+    if created:
+        UserQuota.objects.get_or_create(user=instance)
+
+
+@receiver(post_save, sender=SecuredUrl)
+def count_link_on_creation(sender, instance, created, **kwargs):
+    if created:
+        quota_changes.change(instance.user_id, links_number=1)
+
+
+@receiver(post_delete, sender=SecuredUrl)
+def count_link_on_delete(sender, instance, **kwargs):
+    quota_changes.change(instance.user_id, links_number=-1)
+
+
+@receiver(post_save, sender=SecuredFile)
+def count_file_on_save(sender, instance, created, **kwargs):
+    if created:
+        quota_changes.change(instance.user_id, files_size=instance.file_size, files_number=1)
+    elif getattr(instance, 'persisted_file_size', instance.file_size) != instance.file_size:
+        quota_changes.change(instance.user_id, files_size=instance.file_size - instance.persisted_file_size)
+
+
+@receiver(post_delete, sender=SecuredFile)
+def count_file_on_delete(sender, instance, **kwargs):
+    quota_changes.change(instance.user_id, files_size=-instance.file_size, files_number=-1)
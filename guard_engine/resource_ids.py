@@ -0,0 +1,50 @@
+import os
+import threading
+import time
+
+CROCKFORD_ALPHABET = '0123456789ABCDEFGHJKMNPQRSTVWXYZ'
+RANDOM_BITS = 80
+RESOURCE_UID_LENGTH = 26
+
+
+class ResourceUidGenerator:
+    """
+    Generates ULID-like resource uids: 48 bits of milliseconds since the epoch followed by 80 random bits,
+    encoded as 26 characters of Crockford's base32. Uids are URL-safe and sort by creation time.
+    Within one millisecond the random part is incremented, so uids from one process stay strictly increasing.
+    """
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.last_ts = 0
+        self.last_random = 0
+
+    def generate(self):
+        with self.lock:
+            timestamp = int(time.time() * 1000)
+            if timestamp <= self.last_ts:
+                timestamp = self.last_ts
+                random_part = self.last_random + 1
+                if random_part >> RANDOM_BITS:
+                    timestamp, random_part = timestamp + 1, int.from_bytes(os.urandom(10), 'big')
+            else:
+                random_part = int.from_bytes(os.urandom(10), 'big')
+            self.last_ts, self.last_random = timestamp, random_part
+
+        value = timestamp << RANDOM_BITS | random_part
+        return ''.join(
+            CROCKFORD_ALPHABET[(value >> shift) & 31] for shift in range((RESOURCE_UID_LENGTH - 1) * 5, -1, -5)
+        )
+
+
+resource_uid_generator = ResourceUidGenerator()
+
+
+def new_resource_uid():
+    return resource_uid_generator.generate()
+
+
+def new_resource_route(user_name, resource_type):
+    return '{user_name}/{resource_type}/{resource_uid}'.format(
+        user_name=user_name, resource_type=resource_type, resource_uid=new_resource_uid()
+    )
@@ -0,0 +1,124 @@
+from django.conf import settings
+from django.core.cache import caches
+from django.db.models import F
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+from django.utils import timezone
+from guard_engine.caching import is_shared_cache
+from guard_engine.instrumentation import record_cache_lookups
+from guard_engine.models import SecuredUrl, SecuredFile
+from guard_engine.route_filter import route_filter
+
+MISSING_ROUTE = 'missing'
+
+
+class RouteCache:
+    """
+    Caches resources by route. Process local caches keep them for ROUTE_CACHE_LOCAL_TTL seconds only, because
+    changes made by other workers don't invalidate them.
+    """
+
+    def __init__(self):
+        self.hits = 0
+        self.negative_hits = 0
+        self.misses = 0
+
+    @property
+    def cache(self):
+        return caches[settings.ROUTE_CACHE_ALIAS]
+
+    def get_cache_key(self, model, resource_route):
+        return 'route:{model}:{route}'.format(model=model._meta.model_name, route=resource_route)
+
+    def get_timeout(self, resource, verification_ts):
+        ttl = settings.ROUTE_CACHE_TTL if is_shared_cache(self.cache) else settings.ROUTE_CACHE_LOCAL_TTL
+        return min(ttl, (resource.expire_ts - verification_ts).total_seconds())
+
+    def get(self, model, user_name, resource_route):
+        cache_key = self.get_cache_key(model, resource_route)
+        resource = self.cache.get(cache_key)
+        if resource == MISSING_ROUTE:
+            self.negative_hits += 1
+            record_cache_lookups(hits=1, misses=0)
+            raise model.DoesNotExist()
+        if resource is not None:
+            self.hits += 1
+            record_cache_lookups(hits=1, misses=0)
+            return resource
+
+        self.misses += 1
+        record_cache_lookups(hits=0, misses=1)
+        if not route_filter.might_exist(resource_route):
+            raise model.DoesNotExist()
+        try:
+            resource = model.objects.get(user__username=user_name, resource_route=resource_route)
+        except model.DoesNotExist:
+            self.cache.set(cache_key, MISSING_ROUTE, settings.ROUTE_CACHE_NEGATIVE_TTL)
+            raise
+
+        timeout = self.get_timeout(resource, timezone.now())
+        if timeout > 0:
+            self.cache.set(cache_key, resource, timeout)
+        return resource
+
+    def get_many(self, model, resource_routes):
+        """
+        Resolves (user_name, resource_route) pairs with one cache round-trip and at most one query.
+        Returns resources by route, unknown routes are left out.
+        """
+        cache_keys = {self.get_cache_key(model, resource_route): resource_route for _, resource_route in resource_routes}
+        cached_resources = self.cache.get_many(list(cache_keys))
+
+        resources = {}
+        for cache_key, resource in cached_resources.items():
+            if resource == MISSING_ROUTE:
+                self.negative_hits += 1
+            else:
+                self.hits += 1
+                resources[cache_keys[cache_key]] = resource
+
+        user_names = {resource_route: user_name for user_name, resource_route in resource_routes}
+        missed_routes = [
+            cache_keys[cache_key] for cache_key in cache_keys
+            if cache_key not in cached_resources and route_filter.might_exist(cache_keys[cache_key])
+        ]
+        record_cache_lookups(hits=len(cached_resources), misses=len(cache_keys) - len(cached_resources))
+        if not missed_routes:
+            return resources
+
+        self.misses += len(missed_routes)
+        verification_ts = timezone.now()
+        for resource in model.objects.filter(resource_route__in=missed_routes).annotate(user_name=F('user__username')):
+            if resource.user_name != user_names[resource.resource_route]:
+                continue
+            resources[resource.resource_route] = resource
+            timeout = self.get_timeout(resource, verification_ts)
+            if timeout > 0:
+                self.cache.set(self.get_cache_key(model, resource.resource_route), resource, timeout)
+
+        self.cache.set_many({
+            self.get_cache_key(model, resource_route): MISSING_ROUTE
+            for resource_route in missed_routes if resource_route not in resources
+        }, settings.ROUTE_CACHE_NEGATIVE_TTL)
+        return resources
+
+    def invalidate(self, model, resource_route):
+        self.cache.delete(self.get_cache_key(model, resource_route))
+
+    def get_stats(self):
+        return {
+            'hits': self.hits,
+            'negative_hits': self.negative_hits,
+            'misses': self.misses
+        }
+
+
+route_cache = RouteCache()
+
+
+@receiver(post_save, sender=SecuredUrl)
+@receiver(post_save, sender=SecuredFile)
+@receiver(post_delete, sender=SecuredUrl)
+@receiver(post_delete, sender=SecuredFile)
+def invalidate_cached_route(sender, instance, **kwargs):
+    route_cache.invalidate(sender, instance.resource_route)
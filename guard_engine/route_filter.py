@@ -0,0 +1,166 @@
+import hashlib
+import logging
+import math
+import threading
+import time
+
+from django.conf import settings
+from django.core.cache import caches
+from django.db import close_old_connections
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+from guard_engine.caching import is_shared_cache
+from guard_engine.models import SecuredUrl, SecuredFile
+
+logger = logging.getLogger(__name__)
+
+
+class BloomFilter:
+
+    def __init__(self, capacity, error_rate, max_memory):
+        bits_number = math.ceil(-capacity * math.log(error_rate) / math.log(2) ** 2)
+        self.bits_number = max(min(bits_number, max_memory * 8), 8)
+        self.hashes_number = max(round(self.bits_number / capacity * math.log(2)), 1)
+        self.bits = bytearray(math.ceil(self.bits_number / 8))
+        self.items_number = 0
+
+    def get_positions(self, item):
+        digest = hashlib.blake2b(item.encode(), digest_size=16).digest()
+        first_hash, second_hash = int.from_bytes(digest[:8], 'little'), int.from_bytes(digest[8:], 'little') | 1
+        return ((first_hash + i * second_hash) % self.bits_number for i in range(self.hashes_number))
+
+    def add(self, item):
+        for position in self.get_positions(item):
+            self.bits[position >> 3] |= 1 << (position & 7)
+        self.items_number += 1
+
+    def __contains__(self, item):
+        return all(self.bits[position >> 3] & (1 << (position & 7)) for position in self.get_positions(item))
+
+    def get_error_rate(self):
+        return (1 - math.exp(-self.hashes_number * self.items_number / self.bits_number)) ** self.hashes_number
+
+
+class RouteFilter:
+    """
+    Bloom filter of live resource routes, so guessed routes can be rejected without a query.
+
+    Routes created in other processes are unknown to this filter until its next rebuild,
+    they are recognized meanwhile by a marker kept in the routes cache. Without a shared routes cache
+    other processes' markers can't be seen, so nothing is rejected.
+    """
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.bloom_filter = None
+        self.built_ts = None
+        self.building_routes = None
+        self.rebuild_thread = None
+        self.deleted_routes = 0
+        self.rejected = 0
+        self.passed = 0
+
+    @property
+    def cache(self):
+        return caches[settings.ROUTE_CACHE_ALIAS]
+
+    def get_marker_key(self, resource_route):
+        return 'route-filter:{}'.format(resource_route)
+
+    def build(self):
+        with self.lock:
+            self.building_routes = []
+
+        bloom_filter = BloomFilter(
+            settings.ROUTE_FILTER_CAPACITY, settings.ROUTE_FILTER_ERROR_RATE, settings.ROUTE_FILTER_MAX_MEMORY
+        )
+        try:
+            for model in (SecuredUrl, SecuredFile):
+                for resource_route in model.objects.values_list('resource_route', flat=True).iterator():
+                    bloom_filter.add(resource_route)
+        except BaseException:
+            with self.lock:
+                self.building_routes = None
+            raise
+
+        with self.lock:
+            for resource_route in self.building_routes:
+                bloom_filter.add(resource_route)
+            self.bloom_filter, self.building_routes = bloom_filter, None
+            self.built_ts = time.time()
+            self.deleted_routes = 0
+
+    def rebuild_periodically(self):
+        while True:
+            try:
+                self.build()
+            except Exception:
+                logger.exception('Route filter rebuild failed')
+            finally:
+                close_old_connections()
+            time.sleep(settings.ROUTE_FILTER_REBUILD_INTERVAL)
+
+    def start(self):
+        with self.lock:
+            if self.rebuild_thread is not None:
+                return
+            self.rebuild_thread = threading.Thread(target=self.rebuild_periodically, name='route-filter', daemon=True)
+        self.rebuild_thread.start()
+
+    def add(self, resource_route):
+        if not settings.ROUTE_FILTER_ENABLED:
+            return
+
+        with self.lock:
+            if self.bloom_filter is not None:
+                self.bloom_filter.add(resource_route)
+            if self.building_routes is not None:
+                self.building_routes.append(resource_route)
+        self.cache.set(self.get_marker_key(resource_route), True, settings.ROUTE_FILTER_REBUILD_INTERVAL * 2)
+
+    def discard(self, resource_route):
+        self.deleted_routes += 1
+
+    def might_exist(self, resource_route):
+        if not settings.ROUTE_FILTER_ENABLED or not is_shared_cache(self.cache):
+            return True
+        if self.bloom_filter is None:
+            self.start()
+            return True
+
+        if resource_route in self.bloom_filter or self.cache.get(self.get_marker_key(resource_route)):
+            self.passed += 1
+            return True
+        self.rejected += 1
+        return False
+
+    def get_stats(self):
+        bloom_filter = self.bloom_filter
+        return {
+            'enabled': bool(settings.ROUTE_FILTER_ENABLED),
+            'built_ts': self.built_ts,
+            'items': bloom_filter.items_number if bloom_filter else 0,
+            'deleted_items': self.deleted_routes,
+            'memory_bytes': len(bloom_filter.bits) if bloom_filter else 0,
+            'hashes': bloom_filter.hashes_number if bloom_filter else 0,
+            'configured_error_rate': settings.ROUTE_FILTER_ERROR_RATE,
+            'estimated_error_rate': bloom_filter.get_error_rate() if bloom_filter else None,
+            'rejected': self.rejected,
+            'passed': self.passed
+        }
+
+
+route_filter = RouteFilter()
+
+
+@receiver(post_save, sender=SecuredUrl)
+@receiver(post_save, sender=SecuredFile)
+def add_route_to_filter(sender, instance, created, **kwargs):
+    if created:
+        route_filter.add(instance.resource_route)
+
+
+@receiver(post_delete, sender=SecuredUrl)
+@receiver(post_delete, sender=SecuredFile)
+def discard_route_from_filter(sender, instance, **kwargs):
+    route_filter.discard(instance.resource_route)
@@ -0,0 +1,73 @@
+from django.conf import settings
+from django.core.cache import cache
+from django.db.models import F, Sum
+from django.db.models.signals import post_save
+from django.dispatch import receiver
+from guard_engine.metrics import metrics_registry
+from guard_engine.models import DailyResourceStats, SecuredUrl, SecuredFile, UserQuota
+
+LIVE_GAUGES_CACHE_KEY = 'metrics:live_gauges'
+
+
+def get_stats_prefix(model):
+    return 'links' if model is SecuredUrl else 'files'
+
+
+def increment_daily_stats(date, **counters):
+    updated_rows = DailyResourceStats.objects.filter(date=date).update(
+        **{counter: F(counter) + value for counter, value in counters.items()}
+    )
+    if not updated_rows:
+        if not DailyResourceStats.objects.get_or_create(date=date, defaults=counters)[1]:
+            increment_daily_stats(date, **counters)
+
+
+def record_resource_creation(model, creation_date, created=1):
+    increment_daily_stats(creation_date, **{'{}_created'.format(get_stats_prefix(model)): created})
+    metrics_registry.inc(
+        'resource_guard_resources_created_total', created, type='urls' if model is SecuredUrl else 'files'
+    )
+
+
+def record_first_visit(model, creation_date, visited=1):
+    increment_daily_stats(creation_date, **{'{}_visited'.format(get_stats_prefix(model)): visited})
+
+
+def record_password_check(resource_type, verified):
+    metrics_registry.inc(
+        'resource_guard_password_checks_total', type=resource_type, result='success' if verified else 'failure'
+    )
+
+
+def get_daily_stats(date_from=None, date_to=None):
+    daily_stats = DailyResourceStats.objects.order_by('date')
+    if date_from:
+        daily_stats = daily_stats.filter(date__gte=date_from)
+    if date_to:
+        daily_stats = daily_stats.filter(date__lte=date_to)
+    return daily_stats
+
+
+def get_live_gauges():
+    """
+    Stored resources totals, read from the incrementally maintained user quotas and cached between scrapes.
+    """
+    live_gauges = cache.get(LIVE_GAUGES_CACHE_KEY)
+    if live_gauges is None:
+        quota_totals = UserQuota.objects.aggregate(
+            links_number=Sum('links_number'), files_number=Sum('files_number'), files_size=Sum('files_size')
+        )
+        live_gauges = {
+            'resource_guard_live_urls': quota_totals['links_number'] or 0,
+            'resource_guard_live_files': quota_totals['files_number'] or 0,
+            'resource_guard_live_file_bytes': quota_totals['files_size'] or 0
+        }
+        cache.set(LIVE_GAUGES_CACHE_KEY, live_gauges, settings.METRICS_GAUGES_TTL)
+    return live_gauges
+
+
+@receiver(post_save, sender=SecuredUrl)
+@receiver(post_save, sender=SecuredFile)
+def count_resource_on_creation(sender, instance, created, **kwargs):
+    if created:
+        record_resource_creation(sender, instance.creation_date)
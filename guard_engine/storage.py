@@ -0,0 +1,191 @@
+import logging
+import threading
+import time
+from contextlib import contextmanager
+
+import dropbox
+from django.conf import settings
+from django.core.files.storage import FileSystemStorage, default_storage
+from django.utils.functional import LazyObject
+from django.utils.module_loading import import_string
+from dropbox.files import DeleteArg
+from guard_engine.instrumentation import record_storage_call
+from storages.backends.dropbox import DropBoxStorage
+
+logger = logging.getLogger(__name__)
+
+
+class StorageDeletionFailed(Exception):
+
+    def __init__(self, names):
+        super().__init__('Failed to delete {} files: {}'.format(len(names), ', '.join(names[:10])))
+        self.names = names
+
+
+class TimedStorageMixin:
+    """
+    Times storage round-trips through the request metrics, see guard_engine.instrumentation.
+    """
+
+    def _open(self, name, mode='rb'):
+        with record_storage_call('open'):
+            return super()._open(name, mode)
+
+    def _save(self, name, content):
+        with record_storage_call('save'):
+            return super()._save(name, content)
+
+    def delete(self, name):
+        with record_storage_call('delete'):
+            return super().delete(name)
+
+    def exists(self, name):
+        with record_storage_call('exists'):
+            return super().exists(name)
+
+    def size(self, name):
+        with record_storage_call('size'):
+            return super().size(name)
+
+
+class TimedFileSystemStorage(TimedStorageMixin, FileSystemStorage):
+    pass
+
+
+class TimedDropBoxStorage(TimedStorageMixin, DropBoxStorage):
+    pass
+
+
+class DropboxDeletionBackend:
+    batch_limit = 1000
+    _client = None
+    _client_lock = threading.Lock()
+
+    @classmethod
+    def get_client(cls):
+        if cls._client is None:
+            with cls._client_lock:
+                if cls._client is None:
+                    cls._client = dropbox.Dropbox(
+                        settings.DROPBOX_OAUTH2_TOKEN,
+                        session=dropbox.create_session(max_connections=settings.DROPBOX_MAX_CONNECTIONS)
+                    )
+        return cls._client
+
+    def wait_for_batch(self, client, batch_launch, batch_names):
+        """
+        Polls the asynchronous deletion job started by files_delete_batch until Dropbox reports its entries.
+        """
+        if batch_launch.is_complete():
+            return batch_launch.get_complete()
+        if not batch_launch.is_async_job_id():
+            raise StorageDeletionFailed(batch_names)
+
+        checks_deadline = time.monotonic() + settings.DROPBOX_DELETE_CHECK_TIMEOUT
+        while True:
+            with record_storage_call('delete_batch_check'):
+                job_status = client.files_delete_batch_check(batch_launch.get_async_job_id())
+            if job_status.is_complete():
+                return job_status.get_complete()
+            if not job_status.is_in_progress() or time.monotonic() >= checks_deadline:
+                raise StorageDeletionFailed(batch_names)
+            time.sleep(settings.DROPBOX_DELETE_CHECK_INTERVAL)
+
+    def delete(self, names):
+        """
+        Raises StorageDeletionFailed with the names Dropbox did not delete, so the storage job is retried.
+        Files already missing count as deleted, which keeps the retries idempotent.
+        """
+        client = self.get_client()
+        failed_names = []
+        for batch_start in range(0, len(names), self.batch_limit):
+            batch_names = names[batch_start:batch_start + self.batch_limit]
+            with record_storage_call('delete_batch'):
+                batch_launch = client.files_delete_batch([
+                    DeleteArg('{}{}'.format(settings.DROPBOX_ROOT_PATH, name)) for name in batch_names
+                ])
+            try:
+                batch_result = self.wait_for_batch(client, batch_launch, batch_names)
+            except StorageDeletionFailed:
+                failed_names += batch_names
+                continue
+
+            failed_names += [
+                name for name, entry in zip(batch_names, batch_result.entries)
+                if entry.is_failure() and not (
+                    entry.get_failure().is_path_lookup() and entry.get_failure().get_path_lookup().is_not_found()
+                )
+            ]
+
+        if failed_names:
+            logger.warning('Dropbox failed to delete %d of %d files', len(failed_names), len(names))
+            raise StorageDeletionFailed(failed_names)
+
+
+class FileSystemDeletionBackend:
+
+    def delete(self, names):
+        for name in names:
+            default_storage.delete(name)
+
+
+def get_deletion_backend():
+    return import_string(settings.STORAGE_DELETION_BACKEND)()
+
+
+class StagingStorage(LazyObject):
+
+    def _setup(self):
+        self._wrapped = TimedFileSystemStorage(location=settings.STORAGE_STAGING_ROOT)
+
+
+staging_storage = StagingStorage()
+
+
+def get_file_storage(name):
+    return staging_storage if staging_storage.exists(name) else default_storage
+
+
+def delete_files(names):
+    get_deletion_backend().delete(names)
+    if settings.STORAGE_QUEUE_MODE != 'sync':
+        for name in names:
+            staging_storage.delete(name)
+
+
+def dispatch_deletion(names):
+    from guard_engine.models import StorageJob
+    from guard_engine.storage_jobs import enqueue_storage_job
+    enqueue_storage_job(StorageJob.DELETE, {'names': names})
+
+
+class StorageDeletionQueue(threading.local):
+
+    def __init__(self):
+        self.pending = None
+
+    def delete(self, name):
+        if self.pending is None:
+            dispatch_deletion([name])
+        else:
+            self.pending.append(name)
+
+    @contextmanager
+    def deferred(self):
+        if self.pending is not None:
+            yield
+            return
+
+        self.pending = []
+        try:
+            yield
+            pending_names, self.pending = self.pending, None
+        except BaseException:
+            self.pending = None
+            raise
+
+        if pending_names:
+            dispatch_deletion(pending_names)
+
+
+storage_deletions = StorageDeletionQueue()
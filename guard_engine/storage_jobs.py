@@ -0,0 +1,173 @@
+import atexit
+import datetime
+import json
+import logging
+import socket
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
+from django.core.files.storage import default_storage
+from django.db import close_old_connections, transaction
+from django.db.models import Q
+from django.db.models.signals import pre_save
+from django.dispatch import receiver
+from django.utils import timezone
+from guard_engine.models import SecuredFile, StorageDeadLetter, StorageJob
+from guard_engine.route_cache import route_cache
+from guard_engine.storage import delete_files, staging_storage
+
+logger = logging.getLogger(__name__)
+
+
+def transfer_staged_file(name):
+    if not SecuredFile.objects.filter(persisted_file=name).exists():
+        staging_storage.delete(name)
+        return
+
+    with staging_storage.open(name, 'rb') as staged_file:
+        transferred_name = default_storage.save(name, staged_file)
+    if transferred_name != name:
+        transferred_files = SecuredFile.objects.filter(persisted_file=name)
+        for resource_route in transferred_files.values_list('resource_route', flat=True):
+            route_cache.invalidate(SecuredFile, resource_route)
+        transferred_files.update(persisted_file=transferred_name)
+    staging_storage.delete(name)
+
+
+def run_storage_job(kind, payload):
+    if kind == StorageJob.DELETE:
+        delete_files(payload['names'])
+    elif kind == StorageJob.TRANSFER:
+        transfer_staged_file(payload['name'])
+    else:
+        raise ValueError('Unknown storage job kind: {}'.format(kind))
+
+
+def get_retry_delay(attempts):
+    return settings.STORAGE_JOB_BACKOFF * 2 ** (attempts - 1)
+
+
+def run_storage_job_with_retries(kind, payload):
+    try:
+        for attempt in range(1, settings.STORAGE_JOB_MAX_ATTEMPTS + 1):
+            try:
+                run_storage_job(kind, payload)
+                return
+            except Exception as e:
+                last_error = repr(e)
+                if attempt < settings.STORAGE_JOB_MAX_ATTEMPTS:
+                    time.sleep(get_retry_delay(attempt))
+
+        StorageDeadLetter.objects.create(
+            kind=kind, payload=json.dumps(payload), attempts=settings.STORAGE_JOB_MAX_ATTEMPTS, last_error=last_error
+        )
+    finally:
+        close_old_connections()
+
+
+class StorageWorkerPool:
+
+    def __init__(self):
+        self.executor = None
+        self.lock = threading.Lock()
+
+    def submit(self, kind, payload):
+        with self.lock:
+            if self.executor is None:
+                self.executor = ThreadPoolExecutor(
+                    max_workers=settings.STORAGE_WORKER_THREADS, thread_name_prefix='storage-worker'
+                )
+        self.executor.submit(run_storage_job_with_retries, kind, payload)
+
+    def shutdown(self):
+        with self.lock:
+            if self.executor is not None:
+                self.executor.shutdown(wait=True)
+                self.executor = None
+
+
+storage_worker_pool = StorageWorkerPool()
+atexit.register(storage_worker_pool.shutdown)
+
+
+def run_sync_storage_job(kind, payload):
+    """
+    Runs the job right away. Nothing retries it and the caller's changes may be committed already,
+    so a failure is logged and dead-lettered instead of raised.
+    """
+    try:
+        run_storage_job(kind, payload)
+    except Exception as e:
+        logger.exception('Storage job %s failed', kind)
+        StorageDeadLetter.objects.create(kind=kind, payload=json.dumps(payload), attempts=1, last_error=repr(e))
+
+
+def enqueue_storage_job(kind, payload):
+    if settings.STORAGE_QUEUE_MODE == 'sync':
+        run_sync_storage_job(kind, payload)
+    elif settings.STORAGE_QUEUE_MODE == 'threads':
+        transaction.on_commit(lambda: storage_worker_pool.submit(kind, payload))
+    else:
+        # Files staged on local disk can only be transferred by a worker running on the same host
+        staging_host = socket.gethostname() if kind == StorageJob.TRANSFER and not settings.STORAGE_STAGING_SHARED else ''
+        StorageJob.objects.create(kind=kind, payload=json.dumps(payload), staging_host=staging_host)
+
+
+def claim_storage_jobs(batch_size):
+    """
+    Leases due jobs for STORAGE_JOB_LEASE_TIME in a short transaction, so storage calls run without row locks held.
+    Jobs of a worker that died are picked up again when their lease runs out.
+    """
+    claiming_ts = timezone.now()
+    with transaction.atomic():
+        storage_jobs = list(
+            StorageJob.objects.select_for_update(skip_locked=True).filter(
+                Q(staging_host='') | Q(staging_host=socket.gethostname()), run_after__lte=claiming_ts
+            ).order_by('run_after')[:batch_size]
+        )
+        StorageJob.objects.filter(id__in=[storage_job.id for storage_job in storage_jobs]).update(
+            run_after=claiming_ts + datetime.timedelta(seconds=settings.STORAGE_JOB_LEASE_TIME)
+        )
+    return storage_jobs
+
+
+def process_storage_jobs(batch_size):
+    storage_jobs = claim_storage_jobs(batch_size)
+    for storage_job in storage_jobs:
+        try:
+            run_storage_job(storage_job.kind, json.loads(storage_job.payload))
+        except Exception as e:
+            storage_job.attempts += 1
+            storage_job.last_error = repr(e)
+            if storage_job.attempts >= settings.STORAGE_JOB_MAX_ATTEMPTS:
+                with transaction.atomic():
+                    StorageDeadLetter.objects.create(
+                        kind=storage_job.kind,
+                        payload=storage_job.payload,
+                        attempts=storage_job.attempts,
+                        last_error=storage_job.last_error
+                    )
+                    storage_job.delete()
+            else:
+                storage_job.run_after = timezone.now() + datetime.timedelta(seconds=get_retry_delay(storage_job.attempts))
+                storage_job.save(update_fields=['attempts', 'last_error', 'run_after'])
+        else:
+            storage_job.delete()
+
+    return len(storage_jobs)
+
+
+@receiver(pre_save, sender=SecuredFile)
+def stage_file_upload(sender, instance, **kwargs):
+    if settings.STORAGE_QUEUE_MODE == 'sync' or not instance.persisted_file or instance.persisted_file._committed:
+        return
+
+    staged_name = staging_storage.save(
+        instance.persisted_file.field.generate_filename(instance, instance.persisted_file.name),
+        instance.persisted_file.file
+    )
+    instance.persisted_file.name = staged_name
+    instance.persisted_file._committed = True
+    enqueue_storage_job(StorageJob.TRANSFER, {'name': staged_name})
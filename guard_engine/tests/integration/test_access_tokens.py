@@ -0,0 +1,113 @@
+import datetime
+
+from django.conf import settings
+from django.core.cache import caches
+from django.test import TestCase, override_settings
+from django.contrib.auth.models import User
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.utils import timezone
+
+from guard_engine.models import SecuredUrl, SecuredFile
+from guard_engine.storage import get_file_storage
+from guard_engine.throttling import password_check_throttle
+from guard_engine.visits import access_visit_buffer
+
+
+@override_settings(VISIT_BUFFER_SIZE=100, VISIT_BUFFER_FLUSH_INTERVAL=3600)
+class AccessTokensTestCase(TestCase):
+
+    def setUp(self) -> None:
+        caches[settings.ROUTE_CACHE_ALIAS].clear()
+        password_check_throttle._backend = None
+        access_visit_buffer.flush()
+        self.created_user = User.objects.create_user(username='johnDoe', email='john@doe.com', password='testPassword123')
+        self.client.login(username='johnDoe', password='testPassword123')
+
+        creation_ts = timezone.now()
+        self.secured_url = SecuredUrl.objects.create(
+            user=self.created_user,
+            resource_route="{user_name}/urls/1234567".format(user_name=self.created_user.username),
+            password="verySecretPasswordUrl",
+            creation_date=creation_ts.date(),
+            expire_ts=creation_ts + datetime.timedelta(days=1),
+            latest_user_agent='Mozilla/5.0',
+            url_route='https://www.google.pl/'
+        )
+        self.secured_file = SecuredFile.objects.create(
+            user=self.created_user,
+            resource_route="{user_name}/files/1234567".format(user_name=self.created_user.username),
+            password="verySecretPasswordFile",
+            creation_date=creation_ts.date(),
+            expire_ts=creation_ts + datetime.timedelta(days=1),
+            latest_user_agent='Mozilla/5.0',
+            persisted_file=SimpleUploadedFile('access_file.txt', b'0123456789')
+        )
+
+    def tearDown(self):
+        access_visit_buffer.flush()
+        self.created_user.delete()
+
+    def get_access_route(self, resource, password, issue_token=True):
+        user_name, resource_type, resource_uid = resource.resource_route.split('/')
+        password_response = self.client.post(
+            '/api/check-resource-password',
+            data={
+                'user_name': user_name,
+                'resource_type': resource_type,
+                'resource_uid': resource_uid,
+                'password': password,
+                'issue_token': issue_token
+            },
+            **{'HTTP_USER_AGENT': 'Mozilla/5.0'}
+        )
+        return password_response.json().get('access_route')
+
+    def test_url_redirected_without_queries(self):
+        access_route = self.get_access_route(self.secured_url, 'verySecretPasswordUrl')
+        self.client.logout()
+
+        with self.assertNumQueries(0):
+            access_response = self.client.get(access_route, **{'HTTP_USER_AGENT': 'Mozilla/5.0'})
+
+        self.assertEqual(access_response.status_code, 302)
+        self.assertEqual(access_response['Location'], 'https://www.google.pl/')
+
+    def test_file_streamed_without_queries(self):
+        access_route = self.get_access_route(self.secured_file, 'verySecretPasswordFile')
+        self.client.logout()
+
+        with self.assertNumQueries(0):
+            access_response = self.client.get(access_route, **{'HTTP_USER_AGENT': 'Mozilla/5.0'})
+
+        self.assertEqual(access_response.status_code, 200)
+        self.assertEqual(b''.join(access_response.streaming_content), b'0123456789')
+
+    def test_deleted_file_not_found(self):
+        access_route = self.get_access_route(self.secured_file, 'verySecretPasswordFile')
+        get_file_storage(self.secured_file.persisted_file.name).delete(self.secured_file.persisted_file.name)
+        self.secured_file.delete()
+
+        self.assertEqual(self.client.get(access_route, **{'HTTP_USER_AGENT': 'Mozilla/5.0'}).status_code, 404)
+
+    def test_access_visits_buffered(self):
+        access_route = self.get_access_route(self.secured_url, 'verySecretPasswordUrl')
+        self.client.get(access_route, **{'HTTP_USER_AGENT': 'Mozilla/5.0'})
+        self.client.get(access_route, **{'HTTP_USER_AGENT': 'Mozilla/5.0'})
+
+        self.secured_url.refresh_from_db()
+        self.assertEqual(self.secured_url.visit_counter, 1)
+
+        access_visit_buffer.flush()
+        self.secured_url.refresh_from_db()
+        self.assertEqual(self.secured_url.visit_counter, 3)
+
+    def test_token_issued_on_request_only(self):
+        self.assertIsNone(self.get_access_route(self.secured_url, 'verySecretPasswordUrl', issue_token=False))
+
+    def test_forged_and_expired_tokens_rejected(self):
+        access_route = self.get_access_route(self.secured_url, 'verySecretPasswordUrl')
+
+        self.assertEqual(self.client.get(access_route[:-2] + 'xx').status_code, 403)
+        with self.settings(ACCESS_TOKEN_MAX_AGE=0):
+            expired_route = self.get_access_route(self.secured_url, 'verySecretPasswordUrl')
+            self.assertEqual(self.client.get(expired_route).status_code, 403)
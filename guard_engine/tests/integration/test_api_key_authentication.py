@@ -0,0 +1,58 @@
+from io import StringIO
+
+from django.core.management import call_command
+from django.test import TestCase
+from django.contrib.auth.models import User
+
+from guard_engine.api_keys import api_key_cache, hash_api_key
+from guard_engine.models import ApiKey, SecuredUrl
+
+
+class ApiKeyAuthenticationTestCase(TestCase):
+
+    def setUp(self) -> None:
+        api_key_cache.clear()
+        self.created_user = User.objects.create_user(username='johnDoe', email='john@doe.com', password='testPassword123')
+        command_output = StringIO()
+        call_command('issue_api_key', 'johnDoe', '--name', 'tests', stdout=command_output)
+        self.api_key = command_output.getvalue().strip()
+
+    def tearDown(self):
+        self.created_user.delete()
+
+    def secure_url(self, api_key):
+        return self.client.post(
+            '/api/secure-resource', data={'url_route': 'https://www.google.pl/'},
+            **{'HTTP_USER_AGENT': 'Mozilla/5.0', 'HTTP_HOST': 'localhost', 'HTTP_AUTHORIZATION': 'Api-Key ' + api_key}
+        )
+
+    def test_issued_key_hashed_and_authenticates(self):
+        api_key = ApiKey.objects.get()
+
+        self.assertEqual(api_key.key_hash, hash_api_key(self.api_key))
+        self.assertTrue(self.api_key.startswith(api_key.prefix + '.'))
+        self.assertEqual(self.secure_url(self.api_key).status_code, 200)
+        self.assertEqual(SecuredUrl.objects.get().user, self.created_user)
+
+    def test_verified_key_cached(self):
+        self.secure_url(self.api_key)
+        ApiKey.objects.update(key_hash='')
+
+        self.assertEqual(self.secure_url(self.api_key).status_code, 200)
+
+    def test_invalid_keys_rejected(self):
+        prefix = self.api_key.split('.')[0]
+
+        self.assertEqual(self.secure_url(prefix + '.wrongSecret').status_code, 403)
+        self.assertEqual(self.secure_url('wrongKey').status_code, 403)
+        self.assertFalse(SecuredUrl.objects.exists())
+
+    def test_revoked_key_rejected(self):
+        self.assertEqual(self.secure_url(self.api_key).status_code, 200)
+
+        command_output = StringIO()
+        call_command('revoke_api_key', '--user', 'johnDoe', stdout=command_output)
+
+        self.assertEqual(command_output.getvalue().strip(), 'Revoked 1 api keys.')
+        self.assertIsNotNone(ApiKey.objects.get().revoked_ts)
+        self.assertEqual(self.secure_url(self.api_key).status_code, 403)
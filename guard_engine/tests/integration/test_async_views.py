@@ -0,0 +1,127 @@
+import datetime
+from urllib.parse import urlencode
+
+from django.conf import settings
+from django.core.cache import caches
+from django.core.signals import request_started
+from django.db import close_old_connections
+from django.test import TestCase, override_settings
+from django.contrib.auth.models import User
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.urls import include, path
+from django.utils import timezone
+
+from api import async_views as api_async_views
+from guard_engine import async_views
+from guard_engine.asynchronous import StreamingASGIHandler
+from guard_engine.models import SecuredUrl, SecuredFile
+from guard_engine.throttling import password_check_throttle
+
+urlpatterns = [
+    path('api/check-resource-password', api_async_views.check_resource_password, name='check_resource_password'),
+    path('<str:user_name>/<str:resource_type>/<str:resource_uid>', async_views.resource_verifier, name='resource_verifier'),
+    path('<str:user_name>/files/<str:resource_uid>/download', async_views.download_file, name='download_file'),
+    path('', include('file_guard.urls'))
+]
+
+
+@override_settings(ROOT_URLCONF=__name__, ASYNC_DB_THREAD_SENSITIVE=1)
+class AsyncViewsTestCase(TestCase):
+
+    def setUp(self) -> None:
+        caches[settings.ROUTE_CACHE_ALIAS].clear()
+        password_check_throttle._backend = None
+        self.created_user = User.objects.create_user(username='johnDoe', email='john@doe.com', password='testPassword123')
+        self.async_client.login(username='johnDoe', password='testPassword123')
+
+        creation_ts = timezone.now()
+        self.secured_url = SecuredUrl.objects.create(
+            user=self.created_user,
+            resource_route="{user_name}/urls/1234567".format(user_name=self.created_user.username),
+            password="verySecretPasswordUrl",
+            creation_date=creation_ts.date(),
+            expire_ts=creation_ts + datetime.timedelta(days=1),
+            latest_user_agent='Mozilla/5.0',
+            url_route='https://www.google.pl/'
+        )
+        self.secured_file = SecuredFile.objects.create(
+            user=self.created_user,
+            resource_route="{user_name}/files/1234567".format(user_name=self.created_user.username),
+            password="verySecretPasswordFile",
+            creation_date=creation_ts.date(),
+            expire_ts=creation_ts + datetime.timedelta(days=1),
+            latest_user_agent='Mozilla/5.0',
+            persisted_file=SimpleUploadedFile('async_file.txt', b'0123456789')
+        )
+
+    def tearDown(self):
+        self.created_user.delete()
+
+    async def test_resource_verifier(self):
+        verifier_response = await self.async_client.get('/johnDoe/urls/1234567')
+        missing_response = await self.async_client.get('/johnDoe/urls/7654321')
+
+        self.assertEqual(verifier_response.status_code, 200)
+        self.assertContains(verifier_response, 'Provide password for resource.')
+        self.assertEqual(missing_response.status_code, 404)
+
+    @override_settings(REQUEST_METRICS_ENABLED=1, REQUEST_METRICS_SAMPLE_RATE=0)
+    async def test_request_metrics_recorded(self):
+        verifier_response = await self.async_client.get('/johnDoe/urls/1234567')
+
+        self.assertIn('cache;desc="0 hits, 1 misses"', verifier_response['Server-Timing'])
+        self.assertNotIn('desc="0 queries"', verifier_response['Server-Timing'])
+
+    async def test_check_resource_password(self):
+        password_response = await self.async_client.post(
+            '/api/check-resource-password',
+            urlencode({'user_name': 'johnDoe', 'resource_type': 'urls', 'resource_uid': '1234567', 'password': 'verySecretPasswordUrl'}),
+            content_type='application/x-www-form-urlencoded',
+            **{'user-agent': 'Mozilla/5.0'}
+        )
+        wrong_password_response = await self.async_client.post(
+            '/api/check-resource-password',
+            urlencode({'user_name': 'johnDoe', 'resource_type': 'urls', 'resource_uid': '1234567', 'password': 'wrongPassword'}),
+            content_type='application/x-www-form-urlencoded',
+            **{'user-agent': 'Mozilla/5.0'}
+        )
+
+        self.assertEqual(password_response.status_code, 200)
+        self.assertEqual(password_response.json(), {'url_route': 'https://www.google.pl/'})
+        self.assertEqual(wrong_password_response.status_code, 404)
+
+    def test_check_resource_password_requires_authentication(self):
+        self.assertEqual(self.client.post('/api/check-resource-password', data={}).status_code, 401)
+
+    async def test_file_streamed_through_async_iterator(self):
+        download_response = await self.async_client.get(
+            '/johnDoe/files/1234567/download', **{'x-resource-password': 'verySecretPasswordFile', 'range': 'bytes=2-5'}
+        )
+
+        self.assertEqual(download_response.status_code, 206)
+        self.assertEqual(b''.join([chunk async for chunk in download_response.async_streaming_content]), b'2345')
+        self.assertEqual(download_response['Content-Range'], 'bytes 2-5/10')
+        self.assertIn('async_file', download_response['Content-Disposition'])
+        download_response.close()
+
+    async def test_asgi_handler_sends_async_streaming_content(self):
+        sent_messages = []
+
+        async def receive():
+            return {'type': 'http.request', 'body': b''}
+
+        async def send(message):
+            sent_messages.append(message)
+
+        request_started.disconnect(close_old_connections)
+        try:
+            await StreamingASGIHandler()({
+                'type': 'http', 'method': 'GET', 'path': '/johnDoe/files/1234567/download', 'query_string': b'',
+                'headers': [(b'host', b'testserver'), (b'x-resource-password', b'verySecretPasswordFile')]
+            }, receive, send)
+        finally:
+            request_started.connect(close_old_connections)
+
+        self.assertEqual(sent_messages[0]['status'], 200)
+        self.assertEqual(b''.join(message.get('body', b'') for message in sent_messages[1:]), b'0123456789')
+        self.assertFalse(sent_messages[-1].get('more_body'))
@@ -0,0 +1,120 @@
+import datetime
+import json
+
+from django.conf import settings
+from django.core.cache import caches
+from django.test import TestCase, override_settings
+from django.contrib.auth.models import User
+from django.utils import timezone
+
+from guard_engine.models import SecuredUrl, SecuredFile
+from guard_engine.throttling import password_check_throttle
+
+
+class BulkPasswordChecksTestCase(TestCase):
+
+    def setUp(self) -> None:
+        caches[settings.ROUTE_CACHE_ALIAS].clear()
+        password_check_throttle._backend = None
+        self.created_user = User.objects.create_user(username='johnDoe', email='john@doe.com', password='testPassword123')
+        self.client.login(username='johnDoe', password='testPassword123')
+
+        creation_ts = timezone.now()
+        self.secured_urls = [
+            SecuredUrl.objects.create(
+                user=self.created_user,
+                resource_route="{user_name}/urls/{uid}".format(user_name=self.created_user.username, uid=1000 + i),
+                password="verySecretPasswordUrl",
+                creation_date=creation_ts.date(),
+                expire_ts=creation_ts + datetime.timedelta(days=1),
+                latest_user_agent='Mozilla/5.0',
+                url_route='https://www.google.pl/{}'.format(i)
+            )
+            for i in range(10)
+        ]
+        self.secured_file = SecuredFile.objects.create(
+            user=self.created_user,
+            resource_route="{user_name}/files/2000".format(user_name=self.created_user.username),
+            password="verySecretPasswordFile",
+            creation_date=creation_ts.date(),
+            expire_ts=creation_ts + datetime.timedelta(days=1),
+            latest_user_agent='Mozilla/5.0',
+            persisted_file='media/johnDoe/bulk_file.txt',
+            file_size=10
+        )
+
+    def tearDown(self):
+        self.created_user.delete()
+
+    def get_check(self, resource, password=None):
+        user_name, resource_type, resource_uid = resource.resource_route.split('/')
+        return {
+            'user_name': user_name,
+            'resource_type': resource_type,
+            'resource_uid': resource_uid,
+            'password': password or resource.password
+        }
+
+    def check_passwords(self, checks):
+        return self.client.post(
+            '/api/check-resource-passwords', data=json.dumps(checks), content_type='application/json',
+            **{'HTTP_USER_AGENT': 'Gateway/1.0'}
+        )
+
+    def test_per_item_results(self):
+        check_response = self.check_passwords([
+            self.get_check(self.secured_urls[0]),
+            self.get_check(self.secured_urls[1], password='wrongPassword'),
+            {'user_name': 'johnDoe', 'resource_type': 'urls', 'resource_uid': '9999', 'password': 'foo'},
+            {'user_name': 'johnDoe'},
+            self.get_check(self.secured_file)
+        ])
+        results = check_response.json()
+
+        self.assertEqual(check_response.status_code, 200)
+        self.assertEqual(results[0], {'status': 200, 'url_route': 'https://www.google.pl/0'})
+        self.assertEqual(results[1], {'status': 404})
+        self.assertEqual(results[2], {'status': 404})
+        self.assertEqual(results[3], {'status': 403})
+        self.assertEqual(results[4]['status'], 200)
+        self.assertEqual(sorted(results[4]), ['download_route', 'file_name', 'status'])
+
+        self.assertEqual(SecuredUrl.objects.get(id=self.secured_urls[0].id).visit_counter, 1)
+        self.assertEqual(SecuredUrl.objects.get(id=self.secured_urls[1].id).visit_counter, 0)
+        self.assertEqual(SecuredFile.objects.get(id=self.secured_file.id).latest_user_agent, 'Gateway/1.0')
+
+    def test_query_count_independent_of_checks_number(self):
+        checks = [self.get_check(secured_url) for secured_url in self.secured_urls] + [self.get_check(self.secured_file)]
+
+        with self.assertNumQueries(14):
+            self.check_passwords(checks)
+
+        caches[settings.ROUTE_CACHE_ALIAS].clear()
+        # No first visits this time, so daily stats are left untouched
+        with self.assertNumQueries(12):
+            self.check_passwords(checks[:1] + checks[-1:])
+
+        self.assertEqual(sorted(SecuredUrl.objects.values_list('visit_counter', flat=True)), [1] * 9 + [2])
+
+    @override_settings(BULK_PASSWORD_CHECKS_LIMIT=2)
+    def test_checks_number_limited(self):
+        check_response = self.check_passwords([self.get_check(secured_url) for secured_url in self.secured_urls[:3]])
+
+        self.assertEqual(check_response.status_code, 413)
+
+    @override_settings(THROTTLE_ENABLED=1, THROTTLE_IP_BURST=5, THROTTLE_IP_RATE=0.01, BULK_PASSWORD_CHECKS_LIMIT=100)
+    def test_checks_number_limited_by_ip_burst(self):
+        checks = [self.get_check(secured_url) for secured_url in self.secured_urls]
+
+        self.assertEqual(self.check_passwords(checks[:6]).status_code, 413)
+        self.assertEqual(self.check_passwords(checks[:5]).status_code, 200)
+
+    @override_settings(THROTTLE_ENABLED=1, THROTTLE_ROUTE_BURST=1, THROTTLE_ROUTE_RATE=0.01)
+    def test_throttled_routes_reported_per_item(self):
+        self.check_passwords([self.get_check(self.secured_urls[0], password='wrongPassword')])
+
+        results = self.check_passwords([self.get_check(self.secured_urls[0]), self.get_check(self.secured_urls[1])]).json()
+
+        self.assertEqual(results[0]['status'], 429)
+        self.assertGreater(results[0]['retry_after'], 0)
+        self.assertEqual(results[1]['status'], 200)
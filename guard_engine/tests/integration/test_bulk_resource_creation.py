@@ -0,0 +1,90 @@
+import json
+
+from django.conf import settings
+from django.db import connection
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.contrib.auth.models import User
+from django.utils import timezone
+
+from guard_engine.models import DailyResourceStats, SecuredUrl, SecuredFile, UserQuota
+
+
+class BulkResourceCreationTestCase(TestCase):
+
+    def setUp(self) -> None:
+        self.created_user = User.objects.create_user(username='johnDoe', email='john@doe.com', password='testPassword123')
+        self.client.login(username='johnDoe', password='testPassword123')
+
+    def tearDown(self):
+        self.created_user.delete()
+
+    def post_resources(self, **kwargs):
+        return self.client.post(
+            '/api/secure-resources', **kwargs, **{'HTTP_USER_AGENT': 'Mozilla/5.0', 'HTTP_HOST': 'localhost'}
+        )
+
+    def test_urls_created_with_partial_failures(self):
+        UserQuota.objects.filter(user=self.created_user).update(links_number=settings.LINKS_LIMIT - 2)
+
+        bulk_response = self.post_resources(
+            data=json.dumps(['https://www.google.pl/', 'not an url', 'https://www.bing.com/', 'https://duckduckgo.com/']),
+            content_type='application/json'
+        )
+        resources = bulk_response.json()['resources']
+
+        self.assertEqual(bulk_response.status_code, 200)
+        self.assertEqual(bulk_response.json()['created'], 2)
+        self.assertIn('password', resources[0])
+        self.assertIn('url_route', resources[1]['errors'])
+        self.assertIn('password', resources[2])
+        self.assertEqual(resources[3]['errors'], {'url_route': ['Links limit exceeded.']})
+
+        self.assertEqual(
+            set(SecuredUrl.objects.values_list('resource_route', flat=True)),
+            {resources[0]['http_route'].split('/', 1)[1], resources[2]['http_route'].split('/', 1)[1]}
+        )
+        self.assertEqual(UserQuota.objects.get(user=self.created_user).links_number, settings.LINKS_LIMIT)
+        self.assertEqual(DailyResourceStats.objects.get(date=timezone.now().date()).links_created, 2)
+
+    def test_files_created_in_one_batch(self):
+        bulk_response = self.post_resources(data={'persisted_file': [
+            SimpleUploadedFile('first_file.txt', b'first content'),
+            SimpleUploadedFile('second_file.txt', b'second content')
+        ]})
+
+        self.assertEqual(bulk_response.status_code, 200)
+        self.assertEqual(bulk_response.json()['created'], 2)
+        self.assertEqual(
+            sorted(SecuredFile.objects.values_list('file_size', flat=True)), [len(b'first content'), len(b'second content')]
+        )
+        self.assertEqual(
+            UserQuota.objects.get(user=self.created_user).files_size, len(b'first content') + len(b'second content')
+        )
+        self.assertEqual(UserQuota.objects.get(user=self.created_user).files_number, 2)
+        for secured_file in SecuredFile.objects.all():
+            secured_file.delete()
+
+    @override_settings(BULK_RESOURCES_LIMIT=2)
+    def test_batch_size_limited(self):
+        bulk_response = self.post_resources(
+            data=json.dumps(['https://www.google.pl/', 'https://www.bing.com/', 'https://duckduckgo.com/']),
+            content_type='application/json'
+        )
+
+        self.assertEqual(bulk_response.status_code, 413)
+        self.assertFalse(SecuredUrl.objects.exists())
+
+    def test_bulk_creation_query_count_independent_of_batch_size(self):
+        batches_queries = []
+        for batch_size in (1, 2, 20):
+            with CaptureQueriesContext(connection) as batch_queries:
+                self.post_resources(
+                    data=json.dumps(['https://www.google.pl/{}'.format(i) for i in range(batch_size)]),
+                    content_type='application/json'
+                )
+            batches_queries.append(len(batch_queries))
+
+        self.assertEqual(batches_queries[1], batches_queries[2])
+        self.assertEqual(SecuredUrl.objects.count(), 23)
@@ -0,0 +1,86 @@
+import os
+import tempfile
+
+from django.conf import settings
+from django.core.files.storage import default_storage
+from django.test import TestCase, override_settings
+from django.contrib.auth.models import User
+
+from guard_engine.models import SecuredFile, UploadSession, UserQuota
+from guard_engine.uploads import get_session_dir
+
+
+@override_settings(UPLOAD_CHUNK_SIZE=4, UPLOAD_SESSIONS_ROOT=tempfile.mkdtemp())
+class ChunkedUploadTestCase(TestCase):
+
+    def setUp(self) -> None:
+        self.created_user = User.objects.create_user(username='johnDoe', email='john@doe.com', password='testPassword123')
+        self.client.login(username='johnDoe', password='testPassword123')
+
+    def tearDown(self):
+        self.created_user.delete()
+
+    def start_upload_session(self, total_size, file_name='chunked_file.txt'):
+        return self.client.post('/api/upload-sessions', data={'file_name': file_name, 'total_size': total_size})
+
+    def put_chunk(self, upload_id, chunk_index, content):
+        return self.client.put(
+            '/api/upload-sessions/{}/chunks/{}'.format(upload_id, chunk_index),
+            data=content,
+            content_type='application/octet-stream'
+        )
+
+    def finalize_upload_session(self, upload_id):
+        return self.client.post(
+            '/api/upload-sessions/{}/finalize'.format(upload_id),
+            **{'HTTP_USER_AGENT': 'Mozilla/5.0', 'HTTP_HOST': 'localhost'}
+        )
+
+    def test_chunks_uploaded_out_of_order_assembled_on_finalize(self):
+        session_response = self.start_upload_session(10)
+        self.assertEqual(session_response.status_code, 201)
+        upload_id = session_response.json()['upload_id']
+        self.assertEqual(session_response.json()['chunks_number'], 3)
+
+        self.assertEqual(self.put_chunk(upload_id, 2, b'89').status_code, 204)
+        self.assertEqual(self.put_chunk(upload_id, 0, b'0123').status_code, 204)
+        self.assertEqual(self.put_chunk(upload_id, 1, b'45').status_code, 400)
+
+        finalize_response = self.finalize_upload_session(upload_id)
+        self.assertEqual(finalize_response.status_code, 409)
+        self.assertEqual(finalize_response.json(), {'missing_chunks': [1]})
+
+        self.assertEqual(self.put_chunk(upload_id, 1, b'4567').status_code, 204)
+        self.assertEqual(self.client.get('/api/upload-sessions/{}'.format(upload_id)).json()['received_chunks'], [0, 1, 2])
+
+        upload_session = UploadSession.objects.get()
+        with self.captureOnCommitCallbacks() as commit_callbacks:
+            finalize_response = self.finalize_upload_session(upload_id)
+        self.assertEqual(finalize_response.status_code, 200)
+        self.assertTrue(os.path.isdir(get_session_dir(upload_session)))
+        for commit_callback in commit_callbacks:
+            commit_callback()
+        self.assertFalse(os.path.isdir(get_session_dir(upload_session)))
+
+        secured_file = SecuredFile.objects.get()
+        self.assertIn('/files/', finalize_response.json()['http_route'])
+        self.assertEqual(secured_file.file_size, 10)
+        with default_storage.open(secured_file.persisted_file.name) as persisted_file:
+            self.assertEqual(persisted_file.read(), b'0123456789')
+        self.assertEqual(UserQuota.objects.get(user=self.created_user).files_size, 10)
+        self.assertFalse(UploadSession.objects.exists())
+        secured_file.delete()
+
+    def test_upload_session_rejected_over_quota(self):
+        UserQuota.objects.filter(user=self.created_user).update(files_size=settings.USER_FILES_LIMIT - 5)
+
+        self.assertEqual(self.start_upload_session(6).status_code, 406)
+        self.assertEqual(self.start_upload_session(5).status_code, 201)
+        self.assertEqual(self.start_upload_session(1).status_code, 406)
+
+    def test_directory_file_names_rejected(self):
+        for file_name in ('..', '.', 'nested/..', 'nested/'):
+            self.assertEqual(self.start_upload_session(10, file_name=file_name).status_code, 400)
+
+        self.assertEqual(self.start_upload_session(10, file_name='../chunked_file.txt').status_code, 201)
+        self.assertEqual(UploadSession.objects.get().file_name, 'chunked_file.txt')
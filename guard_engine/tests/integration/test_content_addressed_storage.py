@@ -0,0 +1,76 @@
+from django.core.files.storage import default_storage
+from django.core.files.uploadhandler import StopFutureHandlers
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.test import TestCase, override_settings
+from django.contrib.auth.models import User
+
+from guard_engine.blobs import HashingMemoryFileUploadHandler, get_blob_stats
+from guard_engine.models import FileBlob, SecuredFile
+
+
+@override_settings(CONTENT_ADDRESSED_STORAGE=1)
+class ContentAddressedStorageTestCase(TestCase):
+
+    def setUp(self) -> None:
+        self.created_user = User.objects.create_user(username='johnDoe', email='john@doe.com', password='testPassword123')
+        self.client.login(username='johnDoe', password='testPassword123')
+
+    def tearDown(self):
+        self.created_user.delete()
+
+    def secure_file(self, content, file_name='shared_file.txt'):
+        return self.client.post(
+            '/secure-file',
+            data={'persisted_file': SimpleUploadedFile(file_name, content)},
+            **{'HTTP_USER_AGENT': 'Mozilla/5.0'}
+        )
+
+    def test_identical_uploads_share_one_blob(self):
+        self.secure_file(b'shared content')
+        self.secure_file(b'shared content')
+        self.secure_file(b'other content')
+
+        first_file, second_file, other_file = SecuredFile.objects.order_by('id')
+        self.assertEqual(first_file.blob_id, second_file.blob_id)
+        self.assertEqual(first_file.persisted_file.name, second_file.persisted_file.name)
+        self.assertNotEqual(first_file.blob_id, other_file.blob_id)
+        self.assertEqual(FileBlob.objects.get(id=first_file.blob_id).reference_counter, 2)
+
+        blob_stats = get_blob_stats()
+        self.assertEqual(blob_stats['saved_bytes'], len(b'shared content'))
+        self.assertAlmostEqual(blob_stats['hit_rate'], 1 / 3)
+
+        first_file.delete()
+        self.assertTrue(default_storage.exists(second_file.persisted_file.name))
+
+        second_file.delete()
+        self.assertFalse(default_storage.exists(second_file.persisted_file.name))
+        self.assertFalse(FileBlob.objects.filter(id=second_file.blob_id).exists())
+        other_file.delete()
+
+    def test_original_file_name_kept(self):
+        self.secure_file(b'report content', file_name='report.pdf')
+
+        secured_file = SecuredFile.objects.get()
+        self.assertEqual(secured_file.original_name, 'report.pdf')
+        self.assertNotIn('report', secured_file.persisted_file.name)
+        self.assertContains(self.client.get('/'), '(report.pdf)')
+
+        download_response = self.client.get(
+            '/{}/download'.format(secured_file.resource_route),
+            **{'HTTP_X_RESOURCE_PASSWORD': secured_file.password}
+        )
+        self.assertEqual(download_response.status_code, 200)
+        self.assertEqual(download_response['Content-Disposition'], 'attachment; filename="report.pdf"')
+        download_response.close()
+        secured_file.delete()
+
+    @override_settings(CONTENT_ADDRESSED_STORAGE=0)
+    def test_uploads_not_hashed_when_disabled(self):
+        upload_handler = HashingMemoryFileUploadHandler()
+        upload_handler.handle_raw_input(None, None, 10, None)
+        with self.assertRaises(StopFutureHandlers):
+            upload_handler.new_file('persisted_file', 'report.pdf', 'application/pdf', 10)
+        upload_handler.receive_data_chunk(b'0123456789', 0)
+
+        self.assertFalse(hasattr(upload_handler.file_complete(10), 'sha256'))
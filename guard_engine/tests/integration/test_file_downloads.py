@@ -0,0 +1,111 @@
+import datetime
+import mock
+
+from django.test import TestCase, override_settings
+from django.contrib.auth.models import User
+from django.core.exceptions import ImproperlyConfigured
+from django.core.files.storage import default_storage
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.utils import timezone
+
+from guard_engine.downloads import validate_sendfile_storage
+from guard_engine.models import SecuredFile
+from guard_engine.throttling import password_check_throttle
+
+
+class FileDownloadTestCase(TestCase):
+
+    def setUp(self) -> None:
+        password_check_throttle._backend = None
+        self.created_user = User.objects.create_user(username='johnDoe', email='john@doe.com', password='testPassword123')
+
+        creation_ts = timezone.now()
+        self.secured_file = SecuredFile.objects.create(
+            user=self.created_user,
+            resource_route="{user_name}/files/1234567".format(user_name=self.created_user.username),
+            password="verySecretPasswordFile",
+            creation_date=creation_ts.date(),
+            expire_ts=creation_ts + datetime.timedelta(days=1),
+            latest_user_agent='Mozilla/5.0',
+            persisted_file=SimpleUploadedFile('download_file.txt', b'0123456789')
+        )
+        self.download_route = '/' + self.secured_file.resource_route + '/download'
+
+    def tearDown(self):
+        self.created_user.delete()
+
+    def download(self, **headers):
+        return self.client.get(self.download_route, **dict({'HTTP_X_RESOURCE_PASSWORD': 'verySecretPasswordFile'}, **headers))
+
+    def test_file_streamed_with_password(self):
+        download_response = self.download()
+
+        self.assertEqual(download_response.status_code, 200)
+        self.assertEqual(b''.join(download_response.streaming_content), b'0123456789')
+        self.assertEqual(download_response['Content-Length'], '10')
+        self.assertEqual(download_response['Accept-Ranges'], 'bytes')
+
+    def test_file_download_rejected_without_access(self):
+        self.assertEqual(self.client.get(self.download_route).status_code, 403)
+        self.assertEqual(self.download(HTTP_X_RESOURCE_PASSWORD='wrongPassword').status_code, 403)
+        self.assertEqual(self.client.get(self.download_route, {'token': 'forged'}).status_code, 403)
+
+    @override_settings(THROTTLE_ENABLED=1, THROTTLE_IP_RATE=0.01, THROTTLE_IP_BURST=3)
+    def test_header_passwords_throttled(self):
+        for password in ('firstGuess', 'secondGuess', 'thirdGuess'):
+            self.assertEqual(self.download(HTTP_X_RESOURCE_PASSWORD=password).status_code, 403)
+
+        throttled_response = self.download()
+        self.assertEqual(throttled_response.status_code, 429)
+        self.assertGreater(int(throttled_response['Retry-After']), 0)
+
+    def test_file_range_and_conditional_requests(self):
+        range_response = self.download(HTTP_RANGE='bytes=2-5')
+        self.assertEqual(range_response.status_code, 206)
+        self.assertEqual(b''.join(range_response.streaming_content), b'2345')
+        self.assertEqual(range_response['Content-Range'], 'bytes 2-5/10')
+
+        suffix_response = self.download(HTTP_RANGE='bytes=-3')
+        self.assertEqual(b''.join(suffix_response.streaming_content), b'789')
+
+        self.assertEqual(self.download(HTTP_RANGE='bytes=20-').status_code, 416)
+        self.assertEqual(self.download(HTTP_IF_NONE_MATCH=range_response['ETag']).status_code, 304)
+
+    def test_file_downloaded_with_token_from_password_check(self):
+        self.client.login(username='johnDoe', password='testPassword123')
+        password_response = self.client.post(
+            '/api/check-resource-password',
+            data={
+                'user_name': 'johnDoe',
+                'resource_type': 'files',
+                'resource_uid': '1234567',
+                'password': 'verySecretPasswordFile'
+            },
+            **{'HTTP_USER_AGENT': 'Mozilla/5.0'}
+        )
+
+        self.client.logout()
+        download_response = self.client.get(password_response.json()['download_route'])
+        self.assertEqual(download_response.status_code, 200)
+        self.assertEqual(b''.join(download_response.streaming_content), b'0123456789')
+
+    @override_settings(DOWNLOAD_SENDFILE_MODE='x-accel-redirect')
+    def test_file_download_offloaded_to_web_server(self):
+        download_response = self.download()
+
+        self.assertEqual(download_response.status_code, 200)
+        self.assertEqual(download_response['X-Accel-Redirect'], '/protected/' + self.secured_file.persisted_file.name)
+        self.assertEqual(download_response.content, b'')
+
+    @override_settings(DOWNLOAD_SENDFILE_MODE='x-sendfile')
+    def test_file_download_sent_from_storage_path(self):
+        download_response = self.download()
+
+        self.assertEqual(download_response.status_code, 200)
+        self.assertEqual(download_response['X-Sendfile'], default_storage.path(self.secured_file.persisted_file.name))
+
+    @override_settings(DOWNLOAD_SENDFILE_MODE='x-sendfile')
+    def test_sendfile_requires_local_storage(self):
+        with mock.patch('guard_engine.downloads.default_storage', new=object()):
+            with self.assertRaises(ImproperlyConfigured):
+                validate_sendfile_storage()
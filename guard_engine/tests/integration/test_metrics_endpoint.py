@@ -0,0 +1,131 @@
+import datetime
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+
+from django.core.cache import cache
+from django.test import TestCase, override_settings
+from django.contrib.auth.models import User
+from django.utils import timezone
+
+from guard_engine.expiry import purge_expired
+from guard_engine.metrics import MetricsRegistry, metrics_registry
+from guard_engine.models import SecuredUrl
+from guard_engine.throttling import password_check_throttle
+
+
+@override_settings(METRICS_ENABLED=1, METRICS_FLUSH_INTERVAL=3600)
+class MetricsEndpointTestCase(TestCase):
+
+    def setUp(self) -> None:
+        self.metrics_dir = tempfile.mkdtemp()
+        self.metrics_dir_settings = self.settings(METRICS_DIR=self.metrics_dir)
+        self.metrics_dir_settings.enable()
+        metrics_registry.values.clear()
+        cache.clear()
+        password_check_throttle._backend = None
+
+        self.created_user = User.objects.create_superuser(username='admin', email='admin@mysite.com', password='testPassword123')
+        self.client.login(username='admin', password='testPassword123')
+
+    def tearDown(self):
+        self.created_user.delete()
+        metrics_registry.values.clear()
+        self.metrics_dir_settings.disable()
+        shutil.rmtree(self.metrics_dir)
+
+    def secure_url(self):
+        return self.client.post(
+            '/api/secure-resource', data={'url_route': 'https://www.google.pl/'},
+            **{'HTTP_USER_AGENT': 'Mozilla/5.0', 'HTTP_HOST': 'localhost'}
+        )
+
+    def check_password(self, resource_route, password):
+        user_name, resource_type, resource_uid = resource_route.split('/')
+        return self.client.post(
+            '/api/check-resource-password',
+            data={'user_name': user_name, 'resource_type': resource_type, 'resource_uid': resource_uid, 'password': password},
+            **{'HTTP_USER_AGENT': 'Mozilla/5.0'}
+        )
+
+    def test_metrics_exported_in_prometheus_format(self):
+        created_resource = self.secure_url().json()
+        resource_route = created_resource['http_route'].split('/', 1)[1]
+        self.check_password(resource_route, created_resource['password'])
+        self.check_password(resource_route, 'wrongPassword')
+        with self.settings(LINKS_LIMIT=1):
+            self.assertEqual(self.secure_url().status_code, 406)
+        self.client.get('/')
+
+        response = self.client.get('/metrics')
+        metrics = response.content.decode()
+
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response['Content-Type'].startswith('text/plain; version=0.0.4'))
+        self.assertIn('# TYPE resource_guard_request_duration_seconds histogram', metrics)
+        self.assertIn('resource_guard_request_duration_seconds_count{view="user_resources"} 1', metrics)
+        self.assertIn('resource_guard_request_duration_seconds_bucket{view="user_resources",le="+Inf"} 1', metrics)
+        self.assertIn('resource_guard_resources_created_total{type="urls"} 1', metrics)
+        self.assertIn('resource_guard_password_checks_total{result="success",type="urls"} 1', metrics)
+        self.assertIn('resource_guard_password_checks_total{result="failure",type="urls"} 1', metrics)
+        self.assertIn('resource_guard_quota_rejections_total{type="urls"} 1', metrics)
+        self.assertIn('resource_guard_live_urls 1', metrics)
+        self.assertIn('resource_guard_live_files 0', metrics)
+
+    def test_expired_purges_counted(self):
+        creation_ts = timezone.now() - datetime.timedelta(days=2)
+        SecuredUrl.objects.create(
+            user=self.created_user,
+            resource_route="{user_name}/urls/1234567".format(user_name=self.created_user.username),
+            password="verySecretPasswordUrl",
+            creation_date=creation_ts.date(),
+            expire_ts=creation_ts + datetime.timedelta(days=1),
+            latest_user_agent='Mozilla/5.0',
+            url_route='https://www.google.pl/'
+        )
+        purge_expired()
+
+        metrics = self.client.get('/metrics').content.decode()
+
+        self.assertIn('resource_guard_expired_purged_total{type="urls"} 1', metrics)
+        self.assertIn('resource_guard_expired_purged_total{type="files"} 0', metrics)
+
+    def test_worker_snapshots_summed(self):
+        self.secure_url()
+        worker_registry = MetricsRegistry()
+        worker_registry.inc('resource_guard_resources_created_total', 2, type='urls')
+        worker_registry.process_id = 'other-worker'
+        worker_registry.flush()
+
+        metrics = self.client.get('/metrics').content.decode()
+
+        self.assertIn('resource_guard_resources_created_total{type="urls"} 3', metrics)
+
+    def test_dead_worker_snapshots_folded_into_retired(self):
+        exited_process = subprocess.Popen([sys.executable, '-c', ''])
+        exited_process.wait()
+        for _ in range(2):
+            worker_registry = MetricsRegistry()
+            worker_registry.inc('resource_guard_resources_created_total', 2, type='urls')
+            worker_registry.process_id = '{}-{}'.format(exited_process.pid, len(os.listdir(self.metrics_dir)))
+            worker_registry.flush()
+
+        for _ in range(2):
+            metrics = self.client.get('/metrics').content.decode()
+            self.assertIn('resource_guard_resources_created_total{type="urls"} 4', metrics)
+        snapshot_names = os.listdir(self.metrics_dir)
+        self.assertIn('retired.json', snapshot_names)
+        self.assertFalse([name for name in snapshot_names if name.startswith('{}-'.format(exited_process.pid))])
+
+    def test_live_gauges_cached_between_scrapes(self):
+        self.client.get('/metrics')
+        with self.assertNumQueries(2):
+            self.client.get('/metrics')
+
+    def test_metrics_restricted_to_superusers(self):
+        User.objects.create_user(username='johnDoe', email='john@doe.com', password='testPassword123')
+        self.client.login(username='johnDoe', password='testPassword123')
+
+        self.assertEqual(self.client.get('/metrics').status_code, 403)
@@ -0,0 +1,85 @@
+import datetime
+
+from django.conf import settings
+from django.core.cache import caches
+from django.test import TestCase, override_settings
+from django.contrib.auth.models import User
+from django.utils import timezone
+
+from guard_engine.models import SecuredUrl
+from guard_engine.throttling import password_check_throttle
+
+
+@override_settings(THROTTLE_ENABLED=1, THROTTLE_IP_RATE=0.01, THROTTLE_IP_BURST=3)
+class PasswordChecksThrottlingTestCase(TestCase):
+
+    def setUp(self) -> None:
+        caches[settings.THROTTLE_CACHE_ALIAS].clear()
+        password_check_throttle._backend = None
+        self.created_user = User.objects.create_user(username='johnDoe', email='john@doe.com', password='testPassword123')
+        self.client.login(username='johnDoe', password='testPassword123')
+
+        creation_ts = timezone.now()
+        self.secured_url = SecuredUrl.objects.create(
+            user=self.created_user,
+            resource_route="{user_name}/urls/1234567".format(user_name=self.created_user.username),
+            password="verySecretPasswordUrl",
+            creation_date=creation_ts.date(),
+            expire_ts=creation_ts + datetime.timedelta(days=1),
+            latest_user_agent='Mozilla/5.0',
+            url_route='https://www.google.pl/'
+        )
+
+    def tearDown(self):
+        password_check_throttle._backend = None
+        self.created_user.delete()
+
+    def check_password(self, password, resource_uid='1234567', client_ip='127.0.0.1'):
+        return self.client.post(
+            '/api/check-resource-password',
+            data={'user_name': 'johnDoe', 'resource_type': 'urls', 'resource_uid': resource_uid, 'password': password},
+            **{'HTTP_USER_AGENT': 'Mozilla/5.0', 'REMOTE_ADDR': client_ip}
+        )
+
+    def assert_ip_throttled(self):
+        for resource_uid in ('1111111', '2222222', '3333333'):
+            self.assertEqual(self.check_password('guess', resource_uid=resource_uid).status_code, 404)
+
+        with self.assertNumQueries(0):
+            throttled_response = self.check_password('verySecretPasswordUrl')
+
+        self.assertEqual(throttled_response.status_code, 429)
+        self.assertGreater(int(throttled_response['Retry-After']), 0)
+
+    def test_client_ip_throttled_before_db_access(self):
+        self.assert_ip_throttled()
+
+    @override_settings(THROTTLE_BACKEND='guard_engine.throttling.CacheThrottleBackend')
+    def test_client_ip_throttled_with_shared_cache(self):
+        self.assert_ip_throttled()
+
+    @override_settings(THROTTLE_IP_BURST=100, THROTTLE_LOCKOUT_FAILURES=3)
+    def test_route_locked_out_after_failures(self):
+        lockouts = password_check_throttle.get_stats()['lockouts']
+        self.assertEqual(self.check_password('firstGuess').status_code, 404)
+        self.assertEqual(self.check_password('verySecretPasswordUrl').status_code, 200)
+
+        for password in ('firstGuess', 'secondGuess', 'thirdGuess'):
+            self.assertEqual(self.check_password(password).status_code, 404)
+
+        locked_out_response = self.check_password('verySecretPasswordUrl')
+        self.assertEqual(locked_out_response.status_code, 429)
+        self.assertLessEqual(int(locked_out_response['Retry-After']), settings.THROTTLE_LOCKOUT_TIME)
+        self.assertEqual(password_check_throttle.get_stats()['lockouts'], lockouts + 1)
+        self.assertEqual(self.check_password('verySecretPasswordUrl', resource_uid='7654321').status_code, 404)
+        self.assertEqual(self.check_password('verySecretPasswordUrl', client_ip='10.0.0.2').status_code, 200)
+
+    @override_settings(THROTTLE_IP_BURST=100, THROTTLE_ROUTE_BURST=2, THROTTLE_ROUTE_RATE=0.01)
+    def test_route_tokens_spent_on_failures_only(self):
+        for _ in range(5):
+            self.assertEqual(self.check_password('verySecretPasswordUrl').status_code, 200)
+
+        self.assertEqual(self.check_password('firstGuess', client_ip='10.0.0.2').status_code, 404)
+        self.assertEqual(self.check_password('secondGuess', client_ip='10.0.0.3').status_code, 404)
+
+        self.assertEqual(self.check_password('verySecretPasswordUrl').status_code, 429)
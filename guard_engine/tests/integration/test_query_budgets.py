@@ -0,0 +1,144 @@
+import datetime
+
+from django.conf import settings
+from django.core.cache import caches
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.test import TestCase
+from django.contrib.auth.models import User
+from django.utils import timezone
+
+from guard_engine.models import (
+    ApiKey, DailyResourceStats, FileBlob, SecuredFile, SecuredUrl, StorageDeadLetter, StorageJob, UserQuota
+)
+from guard_engine.throttling import password_check_throttle
+
+ROWS_NUMBERS = (1, 10, 100)
+
+
+class QueryBudgetsTestCase(TestCase):
+    """
+    Pins the number of queries of every view at 1, 10 and 100 rows, so queries growing with the data fail.
+    """
+
+    def setUp(self) -> None:
+        password_check_throttle._backend = None
+        self.created_user = User.objects.create_superuser(username='johnDoe', email='john@doe.com', password='testPassword123')
+        self.client.force_login(self.created_user)
+        self.creation_ts = timezone.now()
+        DailyResourceStats.objects.create(date=self.creation_ts.date())
+
+    def tearDown(self):
+        self.created_user.delete()
+        User.objects.filter(username__startswith='quotaUser').delete()
+
+    def seed_resources(self, model, rows_number):
+        resource_type = 'urls' if model is SecuredUrl else 'files'
+        seeded_rows = model.objects.count()
+        model.objects.bulk_create([
+            model(**self.get_resource_data(resource_type, resource_number))
+            for resource_number in range(seeded_rows, rows_number)
+        ])
+
+    def get_resource_data(self, resource_type, resource_number):
+        resource_data = {
+            'user': self.created_user,
+            'resource_route': 'johnDoe/{}/{:07d}'.format(resource_type, resource_number),
+            'password': 'verySecretPassword',
+            'creation_date': self.creation_ts.date(),
+            'expire_ts': self.creation_ts + datetime.timedelta(days=1),
+            'latest_user_agent': 'Mozilla/5.0',
+        }
+        if resource_type == 'urls':
+            resource_data['url_route'] = 'https://www.google.pl/'
+        else:
+            resource_data.update(persisted_file='media/johnDoe/budget_file.txt', file_size=10)
+        return resource_data
+
+    def seed_rows(self, model, rows_number):
+        seeded_rows = model.objects.count()
+        if model is UserQuota:
+            for user_number in range(seeded_rows, rows_number):
+                User.objects.create(username='quotaUser{}'.format(user_number))
+        elif model is ApiKey:
+            ApiKey.objects.bulk_create([
+                ApiKey(user=self.created_user, prefix='{:08d}'.format(key_number), key_hash='0' * 64)
+                for key_number in range(seeded_rows, rows_number)
+            ])
+        elif model is FileBlob:
+            FileBlob.objects.bulk_create([
+                FileBlob(digest='{:064d}'.format(blob_number), name='blobs/{}'.format(blob_number), size=10)
+                for blob_number in range(seeded_rows, rows_number)
+            ])
+        elif model is StorageDeadLetter:
+            StorageDeadLetter.objects.bulk_create([
+                StorageDeadLetter(kind=StorageJob.DELETE, payload='{}', attempts=5)
+                for _ in range(seeded_rows, rows_number)
+            ])
+        elif model is DailyResourceStats:
+            DailyResourceStats.objects.bulk_create([
+                DailyResourceStats(date=self.creation_ts.date() - datetime.timedelta(days=days_ago), links_visited=1)
+                for days_ago in range(seeded_rows, rows_number)
+            ])
+        else:
+            self.seed_resources(model, rows_number)
+
+    def assertQueryBudget(self, budget, models, send_request, status_code=200):
+        for rows_number in ROWS_NUMBERS:
+            for model in models:
+                self.seed_rows(model, rows_number)
+            caches[settings.ROUTE_CACHE_ALIAS].clear()
+            caches[settings.DASHBOARD_CACHE_ALIAS].clear()
+            last_row = models[-1].objects.order_by('id').last()
+            with self.subTest(rows=rows_number), self.assertNumQueries(budget):
+                self.assertEqual(send_request(last_row).status_code, status_code)
+
+    def test_user_resources(self):
+        self.assertQueryBudget(5, (SecuredUrl, SecuredFile), lambda last_row: self.client.get('/'))
+
+    def test_resource_verifier(self):
+        self.assertQueryBudget(3, (SecuredUrl,), lambda last_row: self.client.get('/' + last_row.resource_route))
+
+    def test_resource_details(self):
+        self.assertQueryBudget(3, (SecuredFile,), lambda last_row: self.client.get(
+            '/files/{}/details'.format(last_row.id)
+        ))
+
+    def test_secured_url_create(self):
+        self.assertQueryBudget(3, (SecuredUrl,), lambda last_row: self.client.get('/secure-url'))
+        self.assertQueryBudget(8, (SecuredUrl,), lambda last_row: self.client.post(
+            '/secure-url', data={'url_route': 'https://www.google.pl/'}, **{'HTTP_USER_AGENT': 'Mozilla/5.0'}
+        ), status_code=302)
+
+    def test_secured_file_create(self):
+        self.assertQueryBudget(3, (SecuredFile,), lambda last_row: self.client.get('/secure-file'))
+        self.assertQueryBudget(8, (SecuredFile,), lambda last_row: self.client.post(
+            '/secure-file', data={'persisted_file': SimpleUploadedFile('budget_file.txt', b'0123456789')},
+            **{'HTTP_USER_AGENT': 'Mozilla/5.0'}
+        ), status_code=302)
+
+    def test_check_resource_password(self):
+        self.assertQueryBudget(5, (SecuredUrl,), lambda last_row: self.client.post(
+            '/api/check-resource-password',
+            data={
+                'user_name': 'johnDoe',
+                'resource_type': 'urls',
+                'resource_uid': last_row.resource_route.split('/')[2],
+                'password': 'verySecretPassword'
+            },
+            **{'HTTP_USER_AGENT': 'Mozilla/5.0'}
+        ))
+
+    def test_secure_new_resource(self):
+        self.assertQueryBudget(8, (SecuredUrl,), lambda last_row: self.client.post(
+            '/api/secure-resource', data={'url_route': 'https://www.google.pl/'},
+            **{'HTTP_USER_AGENT': 'Mozilla/5.0', 'HTTP_HOST': 'localhost'}
+        ))
+
+    def test_details_of_resources(self):
+        self.assertQueryBudget(3, (DailyResourceStats,), lambda last_row: self.client.get('/api/resources-details'))
+
+    def test_admin_changelists(self):
+        for model in (SecuredUrl, SecuredFile, UserQuota, FileBlob, ApiKey, StorageDeadLetter):
+            self.assertQueryBudget(5, (model,), lambda last_row: self.client.get(
+                '/admin/guard_engine/{}/'.format(model._meta.model_name)
+            ))
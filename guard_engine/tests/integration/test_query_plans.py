@@ -0,0 +1,103 @@
+import datetime
+import re
+
+from django.conf import settings
+from django.core.cache import caches
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.contrib.auth.models import User
+from django.utils import timezone
+
+from guard_engine.dashboard import get_resources_page
+from guard_engine.expiry import purge_expired_batch
+from guard_engine.models import SecuredUrl, SecuredFile
+from guard_engine.route_cache import route_cache
+from guard_engine.visits import record_single_visit, update_visits
+
+SEQUENTIAL_SCAN = re.compile(r'(Seq Scan on|SCAN( TABLE)?) "?guard_engine_secured')
+
+
+class QueryPlansTestCase(TestCase):
+    """
+    Explains the queries of the hot paths against a seeded dataset and fails on sequential scans of resources.
+    """
+
+    def setUp(self) -> None:
+        caches[settings.ROUTE_CACHE_ALIAS].clear()
+        self.created_users = [
+            User.objects.create_user(username='johnDoe{}'.format(user_number), password='testPassword123')
+            for user_number in range(3)
+        ]
+
+        self.verification_ts = timezone.now()
+        for user in self.created_users:
+            for model, resource_type in ((SecuredUrl, 'urls'), (SecuredFile, 'files')):
+                model.objects.bulk_create([
+                    model(**self.get_resource_data(user, resource_type, resource_number))
+                    for resource_number in range(200)
+                ])
+        with connection.cursor() as cursor:
+            cursor.execute('ANALYZE')
+
+    def tearDown(self):
+        for user in self.created_users:
+            user.delete()
+
+    def get_resource_data(self, user, resource_type, resource_number):
+        creation_ts = self.verification_ts - datetime.timedelta(days=resource_number % 7)
+        resource_data = {
+            'user': user,
+            'resource_route': '{}/{}/{:07d}'.format(user.username, resource_type, resource_number),
+            'password': 'verySecretPassword',
+            'creation_date': creation_ts.date(),
+            # every 20th resource is already expired
+            'expire_ts': self.verification_ts + datetime.timedelta(hours=resource_number % 20 - 1),
+            'latest_user_agent': 'Mozilla/5.0',
+        }
+        if resource_type == 'urls':
+            resource_data['url_route'] = 'https://www.google.pl/'
+        else:
+            resource_data.update(persisted_file='media/{}/plan_file.txt'.format(user.username), file_size=10)
+        return resource_data
+
+    def assertNoSequentialScans(self, captured_queries):
+        explained_queries = 0
+        for captured_query in captured_queries:
+            sql = captured_query['sql']
+            if not sql.startswith(('SELECT', 'UPDATE', 'DELETE')):
+                continue
+            with connection.cursor() as cursor:
+                cursor.execute('{} {}'.format(connection.ops.explain_query_prefix(), sql))
+                query_plan = '\n'.join(' '.join(map(str, row)) for row in cursor.fetchall())
+            self.assertIsNone(SEQUENTIAL_SCAN.search(query_plan), '{}\n{}'.format(sql, query_plan))
+            explained_queries += 1
+        self.assertTrue(explained_queries)
+
+    def test_dashboard_pages(self):
+        for model in (SecuredUrl, SecuredFile):
+            with CaptureQueriesContext(connection) as captured_queries:
+                _, next_cursor = get_resources_page(model, self.created_users[1], self.verification_ts)
+                get_resources_page(model, self.created_users[1], self.verification_ts, cursor=next_cursor)
+            self.assertNoSequentialScans(captured_queries)
+
+    def test_route_verification(self):
+        for model, resource_type in ((SecuredUrl, 'urls'), (SecuredFile, 'files')):
+            with CaptureQueriesContext(connection) as captured_queries:
+                route_cache.get(model, 'johnDoe1', 'johnDoe1/{}/0000010'.format(resource_type))
+            self.assertNoSequentialScans(captured_queries)
+
+    def test_visits_recording(self):
+        for model in (SecuredUrl, SecuredFile):
+            resources = list(model.objects.filter(user=self.created_users[1]).order_by('id')[:10])
+            with CaptureQueriesContext(connection) as captured_queries:
+                record_single_visit(resources[0], 'Mozilla/5.0')
+                update_visits(model, {resource.id: (1, 'Mozilla/5.0') for resource in resources[1:]})
+            self.assertNoSequentialScans(captured_queries)
+
+    def test_expired_resources_purge(self):
+        for model in (SecuredUrl, SecuredFile):
+            with CaptureQueriesContext(connection) as captured_queries:
+                purged_resources, _ = purge_expired_batch(model, self.verification_ts, 100)
+            self.assertEqual(purged_resources, 30)
+            self.assertNoSequentialScans(captured_queries)
@@ -0,0 +1,79 @@
+import base64
+
+from django.test import TestCase, override_settings
+from django.contrib.auth.models import User
+from django.contrib.sessions.models import Session
+from django.utils import timezone
+
+from guard_engine.db_routers import PRIMARY_COOKIE_NAME, DatabaseRoutingState, ReplicaRouter, routing_state
+from guard_engine.models import DailyResourceStats, UserQuota
+
+
+@override_settings(REPLICA_DATABASES=['replica'])
+class ReplicaRoutingTestCase(TestCase):
+    databases = {'default', 'replica'}
+
+    def setUp(self) -> None:
+        self.created_user = User.objects.create_superuser(username='admin', email='admin@mysite.com', password='testPassword123')
+        User.objects.using('replica').bulk_create([self.created_user])
+        self.authorization = 'Basic ' + base64.b64encode(b'admin:testPassword123').decode()
+
+        today = timezone.now().date()
+        DailyResourceStats.objects.create(date=today, links_visited=1)
+        DailyResourceStats.objects.using('replica').create(date=today, links_visited=2)
+
+    def tearDown(self):
+        self.created_user.delete()
+
+    def get_links_visited(self):
+        details_response = self.client.get('/api/resources-details', HTTP_AUTHORIZATION=self.authorization)
+        return list(details_response.json().values())[0]['links']
+
+    def test_safe_requests_read_from_replica(self):
+        self.assertEqual(self.get_links_visited(), 2)
+        self.assertNotIn(PRIMARY_COOKIE_NAME, self.client.cookies)
+
+    def test_dashboard_reads_from_replica(self):
+        self.client.force_login(self.created_user)
+        Session.objects.using('replica').bulk_create(list(Session.objects.all()))
+        UserQuota.objects.using('replica').create(user=self.created_user, links_number=7)
+
+        dashboard_response = self.client.get('/')
+
+        self.assertEqual(dashboard_response.status_code, 200)
+        self.assertEqual(dashboard_response.context['links_number'], 7)
+        self.assertNotIn(PRIMARY_COOKIE_NAME, dashboard_response.cookies)
+
+    def test_writes_pin_client_to_primary(self):
+        secure_response = self.client.post(
+            '/api/secure-resource', data={'url_route': 'https://www.google.pl/'},
+            **{'HTTP_USER_AGENT': 'Mozilla/5.0', 'HTTP_HOST': 'localhost', 'HTTP_AUTHORIZATION': self.authorization}
+        )
+
+        self.assertEqual(secure_response.status_code, 200)
+        self.assertIn(PRIMARY_COOKIE_NAME, secure_response.cookies)
+        self.assertEqual(self.get_links_visited(), 1)
+
+    def test_pinned_view_reads_from_primary(self):
+        upload_response = self.client.post(
+            '/api/upload-sessions', data={'file_name': 'replica_file.txt', 'total_size': 10},
+            HTTP_AUTHORIZATION=self.authorization
+        )
+        self.client.cookies.clear()
+
+        details_response = self.client.get(
+            '/api/upload-sessions/{}'.format(upload_response.json()['upload_id']), HTTP_AUTHORIZATION=self.authorization
+        )
+        self.assertEqual(details_response.status_code, 200)
+
+    def test_reads_after_write_stick_to_primary(self):
+        router = ReplicaRouter()
+        state_token = routing_state.set(DatabaseRoutingState(use_replicas=True))
+        try:
+            self.assertEqual(router.db_for_read(DailyResourceStats), 'replica')
+            router.db_for_write(DailyResourceStats)
+            self.assertIsNone(router.db_for_read(DailyResourceStats))
+        finally:
+            routing_state.reset(state_token)
+
+        self.assertIsNone(router.db_for_read(DailyResourceStats))
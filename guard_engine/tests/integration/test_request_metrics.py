@@ -0,0 +1,86 @@
+import datetime
+import json
+import re
+
+from django.conf import settings
+from django.core.cache import caches
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.db import connection
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.contrib.auth.models import User
+from django.utils import timezone
+
+from guard_engine.models import SecuredFile, SecuredUrl
+
+
+@override_settings(
+    REQUEST_METRICS_ENABLED=1, REQUEST_METRICS_SLOW_TIME=60000, REQUEST_METRICS_SLOW_QUERIES=1000,
+    REQUEST_METRICS_SAMPLE_RATE=0
+)
+class RequestMetricsTestCase(TestCase):
+
+    def setUp(self) -> None:
+        caches[settings.ROUTE_CACHE_ALIAS].clear()
+        self.created_user = User.objects.create_user(username='johnDoe', email='john@doe.com', password='testPassword123')
+        self.client.login(username='johnDoe', password='testPassword123')
+
+        creation_ts = timezone.now()
+        self.secured_url = SecuredUrl.objects.create(
+            user=self.created_user,
+            resource_route="{user_name}/urls/1234567".format(user_name=self.created_user.username),
+            password="verySecretPasswordUrl",
+            creation_date=creation_ts.date(),
+            expire_ts=creation_ts + datetime.timedelta(days=1),
+            latest_user_agent='Mozilla/5.0',
+            url_route='https://www.google.pl/'
+        )
+
+    def tearDown(self):
+        self.created_user.delete()
+
+    def get_timing(self, response, metric):
+        return re.search(r'{};(?:dur=[\d.]+;)?desc="([^"]*)"'.format(metric), response['Server-Timing']).group(1)
+
+    def test_server_timing_counts_request_queries(self):
+        with CaptureQueriesContext(connection) as captured_queries:
+            response = self.client.get('/')
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(self.get_timing(response, 'db'), '{} queries'.format(len(captured_queries)))
+        self.assertIn('total;dur=', response['Server-Timing'])
+
+    def test_route_cache_lookups_counted(self):
+        self.client.get('/' + self.secured_url.resource_route)
+        response = self.client.get('/' + self.secured_url.resource_route)
+
+        self.assertEqual(self.get_timing(response, 'cache'), '1 hits, 0 misses')
+
+    def test_storage_calls_timed(self):
+        response = self.client.post(
+            '/secure-file',
+            data={'persisted_file': SimpleUploadedFile('timed_file.txt', b'timed content')},
+            **{'HTTP_USER_AGENT': 'Mozilla/5.0'}
+        )
+
+        self.assertNotEqual(self.get_timing(response, 'storage'), '0 calls')
+        SecuredFile.objects.get().delete()
+
+    def test_slow_requests_logged(self):
+        with self.settings(REQUEST_METRICS_SLOW_QUERIES=1), self.assertLogs('guard_engine.instrumentation', 'WARNING') as logs:
+            self.client.get('/')
+
+        record = json.loads(logs.records[0].getMessage())
+        self.assertEqual(record['view'], 'user_resources')
+        self.assertTrue(record['slow'])
+        self.assertGreater(record['queries'], 1)
+
+    def test_requests_sampled(self):
+        with self.settings(REQUEST_METRICS_SAMPLE_RATE=1), self.assertLogs('guard_engine.instrumentation', 'INFO') as logs:
+            self.client.get('/')
+
+        self.assertFalse(json.loads(logs.records[0].getMessage())['slow'])
+
+    @override_settings(REQUEST_METRICS_ENABLED=0)
+    def test_disabled_metrics_omit_header(self):
+        self.assertNotIn('Server-Timing', self.client.get('/'))
@@ -0,0 +1,46 @@
+import re
+
+from django.test import TestCase
+from django.contrib.auth.models import User
+
+from guard_engine.models import SecuredUrl
+from guard_engine.resource_ids import RESOURCE_UID_LENGTH, new_resource_route, new_resource_uid
+
+RESOURCE_UID_PATTERN = re.compile(r'^[0-9A-HJKMNP-TV-Z]{26}$')
+
+
+class ResourceIdsTestCase(TestCase):
+
+    def setUp(self) -> None:
+        self.created_user = User.objects.create_user(username='johnDoe', email='john@doe.com', password='testPassword123')
+        self.client.login(username='johnDoe', password='testPassword123')
+
+    def tearDown(self):
+        self.created_user.delete()
+
+    def test_resource_uids_unique_and_time_ordered(self):
+        resource_uids = [new_resource_uid() for _ in range(10000)]
+
+        self.assertEqual(len(set(resource_uids)), len(resource_uids))
+        self.assertEqual(resource_uids, sorted(resource_uids))
+        self.assertTrue(all(RESOURCE_UID_PATTERN.match(resource_uid) for resource_uid in resource_uids))
+
+    def test_resource_route(self):
+        user_name, resource_type, resource_uid = new_resource_route('johnDoe', 'files').split('/')
+
+        self.assertEqual((user_name, resource_type, len(resource_uid)), ('johnDoe', 'files', RESOURCE_UID_LENGTH))
+
+    def test_created_resources_routed_with_new_uids(self):
+        self.client.post('/secure-url', data={'url_route': 'https://www.google.pl/'}, **{'HTTP_USER_AGENT': 'Mozilla/5.0'})
+        self.client.post(
+            '/api/secure-resource', data={'url_route': 'https://www.bing.com/'},
+            **{'HTTP_USER_AGENT': 'Mozilla/5.0', 'HTTP_HOST': 'localhost'}
+        )
+
+        resource_routes = list(SecuredUrl.objects.order_by('id').values_list('resource_route', flat=True))
+        self.assertEqual(len(resource_routes), 2)
+        for resource_route in resource_routes:
+            user_name, resource_type, resource_uid = resource_route.split('/')
+            self.assertEqual((user_name, resource_type), ('johnDoe', 'urls'))
+            self.assertRegex(resource_uid, RESOURCE_UID_PATTERN)
+        self.assertLess(resource_routes[0], resource_routes[1])
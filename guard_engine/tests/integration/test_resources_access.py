@@ -6,6 +6,7 @@ from django.test import TestCase
 from django.contrib.auth.models import User
 from django.utils import timezone
 
+from guard_engine.expiry import purge_expired
 from guard_engine.models import SecuredUrl, SecuredFile
 
 
@@ -73,8 +74,36 @@ class ResourcesTestCase(TestCase):
         secured_file_response = self.client.get('/' + self.secured_file.resource_route)
 
         self.assertEqual(secured_file_response.status_code, 404)
+        self.assertTrue(SecuredFile.objects.filter(id=self.secured_file.id).exists())
+
+        purge_report = purge_expired()
+
+        self.assertEqual(purge_report['files'], 1)
+        self.assertEqual(purge_report['bytes'], self.secured_file.file_size)
+        self.assertFalse(SecuredFile.objects.filter(id=self.secured_file.id).exists())
         try:
             with open('../../../media/johnDoe/test_file.txt') as test_file:
                 self.assertTrue(False, msg="Deleted file still exists")
         except FileNotFoundError:
             self.assertTrue(True)
+
+    def test_expired_resources_purged_in_batches(self):
+        self.secured_url.expire_ts -= datetime.timedelta(days=1, minutes=30)
+        self.secured_url.save()
+        for resource_uid in range(4):
+            SecuredUrl.objects.create(
+                user=self.created_user,
+                resource_route="{user_name}/urls/{resource_uid}".format(
+                    user_name=self.created_user.username,
+                    resource_uid=resource_uid
+                ),
+                password="verySecretPasswordUrl",
+                creation_date=self.secured_url.creation_date,
+                expire_ts=self.secured_url.expire_ts,
+                url_route='https://www.google.pl/'
+            )
+
+        purge_report = purge_expired(batch_size=2)
+
+        self.assertEqual(purge_report, {'urls': 5, 'files': 0, 'bytes': 0, 'upload_sessions': 0})
+        self.assertTrue(SecuredFile.objects.filter(id=self.secured_file.id).exists())
@@ -0,0 +1,79 @@
+import datetime
+
+from django.test import TestCase
+from django.contrib.auth.models import User
+from django.utils import timezone
+
+from guard_engine.expiry import purge_expired
+from guard_engine.models import SecuredUrl, DailyResourceStats
+
+
+class ResourcesDetailsApiTestCase(TestCase):
+
+    def setUp(self) -> None:
+        self.created_user = User.objects.create_superuser(username='admin', email='admin@mysite.com', password='testPassword123')
+        self.client.login(username='admin', password='testPassword123')
+
+        self.creation_ts = timezone.now()
+        self.secured_urls = [
+            SecuredUrl.objects.create(
+                user=self.created_user,
+                resource_route="{user_name}/urls/{resource_uid}".format(
+                    user_name=self.created_user.username,
+                    resource_uid=resource_uid
+                ),
+                password="verySecretPasswordUrl",
+                creation_date=(self.creation_ts - datetime.timedelta(days=days_ago)).date(),
+                expire_ts=self.creation_ts + datetime.timedelta(days=1),
+                latest_user_agent='Mozilla/5.0',
+                url_route='https://www.google.pl/'
+            )
+            for resource_uid, days_ago in enumerate((0, 0, 2))
+        ]
+
+    def tearDown(self):
+        self.created_user.delete()
+
+    def check_password(self, secured_url):
+        user_name, resource_type, resource_uid = secured_url.resource_route.split('/')
+        return self.client.post(
+            '/api/check-resource-password',
+            data={
+                'user_name': user_name,
+                'resource_type': resource_type,
+                'resource_uid': resource_uid,
+                'password': secured_url.password
+            },
+            **{'HTTP_USER_AGENT': 'Mozilla/5.0'}
+        )
+
+    def test_creations_and_first_visits_rolled_up(self):
+        for secured_url in self.secured_urls[:2]:
+            self.check_password(secured_url)
+        self.check_password(self.secured_urls[0])
+
+        daily_stats = DailyResourceStats.objects.get(date=self.creation_ts.date())
+
+        self.assertEqual(daily_stats.links_created, 2)
+        self.assertEqual(daily_stats.links_visited, 2)
+        self.assertEqual(daily_stats.files_visited, 0)
+
+    def test_stats_survive_purge_and_filter_by_range(self):
+        for secured_url in self.secured_urls:
+            self.check_password(secured_url)
+        SecuredUrl.objects.update(expire_ts=self.creation_ts - datetime.timedelta(minutes=30))
+        purge_expired()
+
+        with self.assertNumQueries(3):
+            details_response = self.client.get('/api/resources-details')
+
+        self.assertEqual(details_response.status_code, 200)
+        self.assertEqual(details_response.json(), {
+            (self.creation_ts - datetime.timedelta(days=2)).strftime('%Y-%m-%d'): {'files': 0, 'links': 1},
+            self.creation_ts.strftime('%Y-%m-%d'): {'files': 0, 'links': 2}
+        })
+
+        ranged_response = self.client.get('/api/resources-details', {'from': self.creation_ts.strftime('%Y-%m-%d')})
+        self.assertEqual(list(ranged_response.json()), [self.creation_ts.strftime('%Y-%m-%d')])
+
+        self.assertEqual(self.client.get('/api/resources-details', {'from': 'yesterday'}).status_code, 400)
@@ -0,0 +1,78 @@
+import datetime
+
+from django.conf import settings
+from django.core.cache import caches
+from django.test import TestCase, override_settings
+from django.contrib.auth.models import User
+from django.utils import timezone
+
+from guard_engine.models import SecuredUrl
+from guard_engine.route_cache import route_cache
+from guard_engine.visits import record_single_visit
+
+
+class RouteCacheTestCase(TestCase):
+
+    def setUp(self) -> None:
+        caches[settings.ROUTE_CACHE_ALIAS].clear()
+        self.created_user = User.objects.create_user(username='johnDoe', email='john@doe.com', password='testPassword123')
+        self.client.login(username='johnDoe', password='testPassword123')
+
+        creation_ts = timezone.now()
+        self.secured_url = SecuredUrl.objects.create(
+            user=self.created_user,
+            resource_route="{user_name}/urls/1234567".format(user_name=self.created_user.username),
+            password="verySecretPasswordUrl",
+            creation_date=creation_ts.date(),
+            expire_ts=creation_ts + datetime.timedelta(days=1),
+            latest_user_agent='Mozilla/5.0',
+            url_route='https://www.google.pl/'
+        )
+
+    def tearDown(self):
+        self.created_user.delete()
+
+    def test_cached_route_resolved_without_query(self):
+        route_cache.get(SecuredUrl, 'johnDoe', self.secured_url.resource_route)
+        hits = route_cache.hits
+
+        with self.assertNumQueries(0):
+            resource = route_cache.get(SecuredUrl, 'johnDoe', self.secured_url.resource_route)
+
+        self.assertEqual(resource.id, self.secured_url.id)
+        self.assertEqual(route_cache.hits, hits + 1)
+
+    def test_unknown_route_cached_until_created(self):
+        missing_route = 'johnDoe/urls/7654321'
+        with self.assertRaises(SecuredUrl.DoesNotExist):
+            route_cache.get(SecuredUrl, 'johnDoe', missing_route)
+        with self.assertNumQueries(0), self.assertRaises(SecuredUrl.DoesNotExist):
+            route_cache.get(SecuredUrl, 'johnDoe', missing_route)
+
+        self.secured_url.resource_route = missing_route
+        self.secured_url.save()
+
+        self.assertEqual(route_cache.get(SecuredUrl, 'johnDoe', missing_route).id, self.secured_url.id)
+
+    def test_deleted_route_invalidated(self):
+        self.assertEqual(self.client.get('/' + self.secured_url.resource_route).status_code, 200)
+
+        self.secured_url.delete()
+
+        self.assertEqual(self.client.get('/' + self.secured_url.resource_route).status_code, 404)
+
+    @override_settings(ROUTE_CACHE_LOCAL_TTL=0)
+    def test_process_local_cache_uses_local_ttl(self):
+        route_cache.get(SecuredUrl, 'johnDoe', self.secured_url.resource_route)
+
+        with self.assertNumQueries(1):
+            route_cache.get(SecuredUrl, 'johnDoe', self.secured_url.resource_route)
+
+    def test_visited_route_cached_with_fresh_counter(self):
+        resource = route_cache.get(SecuredUrl, 'johnDoe', self.secured_url.resource_route)
+        record_single_visit(resource, 'Mozilla/5.0')
+
+        resource = route_cache.get(SecuredUrl, 'johnDoe', self.secured_url.resource_route)
+        self.assertEqual(resource.visit_counter, 1)
+        with self.assertNumQueries(1):
+            record_single_visit(route_cache.get(SecuredUrl, 'johnDoe', self.secured_url.resource_route), 'Mozilla/5.0')
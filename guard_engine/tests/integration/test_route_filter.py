@@ -0,0 +1,87 @@
+import datetime
+import tempfile
+
+from django.conf import settings
+from django.core.cache import caches
+from django.test import TestCase, override_settings
+from django.contrib.auth.models import User
+from django.utils import timezone
+
+from guard_engine.models import SecuredUrl
+from guard_engine.route_cache import route_cache
+from guard_engine.route_filter import BloomFilter, route_filter
+
+SHARED_ROUTE_CACHES = dict(settings.CACHES, routes={
+    'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache',
+    'LOCATION': tempfile.gettempdir() + '/guard_engine_route_cache',
+})
+
+
+@override_settings(ROUTE_FILTER_ENABLED=1, ROUTE_FILTER_CAPACITY=1000, CACHES=SHARED_ROUTE_CACHES)
+class RouteFilterTestCase(TestCase):
+
+    def setUp(self) -> None:
+        caches[settings.ROUTE_CACHE_ALIAS].clear()
+        self.created_user = User.objects.create_user(username='johnDoe', email='john@doe.com', password='testPassword123')
+        self.secured_url = self.create_secured_url('1234567')
+        route_filter.build()
+
+    def tearDown(self):
+        route_filter.bloom_filter = None
+        self.created_user.delete()
+
+    def create_secured_url(self, resource_uid):
+        creation_ts = timezone.now()
+        return SecuredUrl.objects.create(
+            user=self.created_user,
+            resource_route="{user_name}/urls/{uid}".format(user_name=self.created_user.username, uid=resource_uid),
+            password="verySecretPasswordUrl",
+            creation_date=creation_ts.date(),
+            expire_ts=creation_ts + datetime.timedelta(days=1),
+            latest_user_agent='Mozilla/5.0',
+            url_route='https://www.google.pl/'
+        )
+
+    def test_unknown_route_rejected_without_query(self):
+        rejected = route_filter.get_stats()['rejected']
+
+        with self.assertNumQueries(0):
+            with self.assertRaises(SecuredUrl.DoesNotExist):
+                route_cache.get(SecuredUrl, 'johnDoe', 'johnDoe/urls/7654321')
+
+        self.assertEqual(route_filter.get_stats()['rejected'], rejected + 1)
+
+    def test_unknown_route_not_rejected_with_local_cache(self):
+        with override_settings(CACHES=dict(settings.CACHES, routes={
+            'BACKEND': 'django.core.cache.backends.locmem.LocMemCache', 'LOCATION': 'routes'
+        })):
+            self.assertTrue(route_filter.might_exist('johnDoe/urls/7654321'))
+
+    def test_known_routes_resolved(self):
+        created_url = self.create_secured_url('2345678')
+
+        self.assertEqual(route_cache.get(SecuredUrl, 'johnDoe', self.secured_url.resource_route), self.secured_url)
+        self.assertEqual(route_cache.get(SecuredUrl, 'johnDoe', created_url.resource_route), created_url)
+
+    def test_route_created_by_other_process_resolved_until_rebuild(self):
+        created_url = self.create_secured_url('2345678')
+        route_filter.bloom_filter = BloomFilter(1000, 0.01, 1048576)
+
+        self.assertEqual(route_cache.get(SecuredUrl, 'johnDoe', created_url.resource_route), created_url)
+
+    def test_filter_reported(self):
+        route_filter_stats = route_filter.get_stats()
+
+        self.assertEqual(route_filter_stats['items'], 1)
+        self.assertGreater(route_filter_stats['memory_bytes'], 0)
+        self.assertLess(route_filter_stats['estimated_error_rate'], settings.ROUTE_FILTER_ERROR_RATE)
+
+    def test_false_positive_rate_follows_configuration(self):
+        bloom_filter = BloomFilter(1000, 0.01, 1048576)
+        for i in range(1000):
+            bloom_filter.add('johnDoe/urls/{}'.format(i))
+
+        false_positives = sum('janeDoe/urls/{}'.format(i) in bloom_filter for i in range(10000))
+
+        self.assertTrue(all('johnDoe/urls/{}'.format(i) in bloom_filter for i in range(1000)))
+        self.assertLess(false_positives / 10000, 0.02)
@@ -0,0 +1,130 @@
+import datetime
+import io
+
+import mock
+
+from django.core.management import call_command
+from django.test import TestCase, override_settings
+from django.contrib.auth.models import User
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.files.storage import default_storage
+from django.utils import timezone
+from dropbox import files as dropbox_files
+
+from guard_engine.expiry import purge_expired
+from guard_engine.models import SecuredFile, StorageDeadLetter, StorageJob
+from guard_engine.storage import (
+    DropboxDeletionBackend, FileSystemDeletionBackend, StorageDeletionFailed, storage_deletions
+)
+
+
+class StorageDeletionTestCase(TestCase):
+
+    def setUp(self) -> None:
+        self.created_user = User.objects.create_user(username='janeDoe', email='jane@doe.com', password='testPassword123')
+
+        creation_ts = timezone.now()
+        self.secured_files = [
+            SecuredFile.objects.create(
+                user=self.created_user,
+                resource_route="{user_name}/files/{resource_uid}".format(
+                    user_name=self.created_user.username,
+                    resource_uid=resource_uid
+                ),
+                password="verySecretPasswordFile",
+                creation_date=creation_ts.date(),
+                expire_ts=creation_ts - datetime.timedelta(minutes=30),
+                latest_user_agent='Mozilla/5.0',
+                persisted_file=SimpleUploadedFile('deleted_file.txt', b'test content')
+            )
+            for resource_uid in range(3)
+        ]
+
+    def tearDown(self):
+        self.created_user.delete()
+
+    def test_purged_files_deleted_in_one_batch(self):
+        with mock.patch.object(
+                FileSystemDeletionBackend, 'delete', autospec=True, side_effect=FileSystemDeletionBackend.delete
+        ) as backend_delete:
+            purge_expired()
+
+        backend_delete.assert_called_once()
+        self.assertCountEqual(
+            backend_delete.call_args[0][1], [secured_file.persisted_file.name for secured_file in self.secured_files]
+        )
+        for secured_file in self.secured_files:
+            self.assertFalse(default_storage.exists(secured_file.persisted_file.name))
+
+    @override_settings(STORAGE_QUEUE_MODE='sync')
+    def test_failed_sync_deletion_dead_lettered(self):
+        with mock.patch.object(FileSystemDeletionBackend, 'delete', side_effect=StorageDeletionFailed(['failed.txt'])):
+            with self.assertLogs('guard_engine.storage_jobs', 'ERROR'):
+                purge_expired()
+
+        self.assertFalse(SecuredFile.objects.exists())
+        dead_letter = StorageDeadLetter.objects.get()
+        self.assertEqual(dead_letter.kind, StorageJob.DELETE)
+        self.assertIn('failed.txt', dead_letter.last_error)
+        for secured_file in self.secured_files:
+            default_storage.delete(secured_file.persisted_file.name)
+
+    def test_purge_daemon_survives_errors(self):
+        with mock.patch('guard_engine.management.commands.purge_expired.purge_expired', side_effect=[
+            RuntimeError(), {'urls': 0, 'files': 3, 'upload_sessions': 0, 'bytes': 36}
+        ]) as purge, mock.patch('time.sleep', side_effect=[None, KeyboardInterrupt()]):
+            with self.assertLogs('guard_engine.management.commands.purge_expired', 'ERROR'):
+                call_command('purge_expired', daemon=True, interval=0, stdout=io.StringIO())
+
+        self.assertEqual(purge.call_count, 2)
+
+    def test_deferred_deletions_discarded_on_error(self):
+        secured_file = self.secured_files[0]
+        with mock.patch.object(FileSystemDeletionBackend, 'delete') as backend_delete:
+            with self.assertRaises(RuntimeError):
+                with storage_deletions.deferred():
+                    storage_deletions.delete(secured_file.persisted_file.name)
+                    raise RuntimeError()
+
+        backend_delete.assert_not_called()
+        self.assertIsNone(storage_deletions.pending)
+        self.assertTrue(default_storage.exists(secured_file.persisted_file.name))
+        secured_file.delete()
+
+    @override_settings(DROPBOX_ROOT_PATH='/guard/', DROPBOX_DELETE_CHECK_INTERVAL=0, DROPBOX_DELETE_CHECK_TIMEOUT=60)
+    def test_dropbox_batch_job_checked_for_failures(self):
+        dropbox_client = mock.Mock()
+        dropbox_client.files_delete_batch.return_value = dropbox_files.DeleteBatchLaunch.async_job_id('batchJob')
+        dropbox_client.files_delete_batch_check.side_effect = [
+            dropbox_files.DeleteBatchJobStatus('in_progress'),
+            dropbox_files.DeleteBatchJobStatus.complete(dropbox_files.DeleteBatchResult(entries=[
+                dropbox_files.DeleteBatchResultEntry.success(dropbox_files.DeleteBatchResultData()),
+                dropbox_files.DeleteBatchResultEntry.failure(
+                    dropbox_files.DeleteError.path_lookup(dropbox_files.LookupError.not_found)
+                ),
+                dropbox_files.DeleteBatchResultEntry.failure(dropbox_files.DeleteError.too_many_write_operations)
+            ]))
+        ]
+
+        with mock.patch.object(DropboxDeletionBackend, 'get_client', return_value=dropbox_client):
+            with self.assertRaises(StorageDeletionFailed) as deletion_failure:
+                DropboxDeletionBackend().delete(['deleted.txt', 'missing.txt', 'throttled.txt'])
+
+        self.assertEqual(deletion_failure.exception.names, ['throttled.txt'])
+        self.assertEqual(dropbox_client.files_delete_batch.call_args[0][0][0].path, '/guard/deleted.txt')
+        dropbox_client.files_delete_batch_check.assert_called_with('batchJob')
+        self.assertEqual(dropbox_client.files_delete_batch_check.call_count, 2)
+
+    @override_settings(DROPBOX_ROOT_PATH='/guard/', DROPBOX_DELETE_CHECK_INTERVAL=0, DROPBOX_DELETE_CHECK_TIMEOUT=60)
+    def test_dropbox_failed_batch_job_raised(self):
+        dropbox_client = mock.Mock()
+        dropbox_client.files_delete_batch.return_value = dropbox_files.DeleteBatchLaunch.async_job_id('batchJob')
+        dropbox_client.files_delete_batch_check.return_value = dropbox_files.DeleteBatchJobStatus.failed(
+            dropbox_files.DeleteBatchError.too_many_write_operations
+        )
+
+        with mock.patch.object(DropboxDeletionBackend, 'get_client', return_value=dropbox_client):
+            with self.assertRaises(StorageDeletionFailed) as deletion_failure:
+                DropboxDeletionBackend().delete(['deleted.txt'])
+
+        self.assertEqual(deletion_failure.exception.names, ['deleted.txt'])
@@ -0,0 +1,109 @@
+import datetime
+import mock
+import socket
+import tempfile
+
+from django.core.files.storage import default_storage
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.test import TestCase, override_settings
+from django.contrib.auth.models import User
+from django.utils import timezone
+
+from guard_engine.models import SecuredFile, StorageDeadLetter, StorageJob
+from guard_engine.storage import staging_storage
+from guard_engine.storage_jobs import enqueue_storage_job, process_storage_jobs, run_storage_job_with_retries
+
+
+@override_settings(STORAGE_QUEUE_MODE='database', STORAGE_STAGING_ROOT=tempfile.mkdtemp(), STORAGE_JOB_MAX_ATTEMPTS=2)
+class StorageJobsTestCase(TestCase):
+
+    def setUp(self) -> None:
+        staging_storage._setup()
+        self.created_user = User.objects.create_user(username='johnDoe', email='john@doe.com', password='testPassword123')
+        self.client.login(username='johnDoe', password='testPassword123')
+
+    def tearDown(self):
+        self.created_user.delete()
+        process_storage_jobs(batch_size=10)
+
+    def test_upload_transferred_and_deleted_by_worker(self):
+        self.client.post(
+            '/secure-file',
+            data={'persisted_file': SimpleUploadedFile('queued_file.txt', b'queued content')},
+            **{'HTTP_USER_AGENT': 'Mozilla/5.0'}
+        )
+        secured_file = SecuredFile.objects.get()
+        file_name = secured_file.persisted_file.name
+
+        self.assertTrue(staging_storage.exists(file_name))
+        self.assertFalse(default_storage.exists(file_name))
+        self.assertEqual(list(StorageJob.objects.values_list('kind', flat=True)), [StorageJob.TRANSFER])
+
+        self.assertEqual(process_storage_jobs(batch_size=10), 1)
+
+        self.assertFalse(staging_storage.exists(file_name))
+        self.assertTrue(default_storage.exists(file_name))
+
+        secured_file.delete()
+        self.assertTrue(default_storage.exists(file_name))
+
+        process_storage_jobs(batch_size=10)
+        self.assertFalse(default_storage.exists(file_name))
+        self.assertFalse(StorageJob.objects.exists())
+
+    def test_transfers_run_on_staging_host_only(self):
+        self.client.post(
+            '/secure-file',
+            data={'persisted_file': SimpleUploadedFile('queued_file.txt', b'queued content')},
+            **{'HTTP_USER_AGENT': 'Mozilla/5.0'}
+        )
+        self.assertEqual(StorageJob.objects.get().staging_host, socket.gethostname())
+
+        StorageJob.objects.update(staging_host='other-host')
+        self.assertEqual(process_storage_jobs(batch_size=10), 0)
+
+        StorageJob.objects.update(staging_host=socket.gethostname())
+        self.assertEqual(process_storage_jobs(batch_size=10), 1)
+
+    @override_settings(STORAGE_STAGING_SHARED=1)
+    def test_shared_staging_transfers_run_on_any_host(self):
+        enqueue_storage_job(StorageJob.TRANSFER, {'name': 'media/johnDoe/missing.txt'})
+
+        self.assertEqual(StorageJob.objects.get().staging_host, '')
+
+    def test_jobs_leased_while_running(self):
+        enqueue_storage_job(StorageJob.DELETE, {'names': ['media/johnDoe/missing.txt']})
+
+        def assert_leased(kind, payload):
+            self.assertGreater(StorageJob.objects.get().run_after, timezone.now() + datetime.timedelta(seconds=60))
+
+        with mock.patch('guard_engine.storage_jobs.run_storage_job', side_effect=assert_leased):
+            self.assertEqual(process_storage_jobs(batch_size=10), 1)
+        self.assertFalse(StorageJob.objects.exists())
+
+    def test_failed_job_retried_with_backoff_then_dead_lettered(self):
+        enqueue_storage_job(StorageJob.DELETE, {'names': ['media/johnDoe/missing.txt']})
+
+        with mock.patch('guard_engine.storage_jobs.delete_files', side_effect=IOError('storage unavailable')):
+            process_storage_jobs(batch_size=10)
+            storage_job = StorageJob.objects.get()
+            self.assertEqual(storage_job.attempts, 1)
+            self.assertGreater(storage_job.run_after, timezone.now())
+
+            self.assertEqual(process_storage_jobs(batch_size=10), 0)
+
+            StorageJob.objects.update(run_after=timezone.now() - datetime.timedelta(seconds=1))
+            process_storage_jobs(batch_size=10)
+
+        self.assertFalse(StorageJob.objects.exists())
+        dead_letter = StorageDeadLetter.objects.get()
+        self.assertEqual(dead_letter.attempts, 2)
+        self.assertIn('storage unavailable', dead_letter.last_error)
+
+    @override_settings(STORAGE_JOB_BACKOFF=0)
+    def test_thread_job_dead_lettered_after_retries(self):
+        with mock.patch('guard_engine.storage_jobs.delete_files', side_effect=IOError('storage unavailable')) as delete_files:
+            run_storage_job_with_retries(StorageJob.DELETE, {'names': ['media/johnDoe/missing.txt']})
+
+        self.assertEqual(delete_files.call_count, 2)
+        self.assertEqual(StorageDeadLetter.objects.get().kind, StorageJob.DELETE)
@@ -0,0 +1,140 @@
+import datetime
+import tempfile
+
+from django.conf import settings
+from django.core.cache import caches
+from django.test import TestCase, override_settings
+from django.contrib.auth.models import User
+from django.utils import timezone
+
+from guard_engine.bulk import bulk_create_resources
+from guard_engine.models import SecuredFile, SecuredUrl
+
+SHARED_DASHBOARD_CACHES = dict(settings.CACHES, dashboard={
+    'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache',
+    'LOCATION': tempfile.gettempdir() + '/guard_engine_dashboard_cache',
+})
+
+
+@override_settings(DASHBOARD_PAGE_SIZE=3)
+class UserDashboardTestCase(TestCase):
+
+    def setUp(self) -> None:
+        caches[settings.DASHBOARD_CACHE_ALIAS].clear()
+        self.created_user = User.objects.create_user(username='johnDoe', email='john@doe.com', password='testPassword123')
+        self.client.login(username='johnDoe', password='testPassword123')
+        self.creation_ts = timezone.now()
+
+    def tearDown(self):
+        self.created_user.delete()
+
+    def create_urls(self, urls_number, expire_ts=None):
+        return [
+            SecuredUrl.objects.create(
+                user=self.created_user,
+                resource_route="{user_name}/urls/{resource_uid}".format(
+                    user_name=self.created_user.username, resource_uid=1000000 + SecuredUrl.objects.count()
+                ),
+                password="verySecretPasswordUrl",
+                creation_date=self.creation_ts.date(),
+                expire_ts=expire_ts or self.creation_ts + datetime.timedelta(days=1),
+                latest_user_agent='Mozilla/5.0',
+                url_route='https://www.google.pl/'
+            )
+            for _ in range(urls_number)
+        ]
+
+    def create_files(self, files_number):
+        return [
+            SecuredFile.objects.create(
+                user=self.created_user,
+                resource_route="{user_name}/files/{resource_uid}".format(
+                    user_name=self.created_user.username, resource_uid=2000000 + SecuredFile.objects.count()
+                ),
+                password="verySecretPasswordFile",
+                creation_date=self.creation_ts.date(),
+                expire_ts=self.creation_ts + datetime.timedelta(days=1),
+                latest_user_agent='Mozilla/5.0',
+                persisted_file='media/johnDoe/dashboard_file.txt',
+                file_size=10
+            )
+            for _ in range(files_number)
+        ]
+
+    def test_urls_paginated_by_expire_ts_and_id(self):
+        secured_urls = self.create_urls(4, expire_ts=self.creation_ts + datetime.timedelta(hours=2))
+        secured_urls.insert(0, self.create_urls(1, expire_ts=self.creation_ts + datetime.timedelta(hours=1))[0])
+
+        first_page = self.client.get('/')
+        next_page_url = first_page.context['urls'].split('href="')[-1].split('"')[0]
+        second_page = self.client.get('/' + next_page_url)
+
+        for secured_url in secured_urls[:3]:
+            self.assertContains(first_page, secured_url.resource_route)
+            self.assertNotContains(second_page, secured_url.resource_route)
+        for secured_url in secured_urls[3:]:
+            self.assertNotContains(first_page, secured_url.resource_route)
+            self.assertContains(second_page, secured_url.resource_route)
+        self.assertNotContains(second_page, 'Next page')
+
+    def test_next_page_urls_keep_other_list_cursor(self):
+        secured_urls = self.create_urls(4)
+        secured_files = self.create_files(4)
+
+        first_page = self.client.get('/')
+        files_page_url = first_page.context['files'].split('href="')[-1].split('"')[0].replace('&amp;', '&')
+        files_page = self.client.get('/' + files_page_url)
+        urls_page_url = files_page.context['urls'].split('href="')[-1].split('"')[0].replace('&amp;', '&')
+        last_page = self.client.get('/' + urls_page_url)
+
+        self.assertContains(files_page, secured_files[3].resource_route)
+        self.assertContains(last_page, secured_files[3].resource_route)
+        self.assertContains(last_page, secured_urls[3].resource_route)
+        self.assertNotContains(last_page, secured_urls[0].resource_route)
+        self.assertNotContains(last_page, secured_files[0].resource_route)
+
+    def test_lists_not_cached_in_process_memory(self):
+        self.create_urls(1)
+        self.client.get('/')
+        with self.assertNumQueries(5):
+            self.client.get('/')
+
+    def test_dashboard_queries_independent_of_resources_number(self):
+        self.create_urls(2)
+        self.client.get('/')
+        caches[settings.DASHBOARD_CACHE_ALIAS].clear()
+        with self.assertNumQueries(5):
+            self.client.get('/')
+
+        self.create_urls(28)
+        caches[settings.DASHBOARD_CACHE_ALIAS].clear()
+        with self.assertNumQueries(5):
+            self.client.get('/')
+
+    @override_settings(CACHES=SHARED_DASHBOARD_CACHES)
+    def test_cached_lists_invalidated_on_changes(self):
+        caches[settings.DASHBOARD_CACHE_ALIAS].clear()
+        secured_url = self.create_urls(1)[0]
+        self.client.get('/')
+        with self.assertNumQueries(3):
+            cached_response = self.client.get('/')
+        self.assertContains(cached_response, secured_url.resource_route)
+
+        secured_url.delete()
+        self.assertNotContains(self.client.get('/'), secured_url.resource_route)
+
+        bulk_url = bulk_create_resources(SecuredUrl, [
+            SecuredUrl(
+                user=self.created_user,
+                resource_route='johnDoe/urls/7654321',
+                password="verySecretPasswordUrl",
+                creation_date=self.creation_ts.date(),
+                expire_ts=self.creation_ts + datetime.timedelta(days=1),
+                latest_user_agent='Mozilla/5.0',
+                url_route='https://www.google.pl/'
+            )
+        ])[0]
+        self.assertContains(self.client.get('/'), bulk_url.resource_route)
+
+    def test_invalid_cursor_rejected(self):
+        self.assertEqual(self.client.get('/?urls_cursor=notACursor').status_code, 400)
@@ -0,0 +1,113 @@
+import datetime
+
+from django.conf import settings
+from django.test import TestCase
+from django.contrib.auth.models import User
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.utils import timezone
+
+from guard_engine.expiry import purge_expired
+from guard_engine.models import SecuredUrl, SecuredFile, UserQuota
+from guard_engine.quotas import reconcile_quotas
+
+
+class UserQuotaTestCase(TestCase):
+
+    def setUp(self) -> None:
+        self.created_user = User.objects.create_user(username='johnDoe', email='john@doe.com', password='testPassword123')
+        self.client.login(username='johnDoe', password='testPassword123')
+
+    def tearDown(self):
+        self.created_user.delete()
+
+    def get_quota(self):
+        return UserQuota.objects.get(user=self.created_user)
+
+    def test_quota_created_with_user(self):
+        quota = self.get_quota()
+
+        self.assertEqual(quota.links_number, 0)
+        self.assertEqual(quota.files_size, 0)
+
+    def test_quota_follows_created_and_purged_resources(self):
+        self.client.post('/secure-url', data={'url_route': 'https://www.google.pl/'}, **{'HTTP_USER_AGENT': 'Mozilla/5.0'})
+        self.client.post(
+            '/secure-file',
+            data={'persisted_file': SimpleUploadedFile('quota_file.txt', b'quota content')},
+            **{'HTTP_USER_AGENT': 'Mozilla/5.0'}
+        )
+
+        quota = self.get_quota()
+        self.assertEqual(quota.links_number, 1)
+        self.assertEqual(quota.files_size, len(b'quota content'))
+        self.assertEqual(quota.files_number, 1)
+
+        SecuredUrl.objects.update(expire_ts=timezone.now() - datetime.timedelta(minutes=30))
+        SecuredFile.objects.update(expire_ts=timezone.now() - datetime.timedelta(minutes=30))
+        purge_expired()
+
+        quota = self.get_quota()
+        self.assertEqual(quota.links_number, 0)
+        self.assertEqual(quota.files_size, 0)
+        self.assertEqual(quota.files_number, 0)
+
+    def test_links_limit_checked_against_quota(self):
+        UserQuota.objects.filter(user=self.created_user).update(links_number=settings.LINKS_LIMIT)
+
+        secure_url_response = self.client.post(
+            '/secure-url', data={'url_route': 'https://www.google.pl/'}, **{'HTTP_USER_AGENT': 'Mozilla/5.0'}
+        )
+
+        self.assertEqual(secure_url_response.status_code, 302)
+        self.assertEqual(secure_url_response.url, '/secure-file')
+        self.assertFalse(SecuredUrl.objects.exists())
+
+    def create_expired_urls(self, urls_number):
+        for url_number in range(urls_number):
+            SecuredUrl.objects.create(
+                user=self.created_user,
+                resource_route='johnDoe/urls/{:07d}'.format(url_number),
+                password='verySecretPasswordUrl',
+                creation_date=timezone.now().date(),
+                expire_ts=timezone.now() - datetime.timedelta(minutes=30),
+                latest_user_agent='Mozilla/5.0',
+                url_route='https://www.google.pl/'
+            )
+
+    def test_expired_links_purged_when_limit_reached(self):
+        self.create_expired_urls(settings.LINKS_LIMIT)
+        self.assertEqual(self.get_quota().links_number, settings.LINKS_LIMIT)
+
+        self.assertEqual(self.client.get('/secure-url').status_code, 200)
+        secure_url_response = self.client.post(
+            '/secure-url', data={'url_route': 'https://www.google.pl/'}, **{'HTTP_USER_AGENT': 'Mozilla/5.0'}
+        )
+
+        self.assertEqual(secure_url_response.status_code, 302)
+        self.assertNotEqual(secure_url_response.url, '/secure-file')
+        self.assertEqual(SecuredUrl.objects.count(), 1)
+        self.assertEqual(self.get_quota().links_number, 1)
+
+    def test_live_links_limit_kept(self):
+        self.create_expired_urls(settings.LINKS_LIMIT)
+        SecuredUrl.objects.update(expire_ts=timezone.now() + datetime.timedelta(days=1))
+
+        self.assertEqual(self.client.get('/secure-url').status_code, 302)
+        secure_url_response = self.client.post(
+            '/secure-url', data={'url_route': 'https://www.google.pl/'}, **{'HTTP_USER_AGENT': 'Mozilla/5.0'}
+        )
+        self.assertEqual(secure_url_response.url, '/secure-file')
+        self.assertEqual(SecuredUrl.objects.count(), settings.LINKS_LIMIT)
+
+    def test_reconcile_repairs_drifted_quota(self):
+        self.client.post('/secure-url', data={'url_route': 'https://www.google.pl/'}, **{'HTTP_USER_AGENT': 'Mozilla/5.0'})
+        UserQuota.objects.filter(user=self.created_user).update(links_number=7, files_size=1024, files_number=3)
+
+        repaired_quotas = reconcile_quotas()
+
+        self.assertEqual([quota.user_id for quota in repaired_quotas], [self.created_user.id])
+        quota = self.get_quota()
+        self.assertEqual(quota.links_number, 1)
+        self.assertEqual(quota.files_size, 0)
+        self.assertEqual(quota.files_number, 0)
+        self.assertEqual(reconcile_quotas(), [])
@@ -0,0 +1,96 @@
+import datetime
+import mock
+
+from django.db import DatabaseError
+from django.test import TestCase, override_settings
+from django.contrib.auth.models import User
+from django.utils import timezone
+
+from guard_engine.models import SecuredUrl, DailyResourceStats
+from guard_engine.visits import record_visit, visit_buffer
+
+
+class VisitsRecordingTestCase(TestCase):
+
+    def setUp(self) -> None:
+        self.created_user = User.objects.create_user(username='johnDoe', email='john@doe.com', password='testPassword123')
+
+        creation_ts = timezone.now()
+        self.secured_urls = [
+            SecuredUrl.objects.create(
+                user=self.created_user,
+                resource_route="{user_name}/urls/{resource_uid}".format(
+                    user_name=self.created_user.username,
+                    resource_uid=resource_uid
+                ),
+                password="verySecretPasswordUrl",
+                creation_date=creation_ts.date(),
+                expire_ts=creation_ts + datetime.timedelta(days=1),
+                latest_user_agent='Mozilla/5.0',
+                url_route='https://www.google.pl/'
+            )
+            for resource_uid in range(2)
+        ]
+
+    def tearDown(self):
+        self.created_user.delete()
+
+    def get_links_visited(self):
+        return DailyResourceStats.objects.get(date=self.secured_urls[0].creation_date).links_visited
+
+    def test_visit_updates_only_counter_and_user_agent(self):
+        secured_url = self.secured_urls[0]
+        record_visit(secured_url, 'FirstAgent/1.0')
+        secured_url.refresh_from_db()
+        with self.assertNumQueries(1):
+            record_visit(secured_url, 'SecondAgent/1.0')
+
+        secured_url.refresh_from_db()
+        self.assertEqual(secured_url.visit_counter, 2)
+        self.assertEqual(secured_url.latest_user_agent, 'SecondAgent/1.0')
+        self.assertEqual(self.get_links_visited(), 1)
+
+    @override_settings(VISIT_BUFFER_ENABLED=1, VISIT_BUFFER_SIZE=4, VISIT_BUFFER_FLUSH_INTERVAL=3600)
+    def test_buffered_visits_flushed_in_batch(self):
+        visit_buffer.flush()
+        first_url, second_url = self.secured_urls
+        for secured_url, user_agent in ((first_url, 'A/1'), (second_url, 'B/1'), (first_url, 'A/2')):
+            record_visit(secured_url, user_agent)
+
+        self.assertEqual(SecuredUrl.objects.filter(visit_counter__gt=0).count(), 0)
+
+        record_visit(first_url, 'A/3')
+
+        first_url.refresh_from_db()
+        second_url.refresh_from_db()
+        self.assertEqual((first_url.visit_counter, first_url.latest_user_agent), (3, 'A/3'))
+        self.assertEqual((second_url.visit_counter, second_url.latest_user_agent), (1, 'B/1'))
+        self.assertEqual(self.get_links_visited(), 2)
+
+    @override_settings(VISIT_BUFFER_ENABLED=1, VISIT_BUFFER_SIZE=100, VISIT_BUFFER_FLUSH_INTERVAL=3600)
+    def test_failed_flush_keeps_visits(self):
+        visit_buffer.flush()
+        first_url = self.secured_urls[0]
+        record_visit(first_url, 'A/1')
+        record_visit(first_url, 'A/2')
+
+        with mock.patch('guard_engine.visits.update_visits', side_effect=DatabaseError):
+            with self.assertLogs('guard_engine.visits', 'ERROR'):
+                visit_buffer.flush()
+        record_visit(first_url, 'A/3')
+        visit_buffer.flush()
+
+        first_url.refresh_from_db()
+        self.assertEqual((first_url.visit_counter, first_url.latest_user_agent), (3, 'A/3'))
+
+    @override_settings(VISIT_BUFFER_ENABLED=1, VISIT_BUFFER_SIZE=100, VISIT_BUFFER_FLUSH_INTERVAL=3600)
+    def test_buffered_visits_flushed_periodically(self):
+        visit_buffer.flush()
+        record_visit(self.secured_urls[0], 'A/1')
+
+        with mock.patch('guard_engine.visits.time.sleep', side_effect=[None, InterruptedError]):
+            with mock.patch('guard_engine.visits.close_old_connections'):
+                with self.assertRaises(InterruptedError):
+                    visit_buffer.flush_periodically()
+
+        self.assertEqual(SecuredUrl.objects.get(id=self.secured_urls[0].id).visit_counter, 1)
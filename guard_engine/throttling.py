@@ -0,0 +1,265 @@
+import asyncio
+import math
+import threading
+import time
+from functools import wraps
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.core.cache import caches
+from django.http import HttpResponse
+from django.utils.module_loading import import_string
+
+
+def refill_bucket(bucket, now, rate, capacity):
+    tokens, updated_ts = bucket or (capacity, now)
+    return min(capacity, tokens + (now - updated_ts) * rate)
+
+
+class LocalMemoryThrottleBackend:
+    """
+    Keeps buckets, failures and lockouts in the process memory. Limits are enforced per worker process.
+    """
+    blocking = False
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.buckets = {}
+        self.failures = {}
+        self.lockouts = {}
+
+    def prune(self, now):
+        self.buckets = {
+            key: (tokens, updated_ts) for key, (tokens, updated_ts) in self.buckets.items()
+            if now - updated_ts < settings.THROTTLE_LOCAL_KEEP_TIME
+        }
+        self.failures = {key: failure for key, failure in self.failures.items() if failure[1] > now}
+        self.lockouts = {key: locked_until for key, locked_until in self.lockouts.items() if locked_until > now}
+
+    def consume(self, key, rate, capacity, tokens=1):
+        now = time.time()
+        with self.lock:
+            if len(self.buckets) >= settings.THROTTLE_LOCAL_MAX_KEYS:
+                self.prune(now)
+
+            available_tokens = refill_bucket(self.buckets.get(key), now, rate, capacity)
+            if available_tokens < tokens:
+                self.buckets[key] = (available_tokens, now)
+                return (tokens - available_tokens) / rate
+
+            self.buckets[key] = (available_tokens - tokens, now)
+            return 0
+
+    def get_wait(self, key, rate, capacity):
+        with self.lock:
+            available_tokens = refill_bucket(self.buckets.get(key), time.time(), rate, capacity)
+        return (1 - available_tokens) / rate if available_tokens < 1 else 0
+
+    def get_lockout(self, key):
+        locked_until = self.lockouts.get(key)
+        return max(locked_until - time.time(), 0) if locked_until else 0
+
+    def add_failure(self, key, timeout):
+        now = time.time()
+        with self.lock:
+            failures_number, expire_ts = self.failures.get(key, (0, 0))
+            failures_number = failures_number + 1 if expire_ts > now else 1
+            self.failures[key] = (failures_number, now + timeout)
+            return failures_number
+
+    def lock_out(self, key, timeout):
+        with self.lock:
+            self.failures.pop(key, None)
+            self.lockouts[key] = time.time() + timeout
+
+    def reset_failures(self, key):
+        with self.lock:
+            self.failures.pop(key, None)
+
+
+class CacheThrottleBackend:
+    """
+    Keeps buckets, failures and lockouts in the THROTTLE_CACHE_ALIAS cache shared by all worker processes.
+    Buckets are read and written without locking, so concurrent requests may occasionally get an extra token.
+    """
+    blocking = True
+
+    @property
+    def cache(self):
+        return caches[settings.THROTTLE_CACHE_ALIAS]
+
+    def consume(self, key, rate, capacity, tokens=1):
+        now = time.time()
+        bucket_key = 'throttle:bucket:{}'.format(key)
+        available_tokens = refill_bucket(self.cache.get(bucket_key), now, rate, capacity)
+        retry_after = (tokens - available_tokens) / rate if available_tokens < tokens else 0
+        self.cache.set(
+            bucket_key,
+            (available_tokens if retry_after else available_tokens - tokens, now),
+            math.ceil(capacity / rate) + 1
+        )
+        return retry_after
+
+    def get_wait(self, key, rate, capacity):
+        available_tokens = refill_bucket(self.cache.get('throttle:bucket:{}'.format(key)), time.time(), rate, capacity)
+        return (1 - available_tokens) / rate if available_tokens < 1 else 0
+
+    def get_lockout(self, key):
+        locked_until = self.cache.get('throttle:lockout:{}'.format(key))
+        return max(locked_until - time.time(), 0) if locked_until else 0
+
+    def add_failure(self, key, timeout):
+        failures_key = 'throttle:failures:{}'.format(key)
+        if self.cache.add(failures_key, 1, timeout):
+            return 1
+        try:
+            return self.cache.incr(failures_key)
+        except ValueError:
+            self.cache.set(failures_key, 1, timeout)
+            return 1
+
+    def lock_out(self, key, timeout):
+        self.cache.delete('throttle:failures:{}'.format(key))
+        self.cache.set('throttle:lockout:{}'.format(key), time.time() + timeout, timeout)
+
+    def reset_failures(self, key):
+        self.cache.delete('throttle:failures:{}'.format(key))
+
+
+class PasswordCheckThrottle:
+    """
+    Token buckets keyed by client IP and by resource route, with temporary lockouts after repeated failures.
+
+    Route buckets are spent only by failed checks, so popular links are not throttled for their recipients.
+    Lockouts are kept per client IP and route, so guessing a shared link does not lock it for everybody.
+    """
+
+    def __init__(self):
+        self._backend = None
+        self.allowed = 0
+        self.throttled_ips = 0
+        self.throttled_routes = 0
+        self.locked_out_checks = 0
+        self.lockouts = 0
+
+    @property
+    def backend(self):
+        if self._backend is None:
+            self._backend = import_string(settings.THROTTLE_BACKEND)()
+        return self._backend
+
+    def check_ip(self, client_ip, checks_number=1):
+        retry_after = self.backend.consume(
+            'ip:{}'.format(client_ip), settings.THROTTLE_IP_RATE, settings.THROTTLE_IP_BURST, checks_number
+        )
+        if retry_after:
+            self.throttled_ips += 1
+        return retry_after
+
+    def check_route(self, client_ip, resource_route):
+        retry_after = self.backend.get_lockout('client:{}:route:{}'.format(client_ip, resource_route))
+        if retry_after:
+            self.locked_out_checks += 1
+            return retry_after
+
+        retry_after = self.backend.get_wait(
+            'route:{}'.format(resource_route), settings.THROTTLE_ROUTE_RATE, settings.THROTTLE_ROUTE_BURST
+        )
+        if retry_after:
+            self.throttled_routes += 1
+        else:
+            self.allowed += 1
+        return retry_after
+
+    def check(self, client_ip, resource_route):
+        return self.check_ip(client_ip) or self.check_route(client_ip, resource_route)
+
+    def register_failure(self, client_ip, resource_route):
+        self.backend.consume('route:{}'.format(resource_route), settings.THROTTLE_ROUTE_RATE, settings.THROTTLE_ROUTE_BURST)
+        key = 'client:{}:route:{}'.format(client_ip, resource_route)
+        if self.backend.add_failure(key, settings.THROTTLE_LOCKOUT_TIME) >= settings.THROTTLE_LOCKOUT_FAILURES:
+            self.backend.lock_out(key, settings.THROTTLE_LOCKOUT_TIME)
+            self.lockouts += 1
+
+    def register_success(self, client_ip, resource_route):
+        self.backend.reset_failures('client:{}:route:{}'.format(client_ip, resource_route))
+
+    def register_result(self, client_ip, resource_route, status_code):
+        if status_code == 404:
+            self.register_failure(client_ip, resource_route)
+        elif status_code == 200:
+            self.register_success(client_ip, resource_route)
+
+    def get_stats(self):
+        return {
+            'allowed': self.allowed,
+            'throttled_ips': self.throttled_ips,
+            'throttled_routes': self.throttled_routes,
+            'locked_out_checks': self.locked_out_checks,
+            'lockouts': self.lockouts
+        }
+
+
+password_check_throttle = PasswordCheckThrottle()
+
+
+def get_client_ip(request):
+    forwarded_for = request.META.get('HTTP_X_FORWARDED_FOR')
+    if settings.THROTTLE_TRUST_FORWARDED_FOR and forwarded_for:
+        return forwarded_for.split(',')[-1].strip()
+    return request.META.get('REMOTE_ADDR')
+
+
+def get_throttled_response(retry_after):
+    response = HttpResponse(status=429)
+    response['Retry-After'] = math.ceil(retry_after)
+    return response
+
+
+def get_checked_route(request):
+    return '{}/{}/{}'.format(
+        request.POST.get('user_name'), request.POST.get('resource_type'), request.POST.get('resource_uid')
+    )
+
+
+async def run_throttle(func, *args):
+    if password_check_throttle.backend.blocking:
+        return await sync_to_async(func, thread_sensitive=False)(*args)
+    return func(*args)
+
+
+def throttle_password_checks(view_func):
+    """
+    Rejects password checks over the limits before the request is authenticated or touches the database.
+    A 404 response counts as a failed guess for the checked route, a 200 response resets the client's failures.
+    """
+    if asyncio.iscoroutinefunction(view_func):
+        @wraps(view_func)
+        async def wrapped_async_view(request, *args, **kwargs):
+            if not settings.THROTTLE_ENABLED:
+                return await view_func(request, *args, **kwargs)
+
+            client_ip, resource_route = get_client_ip(request), get_checked_route(request)
+            retry_after = await run_throttle(password_check_throttle.check, client_ip, resource_route)
+            if retry_after:
+                return get_throttled_response(retry_after)
+
+            response = await view_func(request, *args, **kwargs)
+            await run_throttle(password_check_throttle.register_result, client_ip, resource_route, response.status_code)
+            return response
+        return wrapped_async_view
+
+    @wraps(view_func)
+    def wrapped_view(request, *args, **kwargs):
+        if not settings.THROTTLE_ENABLED:
+            return view_func(request, *args, **kwargs)
+
+        client_ip, resource_route = get_client_ip(request), get_checked_route(request)
+        retry_after = password_check_throttle.check(client_ip, resource_route)
+        if retry_after:
+            return get_throttled_response(retry_after)
+
+        response = view_func(request, *args, **kwargs)
+        password_check_throttle.register_result(client_ip, resource_route, response.status_code)
+        return response
+    return wrapped_view
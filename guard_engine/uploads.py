@@ -0,0 +1,105 @@
+import datetime
+import hashlib
+import math
+import os
+import shutil
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Sum
+from django.utils import timezone
+from guard_engine.models import UploadSession
+
+COPY_BUFFER_SIZE = 64 * 1024
+
+
+class ChunkRejected(Exception):
+    pass
+
+
+def create_upload_session(user, file_name, total_size):
+    creation_ts = timezone.now()
+    return UploadSession.objects.create(
+        user=user,
+        file_name=os.path.basename(file_name),
+        total_size=total_size,
+        chunk_size=settings.UPLOAD_CHUNK_SIZE,
+        expire_ts=creation_ts + datetime.timedelta(seconds=settings.UPLOAD_SESSION_LIFETIME)
+    )
+
+
+def get_reserved_upload_size(user):
+    return UploadSession.objects.filter(
+        user=user, expire_ts__gte=timezone.now()
+    ).aggregate(reserved_size=Sum('total_size')).get('reserved_size') or 0
+
+
+def get_session_dir(upload_session):
+    return os.path.join(settings.UPLOAD_SESSIONS_ROOT, str(upload_session.upload_id))
+
+
+def get_chunk_path(upload_session, chunk_index):
+    return os.path.join(get_session_dir(upload_session), '{}.part'.format(chunk_index))
+
+
+def get_chunks_number(upload_session):
+    return max(math.ceil(upload_session.total_size / upload_session.chunk_size), 1)
+
+
+def get_expected_chunk_size(upload_session, chunk_index):
+    if chunk_index < get_chunks_number(upload_session) - 1:
+        return upload_session.chunk_size
+    return upload_session.total_size - chunk_index * upload_session.chunk_size
+
+
+def get_received_chunks(upload_session):
+    session_dir = get_session_dir(upload_session)
+    if not os.path.isdir(session_dir):
+        return []
+    return sorted(
+        int(chunk_name[:-len('.part')]) for chunk_name in os.listdir(session_dir) if chunk_name.endswith('.part')
+    )
+
+
+def write_chunk(upload_session, chunk_index, stream, content_length):
+    if not 0 <= chunk_index < get_chunks_number(upload_session):
+        raise ChunkRejected('Chunk index out of range')
+    if content_length != get_expected_chunk_size(upload_session, chunk_index):
+        raise ChunkRejected('Invalid chunk size')
+
+    os.makedirs(get_session_dir(upload_session), exist_ok=True)
+    chunk_path = get_chunk_path(upload_session, chunk_index)
+    written_size = 0
+    with open(chunk_path + '.tmp', 'wb') as chunk_file:
+        while written_size < content_length:
+            data = stream.read(min(COPY_BUFFER_SIZE, content_length - written_size))
+            if not data:
+                break
+            chunk_file.write(data)
+            written_size += len(data)
+
+    if written_size != content_length:
+        os.remove(chunk_path + '.tmp')
+        raise ChunkRejected('Incomplete chunk')
+    os.replace(chunk_path + '.tmp', chunk_path)
+
+
+def assemble_upload(upload_session):
+    assembled_dir = os.path.join(get_session_dir(upload_session), 'assembled')
+    os.makedirs(assembled_dir, exist_ok=True)
+    assembled_path = os.path.join(assembled_dir, upload_session.file_name)
+    content_hash = hashlib.sha256()
+    with open(assembled_path, 'wb') as assembled_file:
+        for chunk_index in range(get_chunks_number(upload_session)):
+            with open(get_chunk_path(upload_session, chunk_index), 'rb') as chunk_file:
+                for data in iter(lambda: chunk_file.read(COPY_BUFFER_SIZE), b''):
+                    content_hash.update(data)
+                    assembled_file.write(data)
+    return assembled_path, content_hash.hexdigest()
+
+
+def discard_upload_session(upload_session):
+    session_dir = get_session_dir(upload_session)
+    upload_session.delete()
+    # The chunks are still needed if the deletion is rolled back
+    transaction.on_commit(lambda: shutil.rmtree(session_dir, ignore_errors=True))
@@ -1,20 +1,30 @@
 import datetime
 import string
 from random import choice, randint
-from uuid import uuid4
 from django.conf import settings
 from django.contrib.auth.decorators import login_required
 from django.contrib.auth.mixins import LoginRequiredMixin
-from django.http import HttpResponseBadRequest, HttpResponseNotFound
+from django.http import HttpResponseBadRequest, HttpResponseForbidden, HttpResponseNotFound, HttpResponseRedirect
 from django.shortcuts import render, redirect
 from django.urls import reverse_lazy
 from django.views.decorators.http import require_GET
 from django.views.generic.edit import CreateView
+from guard_engine.access_tokens import get_access_token_resource, load_access_token
+from guard_engine.dashboard import InvalidCursor, dashboard_cache, get_page_cursors
+from guard_engine.downloads import is_download_token_valid, serve_file
 from guard_engine.models import SecuredUrl, SecuredFile
+from guard_engine.quotas import (
+    get_user_quota, is_files_limit_reached, is_links_limit_reached, lock_user_quota, record_quota_rejection
+)
+from guard_engine.resource_ids import new_resource_route
+from guard_engine.route_cache import route_cache
+from guard_engine.throttling import get_client_ip, get_throttled_response, password_check_throttle
+from guard_engine.visits import access_visit_buffer
 from django.apps import apps
 from django.utils import timezone
+from django.utils.crypto import constant_time_compare
 from django.contrib.auth import logout
-from django.db.models import Sum
+from django.db import transaction
 from decimal import Decimal, ROUND_HALF_UP
 
 
@@ -30,15 +40,27 @@ def user_logout(request):
 def user_resources(request):
     request_user = request.user
     verification_ts = timezone.now()
-    SecuredUrl.objects.filter(user=request_user, expire_ts__lt=verification_ts).delete()
-    SecuredFile.objects.filter(user=request_user, expire_ts__lt=verification_ts).delete()
 
-    files_queryset = SecuredFile.objects.filter(user=request_user, expire_ts__gte=verification_ts)
-    files_size = files_queryset.aggregate(files_size=Sum('file_size')).get('files_size')
+    quota = get_user_quota(request_user)
+    files_size = quota.files_size
+
+    page_cursors = get_page_cursors(request.GET)
+    try:
+        urls = dashboard_cache.get_resources_list(
+            SecuredUrl, request_user, verification_ts, page_cursors,
+            'You have no urls secured. Add something new :)'
+        )
+        files = dashboard_cache.get_resources_list(
+            SecuredFile, request_user, verification_ts, page_cursors,
+            'You have no files secured. Add something new :)'
+        )
+    except InvalidCursor:
+        return HttpResponseBadRequest()
 
     return render(request, 'pages/user_resources.html', {
-        'urls': list(SecuredUrl.objects.filter(user=request_user, expire_ts__gte=verification_ts)),
-        'files': list(files_queryset),
+        'urls': urls,
+        'files': files,
+        'links_number': quota.links_number,
         'files_size': Decimal(files_size / settings.FILE_LIMIT_DIVISOR).quantize(
             Decimal('.0001'), rounding=ROUND_HALF_UP
         ) if files_size else 0,
@@ -47,25 +69,21 @@ def user_resources(request):
     })
 
 
-@login_required
-@require_GET
-def resource_verifier(request, user_name, resource_type, resource_uid):
-    if (
-        not isinstance(user_name, str) or
-        len(user_name) < 2 or
-        not isinstance(resource_type, str) or
-        resource_type not in ['urls', 'files'] or
-        not isinstance(resource_uid, str) or
-        len(resource_uid) < 7
-    ):
-        return HttpResponseBadRequest
+def is_resource_route_valid(user_name, resource_type, resource_uid):
+    return (
+        isinstance(user_name, str) and
+        len(user_name) >= 2 and
+        isinstance(resource_type, str) and
+        resource_type in ['urls', 'files'] and
+        isinstance(resource_uid, str) and
+        len(resource_uid) >= 7
+    )
+
 
+def get_resource_verifier_response(request, user_name, resource_type, resource_uid):
     source = apps.get_model('guard_engine', 'SecuredUrl' if resource_type == 'urls' else 'SecuredFile')
     try:
-        resource = source.objects.get(
-            user__username=user_name,
-            resource_route='{}/{}/{}'.format(user_name, resource_type, resource_uid)
-        )
+        resource = route_cache.get(source, user_name, '{}/{}/{}'.format(user_name, resource_type, resource_uid))
 
     except (SecuredUrl.DoesNotExist, SecuredFile.DoesNotExist) as e:
         return HttpResponseNotFound()
@@ -76,10 +94,78 @@ def resource_verifier(request, user_name, resource_type, resource_uid):
             'id': resource.id
         })
 
-    resource.delete()
     return HttpResponseNotFound()
 
 
+@login_required
+@require_GET
+def resource_verifier(request, user_name, resource_type, resource_uid):
+    if not is_resource_route_valid(user_name, resource_type, resource_uid):
+        return HttpResponseBadRequest()
+
+    return get_resource_verifier_response(request, user_name, resource_type, resource_uid)
+
+
+def get_verified_download_response(request, user_name, resource_route, password):
+    try:
+        resource = route_cache.get(SecuredFile, user_name, resource_route)
+    except SecuredFile.DoesNotExist:
+        return HttpResponseNotFound()
+
+    if not resource.is_accessible():
+        return HttpResponseNotFound()
+
+    download_token = request.GET.get('token')
+    if not (
+        (download_token and is_download_token_valid(download_token, resource)) or
+        (password and constant_time_compare(resource.password, password))
+    ):
+        return HttpResponseForbidden()
+
+    return serve_file(request, resource)
+
+
+def get_file_download_response(request, user_name, resource_uid):
+    resource_route = '{}/files/{}'.format(user_name, resource_uid)
+    password = request.META.get('HTTP_X_RESOURCE_PASSWORD')
+    if not password or not settings.THROTTLE_ENABLED:
+        return get_verified_download_response(request, user_name, resource_route, password)
+
+    # Passwords sent in the header are guesses like the ones sent to the password check api
+    client_ip = get_client_ip(request)
+    retry_after = password_check_throttle.check(client_ip, resource_route)
+    if retry_after:
+        return get_throttled_response(retry_after)
+
+    response = get_verified_download_response(request, user_name, resource_route, password)
+    if response.status_code in (403, 404):
+        password_check_throttle.register_failure(client_ip, resource_route)
+    elif response.status_code < 400:
+        password_check_throttle.register_success(client_ip, resource_route)
+    return response
+
+
+@require_GET
+def download_file(request, user_name, resource_uid):
+    return get_file_download_response(request, user_name, resource_uid)
+
+
+@require_GET
+def resource_access(request, token):
+    access = load_access_token(token)
+    if access is None:
+        return HttpResponseForbidden()
+
+    resource = get_access_token_resource(access)
+    if isinstance(resource, SecuredUrl):
+        response = HttpResponseRedirect(resource.url_route)
+    else:
+        response = serve_file(request, resource)
+    if response.status_code < 400:
+        access_visit_buffer.add(resource, request.META.get('HTTP_USER_AGENT', '')[:64])
+    return response
+
+
 @login_required
 @require_GET
 def resource_details(request, resource_type, resource_id):
@@ -104,7 +190,6 @@ def resource_details(request, resource_type, resource_id):
             'expire_ts': resource.expire_ts
         })
 
-    resource.delete()
     return HttpResponseNotFound()
 
 
@@ -113,29 +198,22 @@ class SecuredUrlCreate(LoginRequiredMixin, CreateView):
     fields = ['url_route']
 
     def get(self, request, *args, **kwargs):
-        request_user = request.user
-        verification_ts = timezone.now()
-        SecuredUrl.objects.filter(user=request_user, expire_ts__lt=verification_ts).delete()
-
-        links_number = SecuredUrl.objects.filter(user=request_user, expire_ts__gte=verification_ts).count()
-        if links_number >= settings.LINKS_LIMIT:
+        if is_links_limit_reached(request.user):
             return redirect('user_resources')
 
         return super().get(request)
 
+    @transaction.atomic
     def form_valid(self, form):
         request_user = self.request.user
         creation_ts = timezone.now()
 
-        links_number = SecuredUrl.objects.filter(user=request_user, expire_ts__gte=creation_ts).count()
-        if links_number + 1 > settings.LINKS_LIMIT:
+        if lock_user_quota(request_user, links_number=1).links_number + 1 > settings.LINKS_LIMIT:
+            record_quota_rejection('urls')
             return redirect('secure_file')
 
         form.instance.user = request_user
-        form.instance.resource_route = "{user_name}/urls/{resource_uid}".format(
-            user_name=request_user.username,
-            resource_uid=uuid4().time_low
-        )
+        form.instance.resource_route = new_resource_route(request_user.username, 'urls')
         form.instance.password = "".join(
             choice(string.ascii_letters + string.punctuation + string.digits) for i in range(randint(8, 16))
         )
@@ -159,40 +237,29 @@ class SecuredFileCreate(LoginRequiredMixin, CreateView):
     fields = ['persisted_file']
 
     def get(self, request, *args, **kwargs):
-        request_user = request.user
-        verification_ts = timezone.now()
-        SecuredFile.objects.filter(user=request_user, expire_ts__lt=verification_ts).delete()
-
-        files_size = SecuredFile.objects.filter(
-            user=request_user, expire_ts__gte=verification_ts
-        ).aggregate(files_size=Sum('file_size')).get('files_size')
-
-        if files_size and files_size >= settings.USER_FILES_LIMIT:
+        if is_files_limit_reached(request.user):
             return redirect('user_resources')
 
         return super().get(request)
 
+    @transaction.atomic
     def form_valid(self, form):
         request_user = self.request.user
         creation_ts = timezone.now()
-
-        files_size = SecuredFile.objects.filter(
-            user=request_user, expire_ts__gte=creation_ts
-        ).aggregate(files_size=Sum('file_size')).get('files_size')
         received_file = form.instance.persisted_file
 
         if not received_file:
             return redirect('secure_file')
         if received_file.size > settings.FILE_LIMIT_SIZE:
+            record_quota_rejection('files')
             return redirect('secure_file')
-        if files_size and ((files_size + received_file.size) > settings.USER_FILES_LIMIT):
+        quota = lock_user_quota(request_user, files_size=received_file.size)
+        if quota.files_size + received_file.size > settings.USER_FILES_LIMIT:
+            record_quota_rejection('files')
             return redirect('secure_file')
 
         form.instance.user = request_user
-        form.instance.resource_route = "{user_name}/files/{resource_uid}".format(
-            user_name=request_user.username,
-            resource_uid=uuid4().time_low
-        )
+        form.instance.resource_route = new_resource_route(request_user.username, 'files')
         form.instance.password = "".join(
             choice(string.ascii_letters + string.punctuation + string.digits) for i in range(randint(8, 16))
         )
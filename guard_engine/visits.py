@@ -0,0 +1,148 @@
+import atexit
+import logging
+import threading
+import time
+from collections import Counter
+
+from django.conf import settings
+from django.db import close_old_connections, transaction
+from django.db.models import Case, F, IntegerField, Value, When
+from guard_engine.route_cache import route_cache
+from guard_engine.stats import record_first_visit
+
+logger = logging.getLogger(__name__)
+
+
+def update_visits(model, visits):
+    if not visits:
+        return
+
+    with transaction.atomic():
+        first_visits = Counter(
+            model.objects.select_for_update().filter(id__in=visits, visit_counter=0).values_list('creation_date', flat=True)
+        )
+        model.objects.filter(id__in=visits).update(
+            visit_counter=F('visit_counter') + Case(
+                *[When(id=resource_id, then=Value(visit_number)) for resource_id, (visit_number, _) in visits.items()],
+                output_field=IntegerField()
+            ),
+            latest_user_agent=Case(
+                *[When(id=resource_id, then=Value(user_agent)) for resource_id, (_, user_agent) in visits.items()],
+                default=F('latest_user_agent')
+            )
+        )
+        for creation_date, visited in first_visits.items():
+            record_first_visit(model, creation_date, visited)
+
+
+def record_single_visit(resource, user_agent):
+    model = type(resource)
+    if not resource.visit_counter:
+        # The cached resource would keep its zero counter and repeat the first visit check on every visit
+        route_cache.invalidate(model, resource.resource_route)
+        if model.objects.filter(id=resource.id, visit_counter=0).update(visit_counter=1, latest_user_agent=user_agent):
+            record_first_visit(model, resource.creation_date)
+            return
+
+    model.objects.filter(id=resource.id).update(visit_counter=F('visit_counter') + 1, latest_user_agent=user_agent)
+
+
+class VisitBuffer:
+    """
+    Collects visits in memory and writes them with one update per resource type.
+
+    Buffered visits are flushed when the buffer is full and every ``VISIT_BUFFER_FLUSH_INTERVAL`` seconds
+    by a background thread, visits which could not be written are kept for the next flush.
+    """
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.pending = {}
+        self.pending_visits = 0
+        self.last_flush_ts = time.monotonic()
+        self.flush_thread = None
+
+    def add(self, resource, user_agent):
+        with self.lock:
+            model_visits = self.pending.setdefault(type(resource), {})
+            visit_number, _ = model_visits.get(resource.id, (0, None))
+            model_visits[resource.id] = (visit_number + 1, user_agent)
+            self.pending_visits += 1
+            should_flush = (
+                self.pending_visits >= settings.VISIT_BUFFER_SIZE or
+                time.monotonic() - self.last_flush_ts >= settings.VISIT_BUFFER_FLUSH_INTERVAL
+            )
+
+        if self.flush_thread is None:
+            self.start()
+        if should_flush:
+            self.flush()
+
+    def restore(self, model, visits):
+        with self.lock:
+            model_visits = self.pending.setdefault(model, {})
+            for resource_id, (visit_number, user_agent) in visits.items():
+                # Visits added since the failed flush are newer, their user agent is kept
+                pending_number, pending_user_agent = model_visits.get(resource_id, (0, user_agent))
+                model_visits[resource_id] = (pending_number + visit_number, pending_user_agent)
+                self.pending_visits += visit_number
+
+    def flush(self):
+        with self.lock:
+            pending, self.pending = self.pending, {}
+            self.pending_visits = 0
+            self.last_flush_ts = time.monotonic()
+
+        for model, visits in pending.items():
+            try:
+                update_visits(model, visits)
+            except Exception:
+                logger.exception('Flushing %s visits failed', model.__name__)
+                self.restore(model, visits)
+
+    def flush_periodically(self):
+        while True:
+            time.sleep(settings.VISIT_BUFFER_FLUSH_INTERVAL)
+            try:
+                self.flush()
+            finally:
+                close_old_connections()
+
+    def start(self):
+        with self.lock:
+            if self.flush_thread is not None:
+                return
+            self.flush_thread = threading.Thread(target=self.flush_periodically, name='visit-buffer', daemon=True)
+        self.flush_thread.start()
+
+
+visit_buffer = VisitBuffer()
+atexit.register(visit_buffer.flush)
+
+# Visits through access tokens are always buffered, the access endpoint does not query the database
+access_visit_buffer = VisitBuffer()
+atexit.register(access_visit_buffer.flush)
+
+
+def record_visit(resource, user_agent):
+    user_agent = user_agent[:64]
+    if settings.VISIT_BUFFER_ENABLED:
+        visit_buffer.add(resource, user_agent)
+    else:
+        record_single_visit(resource, user_agent)
+
+
+def record_visits(resources, user_agent):
+    user_agent = user_agent[:64]
+    if settings.VISIT_BUFFER_ENABLED:
+        for resource in resources:
+            visit_buffer.add(resource, user_agent)
+        return
+
+    models_visits = {}
+    for resource in resources:
+        model_visits = models_visits.setdefault(type(resource), {})
+        visit_number, _ = model_visits.get(resource.id, (0, None))
+        model_visits[resource.id] = (visit_number + 1, user_agent)
+    for model, visits in models_visits.items():
+        update_visits(model, visits)